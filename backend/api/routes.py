@@ -1,27 +1,147 @@
+import asyncio
+import codecs
+import json
 import logging
-from datetime import timedelta
-from typing import Dict
+import os
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from functools import partial
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Literal, Optional, Set, Tuple
 
 from fastapi import (
-    APIRouter, HTTPException, Depends, status, Request, File, UploadFile
+    APIRouter, HTTPException, Depends, status, Request, File, UploadFile, Query
 )
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
+import numpy as np
 import pandas as pd
+from pydantic import ValidationError
 
-from db.firebase import upload_patient_data_to_firebase, get_patient_data
+from db.storage import upload_patient_data_to_firebase, query_patient_data, InvalidQuery
 from models.schemas import (
     Token, PatientData, PredictionResponse, MessageResponse,
     PdfExtractionResponse, FirebaseResponse
 )
-from auth.auth import create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
+from auth.auth import (
+    create_access_token, get_current_user, require_admin, auth_stats, ACCESS_TOKEN_EXPIRE_MINUTES
+)
 from services.users import authenticate_user
-from services.utils import prepare_features, extract_medical_data_from_pdf, predict
+from services.executor import run_in_pool, pools, PoolOverloaded, OVERLOAD_RETRY_AFTER_SECONDS
+from services import metrics
+from services.metrics import count_predictions, time_stage
+from services.profiling import (
+    collapsed_stacks, current_profile, get_sample_every, profile_store, set_sample_every
+)
+from services.cache import ExtractionCache, PredictionCache, content_digest
+from services.sessions import SessionStore
+from services.startup import startup_report
+from services.registry import (
+    ModelBundle, ModelVersionNotFound, RegistryError, activate_model, registry
+)
+from services.utils import (
+    prepare_features, extract_medical_data_from_bytes, predict, predict_batch,
+    FEATURE_COLUMNS, PDF_PATTERNS_VERSION
+)
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+# ------------------ Config ------------------
+PREDICT_BATCH_CHUNK_SIZE = int(os.getenv("PREDICT_BATCH_CHUNK_SIZE", "1024"))
+INTEGER_COLUMNS = ["Pregnancies", "Age"]
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "500"))
+BULK_MAX_FILE_BYTES = int(os.getenv("BULK_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "1024"))
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR") or None
+EXTRACTION_CACHE_DISK_MAX_MB = int(os.getenv("EXTRACTION_CACHE_DISK_MAX_MB", "256"))
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "500"))
+
 router = APIRouter()
-user_extracted_data: Dict[str, dict] = {}
+extraction_cache = ExtractionCache(
+    PDF_PATTERNS_VERSION,
+    max_entries=EXTRACTION_CACHE_SIZE,
+    disk_dir=EXTRACTION_CACHE_DIR,
+    disk_max_bytes=EXTRACTION_CACHE_DISK_MAX_MB * 1024 * 1024
+)
+prediction_cache = PredictionCache(
+    FEATURE_COLUMNS,
+    maxsize=PREDICTION_CACHE_SIZE,
+    ttl=PREDICTION_CACHE_TTL or None
+)
+
+
+def _overloaded(error: PoolOverloaded) -> HTTPException:
+    """Map a full worker pool to a 503 response that tells clients when to retry."""
+    logger.warning(str(error))
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": str(OVERLOAD_RETRY_AFTER_SECONDS)}
+    )
+
+
+def _record_id(digest: str) -> str:
+    """Stable id for an uploaded report, derived from its content digest."""
+    return digest[:16]
+
+
+def _latest_key(username: str) -> str:
+    return f"latest:{username}"
+
+
+def _record_key(username: str, record_id: str) -> str:
+    return f"record:{username}:{record_id}"
+
+
+def _session_store(request: Request) -> SessionStore:
+    """
+    The store opened by the app's lifespan for extracted report data: the
+    user's latest upload plus every report addressable by record id.
+    """
+    return request.app.state.session_store
+
+
+async def _store_extracted(
+    store: SessionStore, username: str, record_id: str, data: dict, latest: bool
+) -> None:
+    """Save an extracted report under its record id and, optionally, as the user's latest upload."""
+    await run_in_pool("io", store.set, _record_key(username, record_id), data)
+    if latest:
+        await run_in_pool("io", store.set, _latest_key(username), data)
+
+
+async def _extract_cached(contents: bytes, digest: str) -> Optional[Tuple[Dict[str, Any], Dict[str, int]]]:
+    """
+    Extract a PDF on the PDF pool, reusing the cached result for identical bytes.
+    """
+    result = await run_in_pool("io", extraction_cache.get, digest)
+    if result is not None:
+        logger.info(f"Extraction cache hit for {digest[:16]}.")
+        return result
+    with time_stage("extract"):
+        result = await run_in_pool("pdf", extract_medical_data_from_bytes, contents)
+    if result:
+        await run_in_pool("io", extraction_cache.set, digest, result)
+    return result
+
+
+def _predict_single(bundle: ModelBundle, features: Dict[str, Any]) -> Tuple[int, Dict[str, float], float]:
+    """Score one row directly against a model bundle (used when micro-batching is off)."""
+    with time_stage("prepare_features"):
+        X = prepare_features(pd.DataFrame([features]))
+    return predict(bundle.model, X, bundle.engine, bundle.get_explainer)
+
+
+def _require_bundle(request: Request) -> ModelBundle:
+    """The model bundle serving this request; 503 if no model is loaded."""
+    bundle = getattr(request.app.state, "bundle", None)
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Model is not loaded.")
+    return bundle
 
 
 @router.get("/", response_model=MessageResponse)
@@ -31,6 +151,24 @@ def root():
     return {"message": "Welcome to the Diabetes Prediction API!"}
 
 
+@router.get("/ready")
+def ready(request: Request):
+    """
+    Readiness probe: 200 once the model is loaded and warmed up, 503 before or if warm-up failed.
+
+    The body carries the worker's startup timing report and any warm-up error.
+    """
+    state = request.app.state
+    is_ready = bool(getattr(state, "ready", False)) and getattr(state, "bundle", None) is not None
+    content = {"ready": is_ready, "startup": startup_report.as_dict()}
+    if getattr(state, "warmup_error", None):
+        content["warmup_error"] = state.warmup_error
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=content
+    )
+
+
 @router.post("/login", response_model=Token)
 def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """Login endpoint to get access token"""
@@ -62,32 +200,225 @@ async def extract_from_pdf(
     """
     logger.info(f"Extracting data from PDF for user: {current_user['username']}")
     try:
-        contents = await file.read()
-        temp_path = f"/tmp/{file.filename}"
-        with open(temp_path, "wb") as f:
-            f.write(contents)
-
-        pdf_extracted_data = extract_medical_data_from_pdf(temp_path)
-        if not pdf_extracted_data:
+        with time_stage("upload"):
+            contents = await file.read()
+        digest = content_digest(contents)
+        result = await _extract_cached(contents, digest)
+        if not result:
             logger.warning("Could not extract data from PDF.")
             raise HTTPException(status_code=400, detail="Could not extract data from PDF.")
 
-        user_extracted_data[current_user["username"]] = pdf_extracted_data
+        pdf_extracted_data, source_pages = result
+        record_id = _record_id(digest)
+        await _store_extracted(
+            _session_store(request), current_user["username"], record_id, pdf_extracted_data, latest=True
+        )
         logger.info(f"Extracted data stored for user: {current_user['username']}")
-        return {"extracted_data": pdf_extracted_data}
+        return {
+            "extracted_data": pdf_extracted_data,
+            "source_pages": source_pages,
+            "record_id": record_id
+        }
+    except HTTPException:
+        raise
+    except PoolOverloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         logger.error(f"Error extracting data from PDF: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# (name, reader, error): reader() returns the PDF bytes; None when error is set
+BulkUpload = Tuple[str, Optional[Callable[[], bytes]], Optional[str]]
+_bulk_limit: Optional[asyncio.Semaphore] = None
+_bulk_limit_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _bulk_limiter() -> asyncio.Semaphore:
+    """
+    Limiter shared by every bulk request: at most one report per PDF worker
+    is being read and extracted at a time, however many bulk uploads run,
+    so they cannot fill the pool's queue and starve interactive requests.
+    """
+    global _bulk_limit, _bulk_limit_loop
+    loop = asyncio.get_running_loop()
+    # Re-created if the app is restarted on a new event loop (as in tests)
+    if _bulk_limit is None or _bulk_limit_loop is not loop:
+        _bulk_limit = asyncio.Semaphore(pools["pdf"].workers)
+        _bulk_limit_loop = loop
+    return _bulk_limit
+
+
+def _read_upload(fileobj: Any) -> bytes:
+    fileobj.seek(0)
+    return fileobj.read()
+
+
+def _list_uploads(files: List[UploadFile]) -> Tuple[List[BulkUpload], List[zipfile.ZipFile]]:
+    """
+    List the reports in uploaded PDFs and ZIP archives without reading them.
+
+    Only ZIP central directories are read here; each report's bytes are read
+    by its reader when it is its turn to be extracted.
+
+    Returns:
+        Tuple containing the uploads and the opened archives, which must stay
+        open until every reader has run.
+    """
+    uploads: List[BulkUpload] = []
+    archives: List[zipfile.ZipFile] = []
+    for file in files:
+        if not zipfile.is_zipfile(file.file):
+            uploads.append((file.filename, partial(_read_upload, file.file), None))
+            continue
+        try:
+            archive = zipfile.ZipFile(file.file)
+        except zipfile.BadZipFile as e:
+            uploads.append((file.filename, None, f"Invalid ZIP archive: {e}"))
+            continue
+        archives.append(archive)
+        for info in archive.infolist():
+            member = f"{file.filename}/{info.filename}"
+            if info.is_dir() or not info.filename.lower().endswith(".pdf"):
+                continue
+            if info.file_size > BULK_MAX_FILE_BYTES:
+                uploads.append((member, None, f"File exceeds {BULK_MAX_FILE_BYTES} bytes."))
+                continue
+            uploads.append((member, partial(archive.read, info), None))
+    return uploads, archives
+
+
+async def _extract_bulk(
+    store: SessionStore,
+    username: str,
+    uploads: List[BulkUpload],
+    archives: List[zipfile.ZipFile]
+) -> AsyncIterator[str]:
+    """
+    Extract uploaded reports in parallel and yield one NDJSON line per file as each finishes.
+
+    A report's bytes are read only once it holds a slot of the shared bulk
+    limiter, so memory is bounded by the number of PDF workers rather than
+    the size of the upload.
+    """
+    limit = _bulk_limiter()
+
+    async def extract_one(name: str, read: Callable[[], bytes]) -> dict:
+        try:
+            with time_stage("upload"):
+                contents = await run_in_pool("io", read)
+        except PoolOverloaded as e:
+            return {"file": name, "error": str(e)}
+        except Exception as e:
+            return {"file": name, "error": f"Could not read file: {e}"}
+        try:
+            digest = content_digest(contents)
+            result = await _extract_cached(contents, digest)
+            if not result:
+                return {"file": name, "error": "Could not extract data from PDF."}
+
+            data, source_pages = result
+            record_id = _record_id(digest)
+            await _store_extracted(store, username, record_id, data, latest=False)
+        except PoolOverloaded as e:
+            return {"file": name, "error": str(e)}
+        except Exception as e:
+            logger.error(f"Bulk extraction of {name} failed: {e}", exc_info=True)
+            return {"file": name, "error": str(e)}
+        return {
+            "file": name,
+            "record_id": record_id,
+            "extracted_data": data,
+            "source_pages": source_pages
+        }
+
+    finished: asyncio.Queue = asyncio.Queue()
+    tasks: Set[asyncio.Task] = set()
+
+    def on_done(task: asyncio.Task) -> None:
+        # Runs even for a task cancelled before it started, so the slot is always returned
+        limit.release()
+        tasks.discard(task)
+        if not task.cancelled():
+            finished.put_nowait(task.result())
+
+    async def schedule() -> None:
+        for name, read, error in uploads:
+            if error is not None:
+                finished.put_nowait({"file": name, "error": error})
+                continue
+            await limit.acquire()
+            task = asyncio.create_task(extract_one(name, read))
+            tasks.add(task)
+            task.add_done_callback(on_done)
+
+    scheduler = asyncio.create_task(schedule())
+    extracted = 0
+    try:
+        for _ in range(len(uploads)):
+            line = await finished.get()
+            extracted += "record_id" in line
+            yield json.dumps(line) + "\n"
+    finally:
+        scheduler.cancel()
+        for task in list(tasks):
+            task.cancel()
+        for archive in archives:
+            archive.close()
+    logger.info(f"Bulk extraction stored {extracted} of {len(uploads)} report(s) for user: {username}")
+
+
+@router.post("/classical/extract-patient-data/bulk")
+async def extract_bulk_from_pdfs(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Extracts medical data from several PDFs and/or ZIP archives of PDFs.
+
+    Files are parsed in parallel on the PDF worker pool and results are
+    streamed back as NDJSON in completion order: one line per file with its
+    ``record_id`` and extracted data, or an ``error``. Each ``record_id`` can
+    be passed to ``/classical/predict`` to score that report later.
+    """
+    logger.info(f"Bulk extraction of {len(files)} upload(s) for user: {current_user['username']}")
+    try:
+        uploads, archives = await run_in_pool("io", _list_uploads, files)
+    except PoolOverloaded as e:
+        raise _overloaded(e)
+    if len(uploads) > BULK_MAX_FILES:
+        for archive in archives:
+            archive.close()
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many files; at most {BULK_MAX_FILES} reports per request."
+        )
+
+    return StreamingResponse(
+        _extract_bulk(_session_store(request), current_user["username"], uploads, archives),
+        media_type="application/x-ndjson"
+    )
+
+
 @router.get("/classical/predict", response_model=PredictionResponse)
 async def predict_diabetes(
     request: Request,
+    record_id: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
 ):
+    """
+    Predicts for the user's last uploaded report, or for ``record_id`` if given.
+    """
     logger.info(f"Prediction requested by user: {current_user['username']}")
     try:
-        patient_data = user_extracted_data.get(current_user["username"])
+        if record_id is not None:
+            session_key = _record_key(current_user["username"], record_id)
+        else:
+            session_key = _latest_key(current_user["username"])
+        patient_data = await run_in_pool("io", _session_store(request).get, session_key)
+        if patient_data is None and record_id is not None:
+            raise HTTPException(status_code=404, detail=f"No extracted record with id {record_id}.")
         date = None
         if patient_data and "Date" in patient_data:
             date = {'Date': patient_data.pop('Date', None)}
@@ -99,54 +430,511 @@ async def predict_diabetes(
                 detail="No extracted data found for user. Please upload a PDF first."
             )
 
-        input_patient_data = PatientData(**patient_data)
-        model = request.app.state.model
-        df = pd.DataFrame([input_patient_data.dict()])
-        X = prepare_features(df)
-        prediction_class, top_factors, score = predict(model, X)
+        with time_stage("validate"):
+            input_patient_data = PatientData(**patient_data)
+            features = input_patient_data.dict()
+        bundle = _require_bundle(request)
+        cached = prediction_cache.get(bundle.fingerprint, features)
+        batcher = getattr(request.app.state, "batcher", None)
+        if cached is not None:
+            prediction_class, top_factors, score = cached
+        # Profiled requests score inline so the model's frames land in their profile
+        elif batcher is not None and batcher.running and current_profile() is None:
+            prediction_class, top_factors, score = await batcher.submit(features, bundle)
+        else:
+            prediction_class, top_factors, score = await run_in_pool(
+                "cpu", _predict_single, bundle, features
+            )
+        if cached is None:
+            prediction_cache.set(bundle.fingerprint, features, (prediction_class, top_factors, score))
+        count_predictions([prediction_class])
 
         response_data = {
             "prediction": prediction_class,
             "top_factors": top_factors,
-            "score": score
+            "score": score,
+            "model_version": bundle.version
         }
 
-        user_extracted_data[current_user["username"]].update(response_data)
+        patient_data.update(response_data)
         if date:
-            user_extracted_data[current_user["username"]].update(date)
+            patient_data.update(date)
+        await run_in_pool("io", _session_store(request).set, session_key, patient_data)
 
-        upload_patient_data_to_firebase(
-            current_user["username"],
-            user_extracted_data[current_user["username"]]
-        )
+        writer = getattr(request.app.state, "writer", None)
+        with time_stage("persist"):
+            if writer is None or not writer.submit(current_user["username"], patient_data):
+                await run_in_pool(
+                    "io",
+                    upload_patient_data_to_firebase,
+                    current_user["username"],
+                    patient_data
+                )
         logger.info(f"Prediction completed and data uploaded for user: {current_user['username']}")
         return response_data
 
+    except HTTPException:
+        raise
+    except PoolOverloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _iter_csv_chunks(fileobj: Any, chunk_size: int) -> Iterator[Tuple[pd.DataFrame, Dict[int, str]]]:
+    """
+    Read a CSV upload chunk by chunk, yielding valid feature rows and per-row errors.
+
+    Row numbers (the DataFrame index) are zero-based positions in the file.
+    """
+    for chunk in pd.read_csv(fileobj, chunksize=chunk_size):
+        missing = [col for col in FEATURE_COLUMNS if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"Missing columns in CSV: {missing}")
+
+        features = chunk[FEATURE_COLUMNS].apply(pd.to_numeric, errors="coerce")
+        # NaN covers missing and non-numeric cells; "inf" parses as infinity
+        invalid = ~np.isfinite(features).all(axis=1)
+        ints = features[INTEGER_COLUMNS]
+        invalid |= (ints % 1 != 0).any(axis=1)
+
+        errors = {int(row): "Missing, non-numeric or infinite feature values." for row in features.index[invalid]}
+        valid = features[~invalid]
+        yield valid.astype({col: "int64" for col in INTEGER_COLUMNS}), errors
+
+
+def _iter_json_array(fileobj: Any, block_size: int = 64 * 1024) -> Iterator[Any]:
+    """
+    Decode the elements of a top-level JSON array one at a time.
+
+    Reads ``fileobj`` (binary, UTF-8) in blocks of ``block_size`` bytes and
+    keeps only the unparsed tail in memory, so a large array is never
+    buffered or decoded as a whole.
+
+    Raises:
+        ValueError: If the body is not a JSON array or is malformed.
+    """
+    reader = codecs.getincrementaldecoder("utf-8")()
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        block = fileobj.read(block_size)
+        eof = not block
+        buf = buf[pos:] + reader.decode(block, final=eof)
+        pos = 0
+        return True
+
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return ""
+
+    if next_char() != "[":
+        raise ValueError("Body must be a JSON array of patient rows.")
+    pos += 1
+    if next_char() == "]":
+        pos += 1
+    else:
+        while True:
+            next_char()
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError as e:
+                    if fill():
+                        continue
+                    raise ValueError(f"Malformed JSON array: {e.msg}.")
+                # A number cut off at the end of the block ("1.5e" of "1.5e3")
+                # decodes early; read on until something follows it
+                if eof or buf[end:].strip("0123456789+-.eE") or not fill():
+                    break
+            pos = end
+            yield item
+            sep = next_char()
+            pos += 1
+            if sep == "]":
+                break
+            if sep != ",":
+                raise ValueError("Malformed JSON array: expected ',' or ']' between rows.")
+    if next_char():
+        raise ValueError("Malformed JSON array: unexpected data after the closing ']'.")
+
+
+def _iter_json_chunks(rows: Iterator[Any], chunk_size: int) -> Iterator[Tuple[pd.DataFrame, Dict[int, str]]]:
+    """
+    Validate a stream of PatientData rows chunk by chunk.
+    """
+    rows = iter(rows)
+    start = 0
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        records, index, errors = [], [], {}
+        for row, item in enumerate(batch, start=start):
+            try:
+                records.append(PatientData(**item).dict())
+                index.append(row)
+            except (ValidationError, TypeError) as e:
+                errors[row] = str(e)
+        start += len(batch)
+        yield pd.DataFrame(records, index=index, columns=FEATURE_COLUMNS), errors
+
+
+async def _spool_body(request: Request) -> Any:
+    """Copy the request body to a spooled temporary file, rewound for reading."""
+    spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    async for block in request.stream():
+        spool.write(block)
+    spool.seek(0)
+    return spool
+
+
+def _score_next_chunk(
+    chunks: Iterator[Tuple[pd.DataFrame, Dict[int, str]]],
+    bundle: ModelBundle,
+    include_factors: bool
+) -> Optional[List[str]]:
+    """
+    Read and score the next validated chunk, returning one NDJSON line per input row in input order.
+
+    Returns None once the input is exhausted.
+    """
+    try:
+        X, errors = next(chunks)
+    except StopIteration:
+        return None
+    results = {row: {"row": row, "error": message} for row, message in errors.items()}
+    if len(X):
+        preds, scores, factors = predict_batch(bundle.model, X, bundle.engine, bundle.get_explainer, include_factors)
+        count_predictions(preds)
+        for row, pred, score, top in zip(X.index, preds, scores, factors):
+            result = {"row": int(row), "prediction": int(pred), "score": float(score)}
+            if include_factors:
+                result["top_factors"] = top
+            results[int(row)] = result
+    return [json.dumps(results[row]) + "\n" for row in sorted(results)]
+
+
+async def _score_chunks(
+    chunks: Iterator[Tuple[pd.DataFrame, Dict[int, str]]],
+    bundle: ModelBundle,
+    include_factors: bool,
+    first: Optional[List[str]]
+) -> AsyncIterator[str]:
+    """
+    Stream the already scored first chunk, then score the rest one chunk at a time in the cpu pool.
+
+    The whole upload is scored by ``bundle``, even if the model is swapped
+    meanwhile. The response status is sent with the first chunk, so a later
+    failure (including a full cpu pool) ends the stream with a final
+    ``{"error": ..., "truncated": true, "rows": n}`` line, where ``n`` is the
+    number of rows streamed before it.
+    """
+    total = 0
+    lines = first
+    try:
+        while lines is not None:
+            for line in lines:
+                yield line
+            total += len(lines)
+            lines = await run_in_pool("cpu", _score_next_chunk, chunks, bundle, include_factors)
+    except Exception as e:
+        logger.error(f"Batch prediction truncated after {total} row(s): {e}")
+        yield json.dumps({"error": str(e), "truncated": True, "rows": total}) + "\n"
+        return
+    logger.info(f"Batch prediction streamed {total} row(s).")
+
+
+@router.post("/classical/predict-batch")
+async def predict_batch_endpoint(
+    request: Request,
+    include_factors: bool = False,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Scores many patients in one request and streams results as NDJSON.
+
+    Accepts a JSON array of PatientData rows, a CSV body (``text/csv``) or a
+    CSV file in a multipart upload. Bodies are spooled to a temporary file
+    and read incrementally, never parsed as one in-memory document. Rows are scored in chunks of
+    ``PREDICT_BATCH_CHUNK_SIZE``; each output line carries the zero-based
+    ``row`` number and either ``prediction``/``score`` (plus ``top_factors``
+    when requested) or an ``error``. If scoring fails after the first chunk
+    has been sent, the stream ends with a line carrying ``"truncated": true``.
+    """
+    logger.info(f"Batch prediction requested by user: {current_user['username']}")
+    bundle = _require_bundle(request)
+
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or not hasattr(upload, "file"):
+            raise HTTPException(status_code=400, detail="Expected a CSV file in the 'file' field.")
+        chunks = _iter_csv_chunks(upload.file, PREDICT_BATCH_CHUNK_SIZE)
+    elif content_type.startswith("text/csv"):
+        spool = await _spool_body(request)
+        chunks = _iter_csv_chunks(spool, PREDICT_BATCH_CHUNK_SIZE)
+    else:
+        # Spooled and decoded row by row rather than parsed as one document
+        spool = await _spool_body(request)
+        first = spool.read(1024).lstrip()
+        if not first.startswith(b"["):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array of patient rows.")
+        spool.seek(0)
+        chunks = _iter_json_chunks(_iter_json_array(spool), PREDICT_BATCH_CHUNK_SIZE)
+
+    # Score the first chunk up front so a full pool or unreadable input still
+    # gets a proper status code
+    try:
+        first = await run_in_pool("cpu", _score_next_chunk, chunks, bundle, include_factors)
+    except PoolOverloaded as e:
+        raise _overloaded(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StreamingResponse(
+        _score_chunks(chunks, bundle, include_factors, first),
+        media_type="application/x-ndjson",
+        headers={"X-Model-Version": bundle.version}
+    )
+
+
 @router.get("/classical/get-patient-data", response_model=FirebaseResponse)
 def get_patient_data_endpoint(
+    limit: Optional[int] = Query(None, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    prediction_class: Optional[int] = None,
+    fields: Optional[str] = None,
+    order: Literal["asc", "desc"] = "asc",
     current_user: dict = Depends(get_current_user)
 ):
     """
     Returns the patient data for the current user from Firebase.
+
+    Without parameters the whole history is returned, oldest first. Pass
+    ``limit`` to page through it: each response carries ``next_cursor``
+    to send as ``cursor`` for the next page (None on the last page).
+    ``start_date``/``end_date`` (inclusive, by record creation date) and
+    ``prediction_class`` filter records, ``fields`` is a comma-separated
+    projection and ``order=desc`` returns the newest records first.
     """
     logger.info(f"Fetching patient data for user: {current_user['username']}")
     try:
-        records = get_patient_data(current_user["username"])
+        records = query_patient_data(
+            current_user["username"],
+            limit=limit,
+            cursor=cursor,
+            start_date=start_date,
+            end_date=end_date,
+            prediction_class=prediction_class,
+            fields=[field.strip() for field in fields.split(",") if field.strip()] if fields else None,
+            descending=order == "desc"
+        )
         if "error" in records:
             logger.error(f"Error from Firebase: {records['error']}")
             raise HTTPException(status_code=500, detail=records["error"])
 
-        return {"extracted_data": records["predictions"]}
+        return {"extracted_data": records["predictions"], "next_cursor": records["next_cursor"]}
+    except InvalidQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching patient data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/cache/stats")
+def cache_stats(request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Returns hit/miss counters for the server-side caches.
+    """
+    return {
+        "extraction": extraction_cache.stats(),
+        "prediction": prediction_cache.stats(),
+        "sessions": _session_store(request).stats(),
+        "auth": auth_stats()
+    }
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics_endpoint(request: Request):
+    """
+    Exposes stage latency histograms, counters and cache/queue gauges in
+    the Prometheus text format. Each worker process reports its own values.
+    """
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    state = request.app.state
+    caches = {
+        "extraction": extraction_cache.stats(),
+        "prediction": prediction_cache.stats(),
+        "session": _session_store(request).stats(),
+        "token": auth_stats()["token_cache"],
+    }
+    families = metrics.cache_families(caches)
+    families.append(metrics.gauge_family(
+        "pool_in_flight", "Tasks running or queued in each worker pool.",
+        [({"pool": name}, pool.in_flight) for name, pool in pools.items()]
+    ))
+    families.append(metrics.gauge_family(
+        "pool_capacity", "Workers plus queue slots of each worker pool.",
+        [({"pool": name}, pool.capacity) for name, pool in pools.items()]
+    ))
+    families.append(metrics.counter_family(
+        "pool_rejected_total", "Tasks rejected because a pool was at capacity.",
+        [({"pool": name}, pool.rejected) for name, pool in pools.items()]
+    ))
+
+    batcher = getattr(state, "batcher", None)
+    if batcher is not None:
+        families.append(metrics.gauge_family(
+            "microbatch_queue_depth", "Rows waiting to be batched.", [({}, batcher.queue_depth)]
+        ))
+        families.append(metrics.counter_family(
+            "microbatch_batches_total", "Batched model calls made.", [({}, batcher.batches)]
+        ))
+        families.append(metrics.counter_family(
+            "microbatch_rows_total", "Rows scored through the micro-batcher.", [({}, batcher.rows)]
+        ))
+
+    writer = getattr(state, "writer", None)
+    if writer is not None:
+        families.append(metrics.gauge_family(
+            "write_behind_pending", "Records waiting to be written to storage.", [({}, writer.pending)]
+        ))
+        for name, help_text, value in (
+            ("write_behind_committed_total", "Records written to storage.", writer.committed),
+            ("write_behind_retries_total", "Batch commits retried.", writer.retries),
+            ("write_behind_dropped_total", "Records dropped after exhausting retries.", writer.dropped),
+        ):
+            families.append(metrics.counter_family(name, help_text, [({}, value)]))
+
+    bundle = getattr(state, "bundle", None)
+    families.append(metrics.gauge_family(
+        "model_info", "The model version being served (value is always 1).",
+        [({"version": bundle.version}, 1)] if bundle is not None else []
+    ))
+    families.append(metrics.gauge_family(
+        "ready", "1 once the worker has finished warming up.", [({}, int(bool(getattr(state, "ready", False))))]
+    ))
+    return PlainTextResponse(metrics.render(families), media_type=metrics.CONTENT_TYPE)
+
+
+@router.get("/admin/models")
+async def list_models(request: Request, current_user: dict = Depends(require_admin)):
+    """
+    Lists registered model versions and the version this worker is serving.
+    """
+    try:
+        versions = await run_in_pool("io", registry.versions)
+        active = await run_in_pool("io", registry.active_version)
+    except PoolOverloaded as e:
+        raise _overloaded(e)
+    bundle = getattr(request.app.state, "bundle", None)
+    return {
+        "serving": bundle.describe() if bundle is not None else None,
+        "active": active,
+        "versions": versions
+    }
+
+
+@router.post("/admin/models/{version}/activate")
+async def activate_model_version(
+    version: str,
+    request: Request,
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Hot-swaps to a registered model version without dropping requests.
+
+    The version is verified, loaded and warmed up while the current one keeps
+    serving, then swapped in atomically. It is also marked active in the
+    registry, so other workers follow on their next registry check.
+    """
+    logger.info(f"Model version {version} activation requested by {current_user['username']}")
+    try:
+        bundle = await run_in_pool("cpu", activate_model, request.app.state, version)
+    except ModelVersionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RegistryError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except PoolOverloaded as e:
+        raise _overloaded(e)
+    except Exception as e:
+        logger.error(f"Model activation error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    return bundle.describe()
+
+
+@router.get("/admin/profiling")
+def get_profiling(current_user: dict = Depends(require_admin)):
+    """
+    Returns the request-sampling setting of the worker serving this call.
+    """
+    return {"sample_every": get_sample_every()}
+
+
+@router.put("/admin/profiling")
+def set_profiling(
+    sample_every: int = Query(..., ge=0),
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Profiles one request in ``sample_every`` from now on (0 turns sampling off).
+
+    The setting applies to the worker process serving this call.
+    """
+    logger.info(f"Profiling sample rate set to {sample_every} by {current_user['username']}")
+    set_sample_every(sample_every)
+    return {"sample_every": get_sample_every()}
+
+
+@router.get("/admin/profiles")
+def list_profiles(current_user: dict = Depends(require_admin)):
+    """
+    Lists stored request profiles, newest first, without their stacks.
+    """
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/admin/profiles/{profile_id}")
+def get_profile(
+    profile_id: str,
+    format: Literal["json", "collapsed"] = "json",
+    current_user: dict = Depends(require_admin),
+):
+    """
+    Returns one request profile: per-function sample counts and the sampled stacks.
+
+    ``format=collapsed`` returns the stacks as ``frame;frame;... count`` lines
+    for flame graph tools (flamegraph.pl, speedscope).
+    """
+    document = profile_store.get(profile_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"No profile with id {profile_id}.")
+    if format == "collapsed":
+        return PlainTextResponse(collapsed_stacks(document))
+    return document
+
+
 @router.get("/transformer/predict", response_model=MessageResponse)
 def transformer():
     """Transformer endpoint (not implemented)"""
@@ -1,12 +1,17 @@
+import hashlib
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
 import os
+from typing import Any, Dict
 
 from fastapi import HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from dotenv import load_dotenv
 
+from services.cache import LRUCache
 from services.users import get_user
 
 load_dotenv()
@@ -19,9 +24,53 @@ logging.basicConfig(level=logging.INFO)
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# Upper bound on how long verified claims are reused; never beyond the token's exp
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# Verified claims keyed by a hash of the token, so raw tokens are not kept in memory
+_token_cache = LRUCache(TOKEN_CACHE_SIZE)
+_auth_timing = {"count": 0, "seconds": 0.0}
+_auth_timing_lock = threading.Lock()
+
+
+def _verify_token(token: str) -> Dict[str, Any]:
+    """
+    Decode and verify a JWT, reusing claims verified earlier for the same token.
+
+    Cached claims expire at the earlier of ``TOKEN_CACHE_TTL`` and the
+    token's own ``exp``, so an expired token is always re-checked (and
+    rejected) by ``jwt.decode``.
+
+    Raises:
+        JWTError: If the token is invalid or expired.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = _token_cache.get(key)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    ttl = TOKEN_CACHE_TTL
+    if "exp" in payload:
+        ttl = min(ttl, float(payload["exp"]) - time.time())
+    if ttl > 0:
+        _token_cache.set(key, payload, ttl=ttl)
+    return payload
+
+
+def auth_stats() -> Dict[str, Any]:
+    """Token cache counters and mean time spent authenticating a request."""
+    with _auth_timing_lock:
+        count, seconds = _auth_timing["count"], _auth_timing["seconds"]
+    return {
+        "token_cache": _token_cache.stats(),
+        "requests": count,
+        "mean_latency_us": seconds / count * 1e6 if count else 0.0,
+    }
+
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """Create JWT access token"""
@@ -41,8 +90,9 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    started = time.perf_counter()
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _verify_token(token)
         username: str = payload.get("sub")
 
         if username is None:
@@ -61,3 +111,26 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError as e:
         logger.error(f"JWT decoding error: {e}")
         raise credentials_exception
+    finally:
+        elapsed = time.perf_counter() - started
+        with _auth_timing_lock:
+            _auth_timing["count"] += 1
+            _auth_timing["seconds"] += elapsed
+
+
+def require_admin(current_user: dict = Depends(get_current_user)):
+    """Get the current user, rejecting anyone without the ``admin`` role"""
+    if current_user.get("role") != "admin":
+        logger.warning(f"Admin access denied for user: {current_user.get('username')}")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required")
+    return current_user
+
+
+def is_admin_token(token: str) -> bool:
+    """Whether a bearer token is valid and belongs to a user with the ``admin`` role"""
+    try:
+        username = _verify_token(token).get("sub")
+    except JWTError:
+        return False
+    user = get_user(username) if username else None
+    return user is not None and user.get("role") == "admin"
@@ -1,11 +1,13 @@
 import os
 import logging
-from datetime import datetime
-from typing import Dict, Any, Union
+import threading
+from datetime import date
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 
 from dotenv import load_dotenv
-import firebase_admin
-from firebase_admin import credentials, firestore
+
+from db.records import doc_id_range
+from db.storage import StorageBackend, project
 
 # ------------------ Logging Setup ------------------
 logger = logging.getLogger(__name__)
@@ -14,61 +16,98 @@ logging.basicConfig(level=logging.INFO)
 # ------------------ Load Environment Variables ------------------
 load_dotenv()
 
-# ------------------ Firebase Initialization ------------------
-FIREBASE_CRED = (
-    "firebase_cred.json"
-)
-cred = credentials.Certificate(FIREBASE_CRED)
-firebase_admin.initialize_app(cred)
-db_firestore = firestore.client()
+# ------------------ Firebase Config ------------------
+FIREBASE_CRED = os.getenv("FIREBASE_CRED", "firebase_cred.json")
 
+# Firestore rejects batches with more than 500 writes
+FIRESTORE_BATCH_LIMIT = 500
 
-def upload_patient_data_to_firebase(username: str, data: Dict[str, Any]) -> None:
-    """
-    Upload a patient's prediction record to Firestore.
+_client = None
+_client_lock = threading.Lock()
 
-    Args:
-        username (str): The user identifier.
-        data (dict): Patient prediction data.
+
+def get_firestore_client():
     """
-    try:
-        record = {
-            "username": username,
-            "pregnancies": data.get("Pregnancies"),
-            "glucose": data.get("Glucose"),
-            "blood_pressure": data.get("BloodPressure"),
-            "skin_thickness": data.get("SkinThickness"),
-            "insulin": data.get("Insulin"),
-            "bmi": data.get("BMI"),
-            "diabetes_pedigree_function": data.get("DiabetesPedigreeFunction"),
-            "age": data.get("Age"),
-            "prediction_class": data.get("prediction"),
-            "top_factors": data.get("top_factors"),
-            "score": data.get("score"),
-            "date": data.get("Date"),
-        }
-        doc_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        db_firestore.collection("users").document(username).collection("predictions").document(doc_id).set(record)
-        logger.info(f"Patient data uploaded for user: {username}, document ID: {doc_id}")
-    except Exception as e:
-        logger.error(f"Error saving patient data to Firebase: {e}", exc_info=True)
-
-
-def get_patient_data(username: str) -> Union[Dict[str, list], Dict[str, str]]:
+    Return the Firestore client, initialising the Firebase app on first use.
+
+    Importing this module does not touch the network or the credentials file.
     """
-    Retrieve all prediction records for a given user.
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import firebase_admin
+                from firebase_admin import credentials, firestore
 
-    Args:
-        username (str): The user identifier.
+                cred = credentials.Certificate(FIREBASE_CRED)
+                if not firebase_admin._apps:
+                    firebase_admin.initialize_app(cred)
+                _client = firestore.client()
+                logger.info("Firebase app initialised.")
+    return _client
 
-    Returns:
-        dict: A dictionary with prediction data or error message.
+
+class FirestoreBackend(StorageBackend):
+    """
+    Stores prediction records in Firestore under ``users/{username}/predictions``.
     """
-    try:
-        docs = db_firestore.collection("users").document(username).collection("predictions").stream()
-        results = [doc.to_dict() for doc in docs]
-        logger.info(f"Retrieved {len(results)} prediction(s) for user: {username}")
-        return {"predictions": results}
-    except Exception as e:
-        logger.error(f"Error retrieving patient data from Firebase: {e}", exc_info=True)
-        return {"error": str(e)}
+
+    name = "firestore"
+
+    def _predictions(self, username: str):
+        return get_firestore_client().collection("users").document(username).collection("predictions")
+
+    def write_batch(self, items: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        client = get_firestore_client()
+        for start in range(0, len(items), FIRESTORE_BATCH_LIMIT):
+            batch = client.batch()
+            for username, doc_id, record in items[start:start + FIRESTORE_BATCH_LIMIT]:
+                batch.set(self._predictions(username).document(doc_id), record)
+            batch.commit()
+        logger.info(f"Committed {len(items)} prediction record(s) to Firebase.")
+
+    def get_predictions(self, username: str) -> List[Dict[str, Any]]:
+        docs = self._predictions(username).stream()
+        return [doc.to_dict() for doc in docs]
+
+    def query_predictions(
+        self,
+        username: str,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        prediction_class: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+        descending: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        from google.cloud.firestore_v1 import Query
+        from google.cloud.firestore_v1.field_path import FieldPath
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        collection = self._predictions(username)
+        doc_id_path = FieldPath.document_id()
+        query = collection
+        lower, upper = doc_id_range(start_date, end_date)
+        if lower is not None:
+            query = query.where(filter=FieldFilter(doc_id_path, ">=", collection.document(lower)))
+        if upper is not None:
+            query = query.where(filter=FieldFilter(doc_id_path, "<", collection.document(upper)))
+        if prediction_class is not None:
+            query = query.where(filter=FieldFilter("prediction_class", "==", prediction_class))
+        query = query.order_by(
+            doc_id_path, direction=Query.DESCENDING if descending else Query.ASCENDING
+        )
+        if after is not None:
+            query = query.start_after({"__name__": after})
+        if fields is not None:
+            query = query.select(list(fields))
+        if limit is not None:
+            query = query.limit(limit + 1)
+
+        docs = list(query.stream())
+        next_after = None
+        if limit is not None and len(docs) > limit:
+            docs = docs[:limit]
+            next_after = docs[-1].id
+        return [project(doc.to_dict(), fields) for doc in docs], next_after
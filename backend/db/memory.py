@@ -0,0 +1,37 @@
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from db.storage import StorageBackend, paginate_in_memory
+
+
+class InMemoryBackend(StorageBackend):
+    """
+    In-process stand-in for Firestore prediction storage.
+
+    Mirrors the ``users/{username}/predictions/{doc_id}`` layout so the
+    write path can be exercised offline and in tests. Data is lost on exit.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.commits = 0
+
+    def write_batch(self, items: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        with self._lock:
+            for username, doc_id, record in items:
+                self._users.setdefault(username, {})[doc_id] = dict(record)
+            self.commits += 1
+
+    def get_predictions(self, username: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            docs = self._users.get(username, {})
+            return [dict(docs[doc_id]) for doc_id in sorted(docs)]
+
+    def query_predictions(self, username: str, **query: Any) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        with self._lock:
+            docs = self._users.get(username, {})
+            items = [(doc_id, dict(docs[doc_id])) for doc_id in sorted(docs)]
+        return paginate_in_memory(items, **query)
@@ -0,0 +1,64 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+# Fields of a stored prediction record, usable for projection
+RECORD_FIELDS = (
+    "username", "pregnancies", "glucose", "blood_pressure", "skin_thickness",
+    "insulin", "bmi", "diabetes_pedigree_function", "age", "prediction_class",
+    "top_factors", "score", "date", "model_version",
+)
+
+
+def new_record_id() -> str:
+    """
+    Document id for a new prediction record.
+
+    Timestamp-based so ids sort chronologically; microseconds keep records
+    written in the same second (e.g. in one batch) from overwriting each other.
+    """
+    return datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+
+
+def build_patient_record(username: str, data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Map a user's extracted data and prediction to a stored prediction record.
+
+    Args:
+        username (str): The user identifier.
+        data (dict): Patient prediction data.
+
+    Returns:
+        Tuple containing the new document id and the record to store.
+    """
+    record = {
+        "username": username,
+        "pregnancies": data.get("Pregnancies"),
+        "glucose": data.get("Glucose"),
+        "blood_pressure": data.get("BloodPressure"),
+        "skin_thickness": data.get("SkinThickness"),
+        "insulin": data.get("Insulin"),
+        "bmi": data.get("BMI"),
+        "diabetes_pedigree_function": data.get("DiabetesPedigreeFunction"),
+        "age": data.get("Age"),
+        "prediction_class": data.get("prediction"),
+        "top_factors": data.get("top_factors"),
+        "score": data.get("score"),
+        "date": data.get("Date"),
+        "model_version": data.get("model_version"),
+    }
+    return new_record_id(), record
+
+
+def doc_id_range(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Translate an inclusive creation-date range into document id bounds.
+
+    Returns:
+        Tuple of ``(lower, upper)``: ids must be ``>= lower`` and ``< upper``.
+    """
+    lower = start_date.strftime("%Y%m%d") if start_date else None
+    upper = (end_date + timedelta(days=1)).strftime("%Y%m%d") if end_date else None
+    return lower, upper
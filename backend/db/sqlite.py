@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from db.records import doc_id_range
+from db.storage import StorageBackend, project
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    username TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    prediction_class INTEGER,
+    record TEXT NOT NULL,
+    PRIMARY KEY (username, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_predictions_user_class
+    ON predictions (username, prediction_class, doc_id);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Embedded SQLite storage for on-prem sites and offline runs.
+
+    The database runs in WAL mode so history reads never block on writes.
+    Records are clustered by ``(username, doc_id)``; document ids are
+    creation timestamps, so a user's history is one index range scan in
+    date order. Each thread gets its own connection.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        logger.info(f"SQLite storage ready at {path} (journal_mode=WAL).")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def write_batch(self, items: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        rows = [
+            (username, doc_id, record.get("prediction_class"), json.dumps(record, default=float))
+            for username, doc_id, record in items
+        ]
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO predictions (username, doc_id, prediction_class, record) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def get_predictions(self, username: str) -> List[Dict[str, Any]]:
+        cursor = self._connect().execute(
+            "SELECT record FROM predictions WHERE username = ? ORDER BY doc_id",
+            (username,)
+        )
+        return [json.loads(record) for (record,) in cursor]
+
+    def query_predictions(
+        self,
+        username: str,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        prediction_class: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+        descending: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        lower, upper = doc_id_range(start_date, end_date)
+        clauses, params = ["username = ?"], [username]
+        if lower is not None:
+            clauses.append("doc_id >= ?")
+            params.append(lower)
+        if upper is not None:
+            clauses.append("doc_id < ?")
+            params.append(upper)
+        if after is not None:
+            clauses.append("doc_id < ?" if descending else "doc_id > ?")
+            params.append(after)
+        if prediction_class is not None:
+            clauses.append("prediction_class = ?")
+            params.append(prediction_class)
+        sql = (
+            f"SELECT doc_id, record FROM predictions WHERE {' AND '.join(clauses)} "
+            f"ORDER BY doc_id {'DESC' if descending else 'ASC'}"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        rows = self._connect().execute(sql, params).fetchall()
+        next_after = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_after = rows[-1][0]
+        return [project(json.loads(record), fields) for _, record in rows], next_after
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,279 @@
+import base64
+import binascii
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from dotenv import load_dotenv
+
+from db.records import build_patient_record, doc_id_range, RECORD_FIELDS
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+# ------------------ Load Environment Variables ------------------
+load_dotenv()
+
+# ------------------ Config ------------------
+# firestore (default), sqlite or memory
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/predictions.db")
+
+Item = Tuple[str, str, Dict[str, Any]]
+
+
+class InvalidQuery(ValueError):
+    """Raised for a malformed history query (bad cursor or unknown field)."""
+
+
+def encode_cursor(doc_id: str) -> str:
+    """Opaque page cursor for the record with ``doc_id``."""
+    return base64.urlsafe_b64encode(doc_id.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        doc_id = base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidQuery("Invalid cursor.")
+    if not doc_id:
+        raise InvalidQuery("Invalid cursor.")
+    return doc_id
+
+
+def project(record: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Keep only ``fields`` of a record (all fields if None)."""
+    if fields is None:
+        return record
+    return {field: record.get(field) for field in fields}
+
+
+class StorageBackend(ABC):
+    """
+    Interface for prediction record storage.
+
+    Records live under a username and a chronologically sortable document
+    id (see ``db.records.new_record_id``).
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def write_batch(self, items: List[Item]) -> None:
+        """
+        Store ``(username, doc_id, record)`` items in one commit; raise on failure.
+        """
+
+    @abstractmethod
+    def get_predictions(self, username: str) -> List[Dict[str, Any]]:
+        """
+        Return all prediction records of a user in document id order; raise on failure.
+        """
+
+    @abstractmethod
+    def query_predictions(
+        self,
+        username: str,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        prediction_class: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+        descending: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Return one page of a user's prediction records.
+
+        Pages are ordered by document id, i.e. by creation time, and the
+        date range applies to that creation time.
+
+        Args:
+            username (str): The user identifier.
+            limit (int, optional): Page size; all matching records if None.
+            after (str, optional): Document id of the last record of the previous page.
+            start_date (date, optional): Earliest creation date (inclusive).
+            end_date (date, optional): Latest creation date (inclusive).
+            prediction_class (int, optional): Only records with this prediction.
+            fields (list, optional): Record fields to return; all if None.
+            descending (bool): Newest records first.
+
+        Returns:
+            Tuple of the page's records and the document id of its last
+            record if more records follow, else None.
+        """
+
+    def close(self) -> None:
+        """Release connections held by the backend."""
+
+
+def paginate_in_memory(
+    docs: List[Tuple[str, Dict[str, Any]]],
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    prediction_class: Optional[int] = None,
+    fields: Optional[Sequence[str]] = None,
+    descending: bool = False
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Apply ``query_predictions`` semantics to ``(doc_id, record)`` pairs sorted by id.
+    """
+    lower, upper = doc_id_range(start_date, end_date)
+    if descending:
+        docs = docs[::-1]
+    page: List[Tuple[str, Dict[str, Any]]] = []
+    for doc_id, record in docs:
+        if lower is not None and doc_id < lower:
+            continue
+        if upper is not None and doc_id >= upper:
+            continue
+        if after is not None and (doc_id >= after if descending else doc_id <= after):
+            continue
+        if prediction_class is not None and record.get("prediction_class") != prediction_class:
+            continue
+        page.append((doc_id, record))
+        if limit is not None and len(page) > limit:
+            break
+    next_after = None
+    if limit is not None and len(page) > limit:
+        page = page[:limit]
+        next_after = page[-1][0]
+    return [project(record, fields) for _, record in page], next_after
+
+
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+
+def create_storage(backend: str = STORAGE_BACKEND) -> StorageBackend:
+    """
+    Instantiate a storage backend by name.
+
+    Backends are imported lazily so that, for example, the SQLite backend
+    never imports or initialises Firebase.
+
+    Args:
+        backend (str): "firestore", "sqlite" or "memory".
+
+    Returns:
+        StorageBackend: The new backend.
+    """
+    if backend == "firestore":
+        from db.firebase import FirestoreBackend
+        return FirestoreBackend()
+    if backend == "sqlite":
+        from db.sqlite import SQLiteBackend
+        return SQLiteBackend(SQLITE_PATH)
+    if backend == "memory":
+        from db.memory import InMemoryBackend
+        return InMemoryBackend()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+def get_storage() -> StorageBackend:
+    """Return the configured storage backend, creating it on first use."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+                logger.info(f"Using '{_storage.name}' storage backend.")
+    return _storage
+
+
+def set_storage(storage: Optional[StorageBackend]) -> None:
+    """Replace the active storage backend (e.g. with an in-memory one in tests)."""
+    global _storage
+    with _storage_lock:
+        if _storage is not None and _storage is not storage:
+            _storage.close()
+        _storage = storage
+
+
+def write_patient_records(items: List[Item]) -> None:
+    """
+    Write several prediction records with one backend commit; raises on failure.
+
+    Args:
+        items (list): ``(username, doc_id, record)`` tuples.
+    """
+    get_storage().write_batch(items)
+
+
+def upload_patient_data_to_firebase(username: str, data: Dict[str, Any]) -> None:
+    """
+    Save a patient's prediction record to the configured storage backend.
+
+    Kept under its original name; the backend is Firestore unless
+    ``STORAGE_BACKEND`` says otherwise.
+
+    Args:
+        username (str): The user identifier.
+        data (dict): Patient prediction data.
+    """
+    try:
+        doc_id, record = build_patient_record(username, data)
+        get_storage().write_batch([(username, doc_id, record)])
+        logger.info(f"Patient data uploaded for user: {username}, document ID: {doc_id}")
+    except Exception as e:
+        logger.error(f"Error saving patient data: {e}", exc_info=True)
+
+
+def query_patient_data(
+    username: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    prediction_class: Optional[int] = None,
+    fields: Optional[Sequence[str]] = None,
+    descending: bool = False
+) -> Union[Dict[str, Any], Dict[str, str]]:
+    """
+    Retrieve one filtered page of a user's prediction records.
+
+    Args:
+        username (str): The user identifier.
+        limit (int, optional): Page size; all matching records if None.
+        cursor (str, optional): ``next_cursor`` from the previous page.
+        start_date (date, optional): Earliest creation date (inclusive).
+        end_date (date, optional): Latest creation date (inclusive).
+        prediction_class (int, optional): Only records with this prediction.
+        fields (list, optional): Record fields to return; all if None.
+        descending (bool): Newest records first.
+
+    Returns:
+        dict: ``predictions`` and ``next_cursor`` (None on the last page), or an error message.
+
+    Raises:
+        InvalidQuery: If the cursor or a field name is invalid.
+    """
+    if fields is not None:
+        unknown = [field for field in fields if field not in RECORD_FIELDS]
+        if unknown:
+            raise InvalidQuery(f"Unknown fields: {unknown}")
+    after = decode_cursor(cursor) if cursor else None
+    try:
+        results, next_after = get_storage().query_predictions(
+            username,
+            limit=limit,
+            after=after,
+            start_date=start_date,
+            end_date=end_date,
+            prediction_class=prediction_class,
+            fields=fields,
+            descending=descending
+        )
+        logger.info(f"Retrieved {len(results)} prediction(s) for user: {username}")
+        return {
+            "predictions": results,
+            "next_cursor": encode_cursor(next_after) if next_after else None
+        }
+    except Exception as e:
+        logger.error(f"Error retrieving patient data: {e}", exc_info=True)
+        return {"error": str(e)}
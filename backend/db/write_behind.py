@@ -0,0 +1,194 @@
+import logging
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from db.records import build_patient_record
+from services.metrics import time_stage
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+Item = Tuple[str, str, Dict[str, Any]]
+_STOP = object()
+# How often an idle worker checks for a stop request the queue could not carry
+_STOP_POLL_INTERVAL = 0.5
+
+
+class WriteBehindQueue:
+    """
+    Buffers prediction records and commits them to storage in batches.
+
+    ``submit`` builds the record and returns immediately. A background
+    thread groups queued records into one ``commit_fn`` call once
+    ``batch_size`` records are waiting or ``flush_interval`` seconds have
+    passed since the first of them arrived. Failed commits are retried with
+    exponential backoff and jitter; ``close`` drains everything still queued
+    before returning.
+
+    Args:
+        commit_fn (Callable): Writes a list of ``(username, doc_id, record)`` atomically.
+        batch_size (int): Maximum records per commit.
+        flush_interval (float): Maximum seconds a record waits before being committed.
+        max_retries (int): Retries per batch before its records are dropped.
+        backoff_base (float): Initial retry delay in seconds, doubled on each attempt.
+        max_queue (int): Maximum records waiting to be written.
+    """
+
+    def __init__(
+        self,
+        commit_fn: Callable[[List[Item]], None],
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        max_retries: int = 5,
+        backoff_base: float = 0.2,
+        max_queue: int = 10000
+    ):
+        self.commit_fn = commit_fn
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_interval)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.committed = 0
+        self.batches = 0
+        self.retries = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Write-behind queue started (batch_size={self.batch_size}, "
+            f"flush_interval={self.flush_interval}s)."
+        )
+
+    def submit(self, username: str, data: Dict[str, Any]) -> bool:
+        """
+        Queue a prediction record for writing without waiting for storage.
+
+        Args:
+            username (str): The user identifier.
+            data (dict): Patient prediction data (copied into the record now).
+
+        Returns:
+            bool: False if the queue is full or stopped and the record was not queued.
+        """
+        if self._thread is None or not self._thread.is_alive() or self._stop.is_set():
+            return False
+        doc_id, record = build_patient_record(username, data)
+        try:
+            self._queue.put_nowait((username, doc_id, record))
+            return True
+        except queue.Full:
+            logger.warning("Write-behind queue is full.")
+            return False
+
+    def flush(self) -> None:
+        """Block until every record queued so far has been committed or dropped."""
+        self._queue.join()
+
+    def close(self, timeout: Optional[float] = 30.0) -> None:
+        """
+        Commit everything still queued, then stop the background thread.
+
+        Never blocks on a full queue: the stop request is an event the worker
+        checks, and the stop marker only wakes it early when there is room.
+        Waits at most ``timeout`` seconds (None waits until drained) and logs
+        how many records were left behind if the drain did not finish.
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        try:
+            self._queue.put_nowait(_STOP)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            with self._queue.mutex:
+                left = sum(1 for item in self._queue.queue if item is not _STOP)
+            logger.error(
+                f"Write-behind queue did not drain within {timeout}s; "
+                f"{left} queued record(s) left unwritten."
+            )
+        self._thread = None
+        logger.info(
+            f"Write-behind queue closed: {self.committed} record(s) in {self.batches} batch(es), "
+            f"{self.retries} retry(ies), {self.dropped} dropped."
+        )
+
+    def _collect(self) -> Tuple[List[Item], bool]:
+        """Gather the next batch; the flag is True once a stop was requested and the queue is empty."""
+        while True:
+            try:
+                first = self._queue.get(timeout=_STOP_POLL_INTERVAL)
+                break
+            except queue.Empty:
+                if self._stop.is_set():
+                    return [], True
+        if first is _STOP:
+            self._queue.task_done()
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.task_done()
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _commit(self, batch: List[Item]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                with time_stage("persist_commit"):
+                    self.commit_fn(batch)
+                self.committed += len(batch)
+                self.batches += 1
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.dropped += len(batch)
+                    logger.error(
+                        f"Dropping {len(batch)} record(s) after {attempt + 1} failed commit(s): {e}",
+                        exc_info=True
+                    )
+                    return
+                self.retries += 1
+                delay = self.backoff_base * (2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning(f"Batch commit failed ({e}); retrying in {delay:.2f}s.")
+                time.sleep(delay)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if stopping:
+                # Drain whatever was queued before the stop marker.
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+            for start in range(0, len(batch), self.batch_size):
+                chunk = batch[start:start + self.batch_size]
+                self._commit(chunk)
+                for _ in chunk:
+                    self._queue.task_done()
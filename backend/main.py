@@ -1,6 +1,8 @@
+import asyncio
 import os
 import sys
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -14,11 +16,114 @@ logger = logging.getLogger(__name__)
 # ------------------ Ensure `src` is Importable ------------------
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from api.routes import router
-from services.utils import load_model
+from services.startup import startup_report
+
+with startup_report.phase("import:app"):
+    from api.routes import router
+    from services.utils import load_inference_engine, model_fingerprint
+    from services.registry import (
+        ModelBundle, RegistryError, registry, watch_registry, MODEL_WATCH_INTERVAL
+    )
+    from services.batching import MicroBatcher
+    from services.executor import run_in_pool, shutdown_pools
+    from services.users import user_store
+    from services.metrics import RequestMetricsMiddleware
+    from services.sessions import create_session_store
+    from services.profiling import ProfilingMiddleware
+    from auth.auth import is_admin_token
+    from db.storage import write_patient_records, get_storage, set_storage
+    from db.write_behind import WriteBehindQueue
+
+# ------------------ Config ------------------
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "1") == "1"
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "32"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+PERSIST_WRITE_BEHIND = os.getenv("PERSIST_WRITE_BEHIND", "1") == "1"
+PERSIST_BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", "100"))
+PERSIST_FLUSH_INTERVAL_MS = float(os.getenv("PERSIST_FLUSH_INTERVAL_MS", "500"))
+PERSIST_MAX_RETRIES = int(os.getenv("PERSIST_MAX_RETRIES", "5"))
+PERSIST_QUEUE_SIZE = int(os.getenv("PERSIST_QUEUE_SIZE", "10000"))
+# sync: warm up before serving; background: serve at once, /ready reports 503
+# until warm-up finishes; off: no warm-up (first requests pay the cost)
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "sync").lower()
+
+
+async def _warm_up(app: FastAPI) -> None:
+    """
+    Run the warm-up step in the CPU pool and mark the worker ready if it succeeds.
+
+    A worker whose warm-up fails keeps answering 503 on ``/ready`` (with the
+    error) until a model version is activated successfully.
+    """
+    try:
+        bundle = getattr(app.state, "bundle", None)
+        if bundle is not None:
+            with startup_report.phase("warm_up"):
+                await run_in_pool("cpu", bundle.warm_up)
+    except Exception as e:
+        logger.error(f"Warm-up failed; this worker will not report ready: {e}", exc_info=True)
+        app.state.warmup_error = str(e)
+    else:
+        app.state.ready = True
+    finally:
+        startup_report.log()
+
+
+# ------------------ Lifespan ------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers on startup and drain them on shutdown."""
+    app.state.ready = False
+    app.state.warmup_error = None
+    try:
+        with startup_report.phase("load_users"):
+            user_store.load()
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load users at startup: {e}")
+    app.state.batcher = None
+    if MICROBATCH_ENABLED:
+        app.state.batcher = MicroBatcher(MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS)
+        app.state.batcher.start()
+    with startup_report.phase("open_storage"):
+        get_storage()
+    with startup_report.phase("open_sessions"):
+        app.state.session_store = create_session_store()
+    app.state.writer = None
+    if PERSIST_WRITE_BEHIND:
+        app.state.writer = WriteBehindQueue(
+            write_patient_records,
+            batch_size=PERSIST_BATCH_SIZE,
+            flush_interval=PERSIST_FLUSH_INTERVAL_MS / 1000.0,
+            max_retries=PERSIST_MAX_RETRIES,
+            max_queue=PERSIST_QUEUE_SIZE
+        )
+        app.state.writer.start()
+    warmup_task = None
+    if STARTUP_WARMUP == "sync":
+        await _warm_up(app)
+    elif STARTUP_WARMUP == "background":
+        warmup_task = asyncio.create_task(_warm_up(app))
+    else:
+        app.state.ready = True
+        startup_report.log()
+    watcher = None
+    if MODEL_WATCH_INTERVAL > 0:
+        watcher = asyncio.create_task(watch_registry(app.state))
+    yield
+    for task in (warmup_task, watcher):
+        if task is not None and not task.done():
+            task.cancel()
+    if app.state.batcher is not None:
+        await app.state.batcher.stop()
+    if app.state.writer is not None:
+        app.state.writer.close()
+    app.state.session_store.close()
+    set_storage(None)
+    shutdown_pools()
+
 
 # ------------------ App Setup ------------------
-app = FastAPI(title="Diabetes Prediction API")
+app = FastAPI(title="Diabetes Prediction API", lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -28,19 +133,44 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so request latency includes CORS handling and error responses
+app.add_middleware(RequestMetricsMiddleware)
+# Profiles requests sent with "X-Profile: 1" by an admin, or one in PROFILE_SAMPLE_EVERY
+app.add_middleware(ProfilingMiddleware, is_privileged=is_admin_token)
 
 # ------------------ Load ML Model ------------------
 # MODEL_PATH = os.path.abspath(
 #     os.path.join(os.path.dirname(__file__), '..', 'saved_models', 'model.joblib')
 # )
 
+# Used when the model registry has no active version.
 MODEL_PATH = "saved_models/model.joblib"
+# Compact forest exported by the training pipeline; memory-mapped and shared
+# by all workers. Without it the forest is compiled from the pickled model.
+FOREST_PATH = os.getenv("FOREST_PATH", "saved_models/model.forest")
+
+
+def load_startup_bundle() -> ModelBundle:
+    """Load the registry's active version, falling back to ``MODEL_PATH``."""
+    active = registry.active_version()
+    if active is not None:
+        try:
+            with startup_report.phase("load_model"):
+                return registry.load(active)
+        except RegistryError as e:
+            logger.error(f"Failed to load active model version {active}: {e}")
+
+    # Unregistered model: its fingerprint doubles as the version.
+    fingerprint = model_fingerprint(MODEL_PATH)
+    with startup_report.phase("load_model"):
+        engine = load_inference_engine(FOREST_PATH, fingerprint)
+        return ModelBundle(fingerprint, fingerprint, engine=engine, model_path=MODEL_PATH)
 
 
+app.state.bundle = None
 try:
-    model = load_model(MODEL_PATH)
-    app.state.model = model
-    logger.info("Model successfully loaded and stored in app state.")
+    app.state.bundle = load_startup_bundle()
+    logger.info(f"Model version {app.state.bundle.version} loaded and stored in app state.")
 except Exception as e:
     logger.error(f"Failed to load model at startup: {e}", exc_info=True)
 
@@ -1,5 +1,5 @@
-from typing import Dict, List, Any
-from pydantic import BaseModel
+from typing import Dict, List, Any, Optional
+from pydantic import BaseModel, ConfigDict
 
 
 class Token(BaseModel):
@@ -10,6 +10,9 @@ class Token(BaseModel):
 
 class PatientData(BaseModel):
     """Input features for diabetes prediction"""
+    # The model cannot score NaN or infinity; reject them at validation
+    model_config = ConfigDict(allow_inf_nan=False)
+
     Pregnancies: int
     Glucose: float
     BloodPressure: float
@@ -25,6 +28,7 @@ class PredictionResponse(BaseModel):
     prediction: int
     top_factors: Dict[str, float]
     score: float
+    model_version: Optional[str] = None
 
 
 class MessageResponse(BaseModel):
@@ -35,8 +39,11 @@ class MessageResponse(BaseModel):
 class PdfExtractionResponse(BaseModel):
     """Response after extracting data from PDF"""
     extracted_data: dict
+    source_pages: Dict[str, int] = {}
+    record_id: Optional[str] = None
 
 
 class FirebaseResponse(BaseModel):
     """Firebase prediction history response"""
     extracted_data: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
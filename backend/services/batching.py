@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from services.executor import pools, run_in_pool, PoolOverloaded
+from services.metrics import time_stage
+from services.utils import FEATURE_COLUMNS, predict_batch
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into batched model calls.
+
+    Callers ``await submit(features)``; a background task collects pending
+    rows until ``max_batch_size`` rows are queued or ``max_wait_ms`` has
+    passed since the first one arrived, then scores the stacked batch with a
+    single ``predict_proba`` and a single SHAP pass over the positive rows.
+    Each caller receives exactly what ``predict`` would return for its row.
+
+    Each row is scored by the model bundle it was submitted with, so a row
+    queued just before a model swap is still answered by the version the
+    caller reports; a batch spanning a swap is split per bundle.
+
+    Collected batches are scored as separate tasks, up to ``max_concurrency``
+    at once (the cpu pool's worker count by default), so the collector keeps
+    filling the next batch while earlier ones are still being scored.
+    """
+
+    def __init__(self, max_batch_size: int = 32, max_wait_ms: float = 2.0,
+                 max_concurrency: Optional[int] = None):
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_concurrency = max(1, int(max_concurrency or pools["cpu"].workers))
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.rows = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the background batching task on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(
+            f"Micro-batcher started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:g}, max_concurrency={self.max_concurrency})."
+        )
+
+    async def stop(self) -> None:
+        """Stop the background task, failing any requests still queued or being scored."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        inflight = list(self._inflight)
+        for task in inflight:
+            task.cancel()
+        await asyncio.gather(*inflight, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped."))
+        logger.info(f"Micro-batcher stopped after {self.batches} batch(es), {self.rows} row(s).")
+
+    async def submit(self, features: Dict[str, Any], bundle: Any) -> Tuple[int, Dict[str, float], float]:
+        """
+        Queue one row of model features and wait for its prediction.
+
+        Args:
+            features (dict): Feature values keyed by column name.
+            bundle (ModelBundle): Model version to score the row with.
+
+        Returns:
+            Tuple containing the predicted class, top factors and confidence score.
+        """
+        if not self.running:
+            raise RuntimeError("Micro-batcher is not running.")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, bundle, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Dict[str, Any], Any, asyncio.Future]]:
+        """Wait for the first row, then gather more until the batch is full or the window closes."""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    @staticmethod
+    def _score(bundle: Any, rows: List[Dict[str, Any]]) -> List[Tuple[int, Dict[str, float], float]]:
+        """Run one batched prediction over the stacked rows."""
+        with time_stage("prepare_features"):
+            X = pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+        preds, scores, factors = predict_batch(
+            bundle.model, X, bundle.engine, bundle.get_explainer, include_factors=True
+        )
+        return [(int(p), f, s) for p, s, f in zip(preds, scores, factors)]
+
+    async def _dispatch(self, bundle: Any, pending: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        """Score one group of rows and resolve each caller's future with its own result."""
+        try:
+            results = await run_in_pool("cpu", self._score, bundle, [f for f, _ in pending])
+        except asyncio.CancelledError:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(RuntimeError("Micro-batcher stopped."))
+            raise
+        except Exception as e:
+            logger.error(f"Batched prediction failed: {e}", exc_info=not isinstance(e, PoolOverloaded))
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.rows += len(pending)
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _on_dispatched(self, task: asyncio.Task) -> None:
+        self._inflight.discard(task)
+        self._slots.release()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            groups: Dict[int, Tuple[Any, List[Tuple[Dict[str, Any], asyncio.Future]]]] = {}
+            for features, bundle, future in batch:
+                if not future.done():
+                    groups.setdefault(id(bundle), (bundle, []))[1].append((features, future))
+
+            for index, (bundle, pending) in enumerate(groups.values()):
+                try:
+                    await self._slots.acquire()
+                except asyncio.CancelledError:
+                    for _, group in list(groups.values())[index:]:
+                        for _, future in group:
+                            if not future.done():
+                                future.set_exception(RuntimeError("Micro-batcher stopped."))
+                    raise
+                task = loop.create_task(self._dispatch(bundle, pending))
+                self._inflight.add(task)
+                task.add_done_callback(self._on_dispatched)
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def content_digest(contents: bytes) -> str:
+    """SHA-256 hex digest of raw upload bytes."""
+    return hashlib.sha256(contents).hexdigest()
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache with an optional per-entry TTL.
+
+    Entries are evicted least-recently-used first once ``maxsize`` is
+    reached, and treated as missing once older than their TTL.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = max(0, int(maxsize))
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                value, expires_at = item
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store ``value``; ``ttl`` overrides the cache default for this entry."""
+        if self.maxsize == 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def values(self) -> List[Any]:
+        """Snapshot of the values, least recently used first (expired ones included)."""
+        with self._lock:
+            return [value for value, _ in self._data.values()]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache of PDF extraction results.
+
+    Keys combine the SHA-256 of the uploaded bytes with the version of the
+    extraction patterns, so changing a pattern invalidates old entries.
+    Lookups go to an in-memory LRU tier first and then, if ``disk_dir`` is
+    set, to an on-disk tier of small JSON files that survives restarts. The
+    disk tier is trimmed to ``disk_max_bytes`` by evicting the least
+    recently used files.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        max_entries: int = 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 256 * 1024 * 1024
+    ):
+        self.version = version
+        self.memory = LRUCache(max_entries)
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        self._disk_lock = threading.Lock()
+        self._disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def key(self, digest: str) -> str:
+        return f"{self.version}-{digest}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_entries(self):
+        """Yield ``(path, size, mtime)`` for every file in the disk tier."""
+        with os.scandir(self.disk_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def get(self, digest: str) -> Optional[Tuple[Dict[str, Any], Dict[str, int]]]:
+        """
+        Return a copy of the cached ``(data, source_pages)`` for an upload, if any.
+
+        Args:
+            digest (str): ``content_digest`` of the uploaded bytes.
+        """
+        key = self.key(digest)
+        result = self.memory.get(key)
+        if result is None and self.disk_dir:
+            result = self._disk_get(key)
+            if result is not None:
+                self.disk_hits += 1
+                self.memory.set(key, result)
+        if result is None:
+            return None
+        data, source_pages = result
+        return dict(data), dict(source_pages)
+
+    def set(self, digest: str, result: Tuple[Dict[str, Any], Dict[str, int]]) -> None:
+        """Cache a successful extraction result for an upload."""
+        key = self.key(digest)
+        data, source_pages = result
+        result = (dict(data), dict(source_pages))
+        self.memory.set(key, result)
+        if self.disk_dir:
+            self._disk_set(key, result)
+
+    def _disk_get(self, key: str) -> Optional[Tuple[Dict[str, Any], Dict[str, int]]]:
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+            os.utime(path)  # mark as recently used
+            return payload["data"], payload["source_pages"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable extraction cache entry {path}: {e}")
+            return None
+
+    def _disk_set(self, key: str, result: Tuple[Dict[str, Any], Dict[str, int]]) -> None:
+        path = self._path(key)
+        payload = json.dumps({"data": result[0], "source_pages": result[1]}).encode()
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(payload)
+            with self._disk_lock:
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(temp_path, path)
+                self._disk_bytes += len(payload) - previous
+                if self._disk_bytes > self.disk_max_bytes:
+                    self._evict_disk()
+        except OSError as e:
+            logger.warning(f"Could not write extraction cache entry {path}: {e}")
+
+    def _evict_disk(self) -> None:
+        """Delete least recently used files until the disk tier fits its budget."""
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        self._disk_bytes = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._disk_bytes <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                self._disk_bytes -= size
+                self.disk_evictions += 1
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        hits = memory["hits"] + self.disk_hits
+        lookups = memory["hits"] + memory["misses"]
+        stats = {
+            "version": self.version,
+            "memory": memory,
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+        if self.disk_dir:
+            stats["disk"] = {
+                "hits": self.disk_hits,
+                "bytes": self._disk_bytes,
+                "max_bytes": self.disk_max_bytes,
+                "evictions": self.disk_evictions,
+            }
+        return stats
+
+
+class PredictionCache:
+    """
+    Bounded LRU/TTL cache of ``(prediction, top_factors, score)`` results.
+
+    Keys are the exact feature vector plus the fingerprint of the model that
+    produced the result, so entries from a previous model are never served
+    after a swap; they simply age out of the LRU.
+    """
+
+    def __init__(self, feature_columns: List[str], maxsize: int = 4096, ttl: Optional[float] = 3600.0):
+        self.feature_columns = list(feature_columns)
+        self.cache = LRUCache(maxsize, ttl)
+
+    def key(self, fingerprint: str, features: Dict[str, Any]) -> Tuple[str, Tuple[Any, ...]]:
+        return fingerprint, tuple(features[column] for column in self.feature_columns)
+
+    def get(self, fingerprint: str, features: Dict[str, Any]) -> Optional[Tuple[int, Dict[str, float], float]]:
+        result = self.cache.get(self.key(fingerprint, features))
+        if result is None:
+            return None
+        prediction, top_factors, score = result
+        return prediction, dict(top_factors), score
+
+    def set(self, fingerprint: str, features: Dict[str, Any], result: Tuple[int, Dict[str, float], float]) -> None:
+        prediction, top_factors, score = result
+        self.cache.set(self.key(fingerprint, features), (prediction, dict(top_factors), score))
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "ttl": self.cache.ttl}
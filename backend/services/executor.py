@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from services.profiling import PROFILE_INTERVAL_MS, current_profile, sample_call
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+# ------------------ Config ------------------
+# Each pool runs one kind of blocking stage off the event loop:
+#   cpu - model inference and SHAP (NumPy releases the GIL for most of it)
+#   io  - blocking database calls and temp-file writes
+#   pdf - pdfplumber parsing (pure Python, so a process pool by default)
+# The cpu and io pools are always thread pools: their tasks take the model
+# bundle, the app state or a store holding locks and open connections,
+# none of which can be pickled to a worker process.
+POOL_CONFIG = {
+    "cpu": {
+        "kind": "thread",
+        "workers": int(os.getenv("CPU_POOL_WORKERS", str(os.cpu_count() or 1))),
+        "queue_limit": int(os.getenv("CPU_POOL_QUEUE_LIMIT", "64")),
+    },
+    "io": {
+        "kind": "thread",
+        "workers": int(os.getenv("IO_POOL_WORKERS", "16")),
+        "queue_limit": int(os.getenv("IO_POOL_QUEUE_LIMIT", "256")),
+    },
+    "pdf": {
+        "kind": os.getenv("PDF_POOL_KIND", "process"),
+        "workers": int(os.getenv("PDF_POOL_WORKERS", str(os.cpu_count() or 1))),
+        "queue_limit": int(os.getenv("PDF_POOL_QUEUE_LIMIT", "32")),
+    },
+}
+OVERLOAD_RETRY_AFTER_SECONDS = int(os.getenv("OVERLOAD_RETRY_AFTER_SECONDS", "1"))
+
+
+class PoolOverloaded(Exception):
+    """Raised when a pool already has its maximum number of running and queued tasks."""
+
+    def __init__(self, pool: str):
+        super().__init__(f"The '{pool}' worker pool is at capacity. Please retry later.")
+        self.pool = pool
+
+
+class BoundedPool:
+    """
+    Thread or process pool that rejects work once too many tasks are waiting.
+
+    At most ``workers`` tasks run at once and at most ``queue_limit`` more may
+    wait for a worker; submitting beyond that raises ``PoolOverloaded``
+    instead of growing an unbounded backlog.
+    """
+
+    def __init__(self, name: str, kind: str = "thread", workers: int = 4, queue_limit: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown pool kind for '{name}': {kind}")
+        self.name = name
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._executor: Executor | None = None
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_limit
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix=f"{self.name}-pool"
+                )
+            logger.info(
+                f"Started '{self.name}' {self.kind} pool "
+                f"(workers={self.workers}, queue_limit={self.queue_limit})."
+            )
+        return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise PoolOverloaded(self.name)
+            self.in_flight += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run ``fn(*args)`` in the pool and await its result.
+
+        Raises:
+            PoolOverloaded: If the pool is at capacity.
+        """
+        self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            profile = current_profile()
+            if profile is None:
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+            # Profiled request: sample the worker too (in-process for threads,
+            # inside the worker process for process pools).
+            if self.kind == "thread":
+                return await loop.run_in_executor(self._get_executor(), profile.bind(fn, f"{self.name}-pool"), *args)
+            result, stacks = await loop.run_in_executor(
+                self._get_executor(), sample_call, fn, args, PROFILE_INTERVAL_MS / 1000.0
+            )
+            profile.add_stacks(stacks, f"{self.name}-process")
+            return result
+        finally:
+            self._release()
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+pools: Dict[str, BoundedPool] = {
+    name: BoundedPool(name, **config) for name, config in POOL_CONFIG.items()
+}
+
+
+async def run_in_pool(pool: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a blocking function in one of the named worker pools.
+
+    Args:
+        pool (str): Pool name ("cpu", "io" or "pdf").
+        fn (Callable): Function to run; must be picklable for process pools.
+        *args: Positional arguments for ``fn``.
+
+    Returns:
+        Any: The function's return value.
+
+    Raises:
+        PoolOverloaded: If the pool is at capacity.
+    """
+    return await pools[pool].run(fn, *args)
+
+
+def shutdown_pools(wait: bool = True) -> None:
+    """Shut down all worker pools, waiting for running tasks by default."""
+    for pool in pools.values():
+        pool.shutdown(wait=wait)
@@ -0,0 +1,283 @@
+import json
+import logging
+import mmap
+import struct
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+TREE_LEAF = -1
+
+# Compact forest artifact (written by model_training/models/export.py):
+#   8 bytes   magic
+#   8 bytes   little-endian uint64 length of the JSON header
+#   header    JSON: version, max_depth, classes, feature_names,
+#             source_fingerprint and {name: {dtype, shape, offset}} per array
+#   arrays    raw little-endian arrays, each starting on a 64-byte boundary
+FOREST_MAGIC = b"CFOREST\x01"
+FOREST_FORMAT_VERSION = 1
+FOREST_ARRAYS = ("feature", "threshold", "children_left", "children_right", "leaf_proba", "roots")
+
+
+def round_down_float32(threshold: np.ndarray) -> np.ndarray:
+    """
+    Convert float64 split thresholds to float32 without changing any split.
+
+    Inputs are compared as float32, and for a float32 ``x`` the test
+    ``x <= t`` is equivalent to ``x <= f`` where ``f`` is the largest
+    float32 not above ``t``, so rounding towards -inf keeps every decision
+    identical while halving the storage.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+class CompiledForest:
+    """
+    Array-backed inference engine for a fitted RandomForestClassifier.
+
+    All trees are flattened into contiguous NumPy arrays indexed by a global
+    node id, so a batch of rows is routed through every tree at once with one
+    gather/compare step per tree level. Leaf nodes point back to themselves,
+    which lets rows that reach a leaf early stay put while deeper trees finish.
+
+    The arithmetic mirrors scikit-learn's own forest: inputs are cast to
+    float32 before the split comparisons, leaf distributions are normalised
+    per tree and summed in estimator order before dividing by the number of
+    trees. Predictions and probabilities are therefore identical to
+    ``model.predict`` / ``model.predict_proba``. Rows containing NaN or
+    infinity are rejected with ``ValueError``, as scikit-learn's input
+    validation rejects them for models trained without missing values.
+
+    Node arrays are stored compactly (int32 indices, float32 thresholds;
+    see ``round_down_float32``). ``load`` memory-maps them from the
+    artifact exported at training time, so every worker process on a host
+    shares the same read-only pages instead of unpickling its own copy.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children_left: np.ndarray,
+        children_right: np.ndarray,
+        leaf_proba: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        classes: np.ndarray,
+        feature_names: Sequence[str] | None = None,
+        source_fingerprint: Optional[str] = None,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes = np.asarray(classes)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        # Fingerprint of the pickled model the arrays were built from, if known
+        self.source_fingerprint = source_fingerprint
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @classmethod
+    def from_model(cls, model: Any) -> "CompiledForest":
+        """
+        Flatten the trees of a fitted scikit-learn forest classifier.
+
+        Args:
+            model (Any): Fitted ``RandomForestClassifier`` (single output).
+
+        Returns:
+            CompiledForest: The compiled inference engine.
+        """
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled.")
+
+        n_classes = len(model.classes_)
+        features, thresholds, lefts, rights, probas, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            node_ids = np.arange(n, dtype=np.int64)
+            is_leaf = tree.children_left == TREE_LEAF
+
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba.
+            proba = tree.value[:, 0, :n_classes].astype(np.float64, copy=True)
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba /= normalizer
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(left)
+            rights.append(right)
+            probas.append(proba)
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        engine = cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.int32),
+            threshold=round_down_float32(np.concatenate(thresholds)),
+            children_left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.int32),
+            children_right=np.ascontiguousarray(np.concatenate(rights), dtype=np.int32),
+            leaf_proba=np.ascontiguousarray(np.concatenate(probas)),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            classes=model.classes_,
+            feature_names=getattr(model, "feature_names_in_", None),
+        )
+        logger.info(
+            f"Compiled forest: {engine.n_trees} trees, {engine.n_nodes} nodes, "
+            f"max depth {engine.max_depth}."
+        )
+        return engine
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        """
+        Memory-map a compact forest artifact.
+
+        The arrays are read-only views of the mapped file; pages are loaded
+        on first touch and shared with every other process mapping it.
+
+        Args:
+            path (str): Path to a ``.forest`` file.
+
+        Returns:
+            CompiledForest: The inference engine.
+
+        Raises:
+            ValueError: If the file is not a supported forest artifact.
+        """
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[:len(FOREST_MAGIC)] != FOREST_MAGIC:
+            raise ValueError(f"{path} is not a compact forest artifact.")
+        (header_size,) = struct.unpack_from("<Q", buffer, len(FOREST_MAGIC))
+        start = len(FOREST_MAGIC) + 8
+        header = json.loads(bytes(buffer[start:start + header_size]))
+        if header.get("version") != FOREST_FORMAT_VERSION:
+            raise ValueError(f"Unsupported forest artifact version: {header.get('version')}")
+
+        arrays = {}
+        for name in FOREST_ARRAYS:
+            spec = header["arrays"][name]
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            arrays[name] = np.frombuffer(
+                buffer, dtype=dtype, count=count, offset=spec["offset"]
+            ).reshape(spec["shape"])
+
+        engine = cls(
+            **arrays,
+            max_depth=header["max_depth"],
+            classes=np.asarray(header["classes"]),
+            feature_names=header.get("feature_names"),
+            source_fingerprint=header.get("source_fingerprint"),
+        )
+        logger.info(
+            f"Memory-mapped forest from {path}: {engine.n_trees} trees, "
+            f"{engine.n_nodes} nodes, max depth {engine.max_depth}."
+        )
+        return engine
+
+    def _as_array(self, X: Any) -> np.ndarray:
+        """
+        Convert input rows to a C-contiguous float32 matrix in training column order.
+
+        Raises:
+            ValueError: If any value is NaN, infinite or too large for float32.
+        """
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names is not None:
+                X = X[self.feature_names]
+            X = X.to_numpy(dtype=np.float32)
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        # The split comparisons would route NaN right at every node and score
+        # infinity like any large value; reject both as scikit-learn does.
+        if not np.isfinite(X).all():
+            problem = "NaN" if np.isnan(X).any() else "infinity or a value too large for dtype('float32')"
+            raise ValueError(f"Input X contains {problem}.")
+        return np.ascontiguousarray(X)
+
+    def apply(self, X: Any) -> np.ndarray:
+        """
+        Return the global leaf index reached by every row in every tree.
+
+        Args:
+            X (Any): DataFrame or array of shape (n_rows, n_features).
+
+        Returns:
+            np.ndarray: Leaf ids of shape (n_rows, n_trees).
+        """
+        X = self._as_array(X)
+        n_rows, n_features = X.shape
+        nodes = np.broadcast_to(self.roots.astype(np.intp), (n_rows, self.n_trees)).copy()
+        row_offset = (np.arange(n_rows, dtype=np.intp) * n_features)[:, np.newaxis]
+        flat = X.ravel()
+
+        # Node ids are stored as int32; keep the working index array at the
+        # platform index width so each gather avoids an implicit conversion.
+        for _ in range(self.max_depth):
+            values = flat[row_offset + self.feature[nodes]]
+            go_left = values <= self.threshold[nodes]
+            nodes = np.where(
+                go_left, self.children_left[nodes], self.children_right[nodes]
+            ).astype(np.intp, copy=False)
+        return nodes
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        """
+        Class probabilities, identical to the source model's ``predict_proba``.
+        """
+        leaves = self.apply(X)
+        proba = np.zeros((leaves.shape[0], len(self.classes)), dtype=np.float64)
+        # Accumulate tree by tree, as scikit-learn does, to keep results bit-identical.
+        for t in range(self.n_trees):
+            proba += self.leaf_proba[leaves[:, t]]
+        proba /= self.n_trees
+        return proba
+
+    def predict_with_proba(self, X: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score rows in a single pass and return both class labels and probabilities.
+
+        Args:
+            X (Any): DataFrame or array of shape (n_rows, n_features).
+
+        Returns:
+            Tuple containing:
+                - np.ndarray: Predicted class labels.
+                - np.ndarray: Class probabilities of shape (n_rows, n_classes).
+        """
+        proba = self.predict_proba(X)
+        return self.classes.take(np.argmax(proba, axis=1), axis=0), proba
+
+    def predict(self, X: Any) -> np.ndarray:
+        """Class labels, identical to the source model's ``predict``."""
+        return self.predict_with_proba(X)[0]
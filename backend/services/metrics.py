@@ -0,0 +1,300 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+# ------------------ Config ------------------
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_PREFIX = "diabetes_api_"
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (labels, value) pairs of one metric family
+Samples = Iterable[Tuple[Dict[str, str], float]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_family(name: str, kind: str, help_text: str, samples: Samples) -> List[str]:
+    """
+    Render one metric family in the Prometheus text exposition format.
+
+    Args:
+        name (str): Metric name, without ``METRICS_PREFIX``.
+        kind (str): ``counter``, ``gauge`` or ``untyped``.
+        help_text (str): One-line description.
+        samples (Iterable): ``(labels, value)`` pairs.
+
+    Returns:
+        List[str]: Lines of text, without trailing newlines.
+    """
+    full_name = METRICS_PREFIX + name
+    lines = [f"# HELP {full_name} {help_text}", f"# TYPE {full_name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+class Counter:
+    """Monotonic counter with fixed label names; thread-safe."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return format_family(
+            self.name, "counter", self.help_text,
+            ((dict(zip(self.labelnames, labels)), value) for labels, value in values)
+        )
+
+
+class Histogram:
+    """
+    Cumulative latency histogram with fixed buckets and label names.
+
+    ``observe`` is a bisect plus three additions under a lock, cheap enough
+    to call on every request stage.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        full_name = METRICS_PREFIX + self.name
+        lines = [f"# HELP {full_name} {self.help_text}", f"# TYPE {full_name} histogram"]
+        with self._lock:
+            series = sorted((labels, [list(s[0]), s[1], s[2]]) for labels, s in self._series.items())
+        for labels, (counts, total, count) in series:
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**base, "le": _format_value(bound)})
+                lines.append(f"{full_name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{full_name}_sum{_format_labels(base)} {repr(float(total))}")
+            lines.append(f"{full_name}_count{_format_labels(base)} {count}")
+        return lines
+
+
+class _StageTimer:
+    """Context manager recording the time spent in a block into ``STAGE_SECONDS``."""
+
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> "_StageTimer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self.started
+        if METRICS_ENABLED:
+            STAGE_SECONDS.observe(elapsed, self.stage)
+            if exc_type is not None:
+                STAGE_ERRORS.inc(self.stage)
+
+
+# ------------------ Metrics ------------------
+STAGE_SECONDS = Histogram(
+    "stage_duration_seconds",
+    "Time spent in each stage of request handling.",
+    ("stage",)
+)
+STAGE_ERRORS = Counter(
+    "stage_errors_total",
+    "Stages that ended with an exception.",
+    ("stage",)
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status code.",
+    ("route", "method", "status")
+)
+PREDICTIONS = Counter(
+    "predictions_total",
+    "Rows scored by the model, by predicted outcome.",
+    ("outcome",)
+)
+
+_registered: List[Any] = [STAGE_SECONDS, STAGE_ERRORS, REQUEST_SECONDS, PREDICTIONS]
+
+
+def time_stage(stage: str) -> _StageTimer:
+    """
+    Time a block of code as one request stage.
+
+    Usage: ``with time_stage("predict"): ...``. Stages in use: upload,
+    extract, validate, prepare_features, predict, explain, persist and
+    persist_commit.
+    """
+    return _StageTimer(stage)
+
+
+def count_predictions(predictions: Iterable[int]) -> None:
+    """Count scored rows by predicted class."""
+    if not METRICS_ENABLED:
+        return
+    predictions = np.asarray(predictions)
+    positives = int(np.count_nonzero(predictions == 1))
+    negatives = len(predictions) - positives
+    if positives:
+        PREDICTIONS.inc("positive", amount=positives)
+    if negatives:
+        PREDICTIONS.inc("negative", amount=negatives)
+
+
+def render(families: Iterable[List[str]] = ()) -> str:
+    """
+    Render every registered metric plus extra pre-formatted families.
+
+    Args:
+        families (Iterable[List[str]]): Output of ``format_family`` for
+            values read at scrape time (cache sizes, queue depths, ...).
+
+    Returns:
+        str: The exposition text, newline-terminated.
+    """
+    lines: List[str] = []
+    for metric in _registered:
+        lines.extend(metric.render())
+    for family in families:
+        lines.extend(family)
+    return "\n".join(lines) + "\n"
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording ``http_request_duration_seconds``.
+
+    Requests are labelled with the matched route's path template (such as
+    ``/admin/models/{version}/activate``) rather than the raw path, so
+    label cardinality stays bounded. The duration covers the whole
+    response, including streamed bodies.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started, route, scope.get("method", ""), str(status_code)
+            )
+
+
+def _stats_samples(stats: Dict[str, Any], key: str, labels: Dict[str, str]) -> List[Tuple[Dict[str, str], float]]:
+    value = stats.get(key)
+    return [(labels, value)] if isinstance(value, (int, float)) else []
+
+
+def cache_families(caches: Dict[str, Dict[str, Any]]) -> List[List[str]]:
+    """
+    Gauge and counter families for caches, from their ``stats()`` dicts.
+
+    Args:
+        caches (Dict[str, Dict[str, Any]]): Cache name -> ``stats()``.
+
+    Returns:
+        List[List[str]]: Formatted families.
+    """
+    def samples(key: str) -> List[Tuple[Dict[str, str], float]]:
+        found = []
+        for name, stats in caches.items():
+            # ExtractionCache reports its in-memory LRU counters under "memory"
+            source = stats.get("memory", stats) if key in ("size", "evictions") else stats
+            found.extend(_stats_samples(source, key, {"cache": name}))
+        return found
+
+    return [
+        format_family("cache_hits_total", "counter", "Cache lookups that hit.", samples("hits")),
+        format_family("cache_misses_total", "counter", "Cache lookups that missed.", samples("misses")),
+        format_family("cache_entries", "gauge", "Entries currently held in memory.", samples("size")),
+        format_family("cache_evictions_total", "counter", "Entries evicted to make room.", samples("evictions")),
+    ]
+
+
+def gauge_family(name: str, help_text: str, samples: Samples) -> List[str]:
+    """Shorthand for ``format_family(name, "gauge", ...)``."""
+    return format_family(name, "gauge", help_text, samples)
+
+
+def counter_family(name: str, help_text: str, samples: Samples) -> List[str]:
+    """Shorthand for ``format_family(name, "counter", ...)``."""
+    return format_family(name, "counter", help_text, samples)
+
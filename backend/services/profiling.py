@@ -0,0 +1,406 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.cache import LRUCache
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+# ------------------ Config ------------------
+# Profile one request in N (0 = only on request); admins can change it at runtime
+PROFILE_SAMPLE_EVERY = int(os.getenv("PROFILE_SAMPLE_EVERY", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "100"))
+# Optional directory shared by all workers; profiles are kept in memory otherwise
+PROFILE_DIR = os.getenv("PROFILE_DIR") or None
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+# Never sampled (they would only profile the profiler and the scrapers)
+PROFILE_EXCLUDED_PREFIXES = ("/admin", "/metrics", "/ready")
+TOP_FUNCTIONS = 40
+
+_current: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+_labels: Dict[Any, str] = {}
+
+
+def _frame_label(code: Any) -> str:
+    """``function (path:line)``, with site-packages paths shortened to the package."""
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename.replace("\\", "/")
+        for marker in ("/site-packages/", "/dist-packages/", "/lib/python"):
+            if marker in filename:
+                filename = filename.split(marker, 1)[1]
+                break
+        else:
+            filename = os.path.relpath(filename) if os.path.isabs(filename) else filename
+        name = getattr(code, "co_qualname", code.co_name)
+        label = _labels[code] = f"{name} ({filename}:{code.co_firstlineno})"
+    return label
+
+
+def _walk(frame: Any, stop: Any = None) -> Optional[Tuple[str, ...]]:
+    """
+    Root-first stack labels of ``frame``, cut just below ``stop``.
+
+    Returns None if ``stop`` is given but not on the stack.
+    """
+    labels = []
+    while frame is not None:
+        if frame is stop:
+            labels.reverse()
+            return tuple(labels)
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    if stop is not None:
+        return None
+    labels.reverse()
+    return tuple(labels)
+
+
+class RequestProfile:
+    """
+    Wall-clock stack samples of one request across the threads it runs on.
+
+    The event-loop thread is only sampled while the request's own task is
+    running on it (its middleware frame is on the stack), so concurrent
+    requests do not leak into the profile. Worker-pool threads are sampled
+    while they run a task submitted on behalf of the request.
+    """
+
+    def __init__(self, method: str, path: str, trigger: str, anchor: Any):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.status: Optional[int] = None
+        self.route: Optional[str] = None
+        self.stacks: Counter = Counter()
+        # thread ident -> (thread label, frame the stack is cut at)
+        self._threads: Dict[int, Tuple[str, Any]] = {threading.get_ident(): ("event-loop", anchor)}
+        self._lock = threading.Lock()
+
+    def attach(self, label: str, stop: Any) -> None:
+        with self._lock:
+            self._threads[threading.get_ident()] = (label, stop)
+
+    def detach(self) -> None:
+        with self._lock:
+            self._threads.pop(threading.get_ident(), None)
+
+    def sample(self, frames: Dict[int, Any]) -> None:
+        with self._lock:
+            threads = list(self._threads.items())
+        sampled = []
+        for ident, (label, stop) in threads:
+            frame = frames.get(ident)
+            stack = _walk(frame, stop) if frame is not None else None
+            if stack:
+                sampled.append((label,) + stack)
+        with self._lock:
+            self.stacks.update(sampled)
+
+    def add_stacks(self, stacks: Dict[Tuple[str, ...], int], label: str) -> None:
+        """Merge samples taken in another process."""
+        with self._lock:
+            for stack, count in stacks.items():
+                self.stacks[(label,) + tuple(stack)] += count
+
+    def bind(self, fn: Callable[..., Any], label: str) -> Callable[..., Any]:
+        """Wrap ``fn`` so the pool thread running it is sampled for this request."""
+        profile = self
+
+        def profiled(*args: Any) -> Any:
+            profile.attach(label, sys._getframe())
+            try:
+                return fn(*args)
+            finally:
+                profile.detach()
+
+        return profiled
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stacks = Counter(self.stacks)
+        total = sum(stacks.values())
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, count in stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack[1:]):
+                inclusive[label] += count
+        top = [
+            {"function": label, "self": own[label], "total": count}
+            for label, count in inclusive.most_common(TOP_FUNCTIONS)
+        ]
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": self.duration * 1000,
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "samples": total,
+            "top": top,
+            "stacks": [
+                {"stack": list(stack), "count": count} for stack, count in stacks.most_common()
+            ],
+        }
+
+
+class _Sampler:
+    """Background thread sampling every active profile; idle when there is none."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: set = set()
+        self._wake = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._wake:
+            self._active.add(profile)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+            self._wake.notify()
+
+    def remove(self, profile: RequestProfile) -> None:
+        with self._wake:
+            self._active.discard(profile)
+
+    def _run(self) -> None:
+        while True:
+            with self._wake:
+                while not self._active:
+                    self._wake.wait()
+                active = list(self._active)
+            frames = sys._current_frames()
+            for profile in active:
+                profile.sample(frames)
+            del frames
+            time.sleep(self.interval)
+
+
+_sampler = _Sampler(PROFILE_INTERVAL_MS / 1000.0)
+
+
+def sample_call(fn: Callable[..., Any], args: Tuple[Any, ...], interval: float) -> Tuple[Any, Dict[Tuple[str, ...], int]]:
+    """
+    Run ``fn(*args)`` while sampling the calling thread's stack.
+
+    Used inside process-pool workers, which the request's sampler cannot see.
+    Module-level so it can be sent to a process pool.
+
+    Returns:
+        Tuple: ``fn``'s result and the stack samples.
+    """
+    target = threading.get_ident()
+    stop_frame = sys._getframe()
+    stacks: Counter = Counter()
+    done = threading.Event()
+
+    def sampler() -> None:
+        while not done.wait(interval):
+            frame = sys._current_frames().get(target)
+            stack = _walk(frame, stop_frame) if frame is not None else None
+            if stack:
+                stacks[stack] += 1
+
+    thread = threading.Thread(target=sampler, name="profiler", daemon=True)
+    thread.start()
+    try:
+        result = fn(*args)
+    finally:
+        done.set()
+        thread.join()
+    return result, dict(stacks)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """The profile of the request being handled, if it is profiled."""
+    return _current.get()
+
+
+class ProfileStore:
+    """
+    Finished profiles, newest last: an in-memory LRU and optionally a directory.
+
+    With ``directory`` set, every worker writes its profiles there, so a
+    profile can be fetched from whichever worker serves the admin request.
+    """
+
+    def __init__(self, max_stored: int = 100, directory: Optional[str] = None):
+        self.max_stored = max(1, max_stored)
+        self.memory = LRUCache(self.max_stored)
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, profile_id: str) -> Optional[str]:
+        if not self.directory or not profile_id.isalnum():
+            return None
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def save(self, profile: RequestProfile) -> None:
+        document = profile.to_dict()
+        self.memory.set(profile.id, document)
+        path = self._path(profile.id)
+        if path is None:
+            return
+        try:
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(document, f)
+            os.replace(temp_path, path)
+            self._trim()
+        except OSError as e:
+            logger.warning(f"Could not write profile {profile.id}: {e}")
+
+    def _trim(self) -> None:
+        entries = sorted(
+            (entry.stat().st_mtime, entry.path)
+            for entry in os.scandir(self.directory) if entry.name.endswith(".json")
+        )
+        for _, path in entries[:-self.max_stored]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        document = self.memory.get(profile_id)
+        if document is not None:
+            return document
+        path = self._path(profile_id)
+        if path is None:
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries (without stacks) of the stored profiles, newest first."""
+        documents = {}
+        if self.directory:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".json"):
+                    document = self.get(entry.name[:-len(".json")])
+                    if document is not None:
+                        documents[document["id"]] = document
+        for document in self.memory.values():
+            documents[document["id"]] = document
+        summaries = [
+            {key: value for key, value in document.items() if key not in ("stacks", "top")}
+            for document in documents.values()
+        ]
+        return sorted(summaries, key=lambda summary: summary["started_at"], reverse=True)
+
+
+profile_store = ProfileStore(PROFILE_MAX_STORED, PROFILE_DIR)
+_settings = {"sample_every": max(0, PROFILE_SAMPLE_EVERY)}
+_request_counter = itertools.count(1)
+
+
+def get_sample_every() -> int:
+    return _settings["sample_every"]
+
+
+def set_sample_every(every: int) -> None:
+    """Profile one request in ``every`` from now on; 0 turns sampling off."""
+    _settings["sample_every"] = max(0, int(every))
+    logger.info(f"Request profiling sample rate set to 1 in {every}" if every else "Request profiling sampling off.")
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles selected requests.
+
+    A request is profiled when it carries ``X-Profile: 1`` and
+    ``is_privileged`` accepts its bearer token, or when it is the N-th
+    request under the sampling setting. The response of a profiled request
+    carries ``X-Profile-Id``; the profile is stored once the response has
+    been sent and can be fetched from ``/admin/profiles/{id}``.
+    """
+
+    def __init__(self, app: Callable, is_privileged: Callable[[str], bool]):
+        self.app = app
+        self.is_privileged = is_privileged
+
+    def _trigger(self, scope: Dict[str, Any]) -> Optional[str]:
+        path = scope.get("path", "")
+        headers = dict(scope.get("headers") or [])
+        requested = headers.get(PROFILE_HEADER.encode())
+        if requested is not None and requested.strip() not in (b"", b"0"):
+            authorization = headers.get(b"authorization", b"").decode("latin-1")
+            scheme, _, token = authorization.partition(" ")
+            if scheme.lower() == "bearer" and token and self.is_privileged(token):
+                return "header"
+        every = _settings["sample_every"]
+        if every and not path.startswith(PROFILE_EXCLUDED_PREFIXES) and next(_request_counter) % every == 0:
+            return "sample"
+        return None
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope.get("method", ""), scope.get("path", ""), trigger, sys._getframe())
+        token = _current.set(profile)
+
+        async def send_with_id(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER.lower().encode(), profile.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        _sampler.add(profile)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _sampler.remove(profile)
+            _current.reset(token)
+            profile.duration = time.perf_counter() - profile.started
+            profile.route = getattr(scope.get("route"), "path", None)
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, profile_store.save, profile)
+            except Exception as e:
+                logger.warning(f"Could not store profile {profile.id}: {e}")
+            logger.info(
+                f"Profiled {profile.method} {profile.path} ({trigger}): "
+                f"{profile.duration * 1000:.1f} ms, {sum(profile.stacks.values())} sample(s), id {profile.id}."
+            )
+
+
+def collapsed_stacks(document: Dict[str, Any]) -> str:
+    """
+    A stored profile in collapsed-stack format (``thread;a;b;c count`` per line).
+
+    This is the input format of flamegraph.pl, speedscope and similar tools.
+    """
+    lines = [f"{';'.join(item['stack'])} {item['count']}" for item in document.get("stacks", [])]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,306 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.executor import run_in_pool, PoolOverloaded
+from services.inference import CompiledForest
+from services.utils import (
+    FEATURE_COLUMNS, build_explainer, build_inference_engine, explain_top_factors,
+    load_inference_engine, load_model, predict_batch
+)
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+# ------------------ Config ------------------
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "saved_models/registry")
+# Seconds between checks of the registry's ACTIVE file; 0 disables the watcher
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "5"))
+MODEL_WARMUP_ROWS = int(os.getenv("MODEL_WARMUP_ROWS", "16"))
+# Also unpickle the model and build the SHAP explainer during warm-up. Off by
+# default: with a memory-mapped forest the pickled model is otherwise only
+# loaded by the first positive prediction, which saves a private copy per worker.
+MODEL_WARMUP_EXPLAINER = os.getenv("MODEL_WARMUP_EXPLAINER", "0") == "1"
+
+# Layout written by model_training/models/registry.py
+MODEL_FILENAME = "model.joblib"
+FOREST_FILENAME = "model.forest"
+METADATA_FILENAME = "metadata.json"
+ACTIVE_FILENAME = "ACTIVE"
+
+# Upper bounds of the synthetic warm-up rows, per feature
+WARMUP_FEATURE_SCALE = np.array([15, 200, 120, 100, 850, 65, 2.5, 80], dtype=np.float64)
+
+
+class RegistryError(Exception):
+    """Raised when a model version is missing, corrupt or incompatible."""
+
+
+class ModelVersionNotFound(RegistryError):
+    """Raised when a model version is not registered."""
+
+
+class ModelBundle:
+    """
+    Everything needed to serve one model version.
+
+    Holds the inference engine, the pickled model (loaded on first use if
+    only its path is known) and the SHAP explainer (built on first use).
+    Request handlers read ``state.bundle`` once and use that object for the
+    whole request, so replacing ``state.bundle`` swaps every piece at once
+    and in-flight requests finish on the version they started with.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        fingerprint: str,
+        model: Any = None,
+        engine: Optional[CompiledForest] = None,
+        model_path: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        if model is None and engine is None:
+            if model_path is None:
+                raise ValueError("A model bundle needs a model, an engine or a model path.")
+            model = load_model(model_path)
+        self.version = version
+        self.fingerprint = fingerprint
+        self.model = model
+        self.engine = engine if engine is not None else build_inference_engine(model)
+        self.model_path = model_path
+        self.metadata = metadata or {}
+        self.loaded_at = time.time()
+        self._explainer = None
+        self._lock = threading.Lock()
+
+    def get_model(self) -> Any:
+        """Return the pickled model, loading it from ``model_path`` on first use."""
+        if self.model is None and self.model_path:
+            with self._lock:
+                if self.model is None:
+                    self.model = load_model(self.model_path)
+        return self.model
+
+    def get_explainer(self) -> Any:
+        """
+        Return the SHAP explainer for this version, building it on first use.
+
+        Returns:
+            shap.TreeExplainer or None: The explainer, or None if it could not be built.
+        """
+        if self._explainer is None:
+            model = self.get_model()
+            with self._lock:
+                if self._explainer is None:
+                    try:
+                        self._explainer = build_explainer(model)
+                    except Exception as e:
+                        logger.error(f"Failed to build SHAP explainer: {e}", exc_info=True)
+        return self._explainer
+
+    def warm_up(self, n_rows: int = MODEL_WARMUP_ROWS, explain: bool = MODEL_WARMUP_EXPLAINER) -> None:
+        """
+        Score a few synthetic rows so the first real request is not slow.
+
+        This touches the engine's arrays through the same functions requests
+        use. With ``explain`` it also loads the pickled model and builds the
+        SHAP explainer; otherwise the first positive prediction does that.
+        """
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(
+            rng.uniform(0.0, 1.0, (max(1, n_rows), len(FEATURE_COLUMNS))) * WARMUP_FEATURE_SCALE,
+            columns=FEATURE_COLUMNS
+        )
+        predict_batch(self.model, X, self.engine)
+        if explain:
+            explainer = self.get_explainer()
+            if explainer is not None:
+                explain_top_factors(explainer, X.iloc[:1])
+        logger.info(f"Model version {self.version} warmed up with {len(X)} synthetic row(s).")
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "loaded_at": self.loaded_at,
+            "engine": "compiled" if self.engine is not None else "model",
+            "metrics": self.metadata.get("metrics"),
+        }
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Directory of immutable, versioned model artifacts.
+
+    Each version lives in ``<root>/<version>/`` with ``model.joblib``, an
+    optional ``model.forest`` and ``metadata.json`` (metrics, feature order,
+    SHA-256 checksums). ``<root>/ACTIVE`` names the version workers serve.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, version: str, filename: str) -> str:
+        if not version or os.path.basename(version) != version or version.startswith("."):
+            raise ModelVersionNotFound(f"Invalid model version: {version!r}")
+        return os.path.join(self.root, version, filename)
+
+    def metadata(self, version: str) -> Dict[str, Any]:
+        """Read a version's metadata. Raises ``RegistryError`` if it is not registered."""
+        try:
+            with open(self._path(version, METADATA_FILENAME)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ModelVersionNotFound(f"Model version {version} is not registered.")
+        except (OSError, ValueError) as e:
+            raise RegistryError(f"Unreadable metadata for model version {version}: {e}")
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Metadata of every registered version, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for name in sorted(os.listdir(self.root)):
+            if not name.startswith(".") and os.path.isfile(os.path.join(self.root, name, METADATA_FILENAME)):
+                try:
+                    found.append(self.metadata(name))
+                except RegistryError as e:
+                    logger.warning(str(e))
+        return sorted(found, key=lambda meta: meta.get("created_at", ""))
+
+    def active_version(self) -> Optional[str]:
+        """The version named by the ``ACTIVE`` file, or None if there is none."""
+        try:
+            with open(os.path.join(self.root, ACTIVE_FILENAME)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_active_version(self, version: str) -> None:
+        """Atomically point ``ACTIVE`` at a registered version."""
+        self.metadata(version)
+        temp_path = os.path.join(self.root, f".{ACTIVE_FILENAME}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temp_path, "w") as f:
+            f.write(version + "\n")
+        os.replace(temp_path, os.path.join(self.root, ACTIVE_FILENAME))
+
+    def load(self, version: str) -> ModelBundle:
+        """
+        Verify and load a registered version.
+
+        Checksums of the artifacts and the feature order are checked before
+        anything is unpickled. The compact forest is memory-mapped when
+        present; the pickled model is then loaded lazily.
+
+        Raises:
+            RegistryError: If the version is missing, corrupt or expects
+                different input features.
+        """
+        metadata = self.metadata(version)
+        feature_order = metadata.get("feature_order")
+        if feature_order is not None and list(feature_order) != FEATURE_COLUMNS:
+            raise RegistryError(
+                f"Model version {version} expects features {feature_order}, "
+                f"the API provides {FEATURE_COLUMNS}."
+            )
+
+        model_path = self._path(version, MODEL_FILENAME)
+        forest_path = self._path(version, FOREST_FILENAME)
+        for filename, expected in metadata.get("checksums", {}).items():
+            path = self._path(version, filename)
+            try:
+                actual = _sha256_file(path)
+            except OSError as e:
+                raise RegistryError(f"Missing artifact {filename} for model version {version}: {e}")
+            if actual != expected:
+                raise RegistryError(f"Checksum mismatch for {filename} in model version {version}.")
+
+        fingerprint = metadata.get("fingerprint") or _sha256_file(model_path)[:16]
+        engine = load_inference_engine(forest_path, fingerprint)
+        return ModelBundle(
+            version, fingerprint, engine=engine, model_path=model_path, metadata=metadata
+        )
+
+
+registry = ModelRegistry(MODEL_REGISTRY_DIR)
+_swap_lock = threading.Lock()
+
+
+def activate_model(state: Any, version: str, persist: bool = True) -> ModelBundle:
+    """
+    Load, warm up and atomically switch ``state.bundle`` to a registered version.
+
+    The current version keeps serving until the new one is fully loaded
+    and warmed; if anything fails it stays active.
+
+    Args:
+        state (Any): Object holding the serving state (e.g. ``app.state``).
+        version (str): Registered version to serve.
+        persist (bool): Also point the registry's ``ACTIVE`` file at it, so
+            the other workers (and restarts) follow.
+
+    Returns:
+        ModelBundle: The newly active bundle.
+
+    Raises:
+        RegistryError: If the version cannot be loaded.
+    """
+    with _swap_lock:
+        bundle = registry.load(version)
+        bundle.warm_up()
+        previous = getattr(state, "bundle", None)
+        state.bundle = bundle
+        # A warmed-up version makes a worker whose startup warm-up failed ready
+        if getattr(state, "warmup_error", None):
+            state.warmup_error = None
+            state.ready = True
+        if persist:
+            registry.set_active_version(version)
+    logger.info(
+        f"Serving model version {version} "
+        f"(previously {previous.version if previous is not None else 'none'})."
+    )
+    return bundle
+
+
+async def watch_registry(state: Any, interval: float = MODEL_WATCH_INTERVAL) -> None:
+    """
+    Follow the registry's ``ACTIVE`` file and hot-swap when it changes.
+
+    A version that fails to load is not retried until ``ACTIVE`` changes again.
+    """
+    failed: Optional[str] = None
+    while True:
+        await asyncio.sleep(interval)
+        active = None
+        try:
+            active = await run_in_pool("io", registry.active_version)
+            current = getattr(state, "bundle", None)
+            if active is None or active == failed or (current is not None and current.version == active):
+                continue
+            await run_in_pool("cpu", activate_model, state, active, False)
+            failed = None
+        except asyncio.CancelledError:
+            raise
+        except PoolOverloaded:
+            continue
+        except Exception as e:
+            logger.error(f"Cannot switch to model version {active}: {e}", exc_info=not isinstance(e, RegistryError))
+            failed = active
@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from services.cache import LRUCache
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+# ------------------ Config ------------------
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# sqlite (shared by all worker processes on a host) or memory (per process)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "sqlite").lower()
+# Relative paths are resolved against the backend directory, not the cwd
+SESSION_DB_PATH = os.path.join(BACKEND_DIR, os.getenv("SESSION_DB_PATH", "data/sessions.db"))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+
+
+class SessionStore(ABC):
+    """
+    Bounded key/value store for per-user extracted report data.
+
+    Entries expire ``ttl`` seconds after they were last written and the
+    least recently used entries are evicted beyond ``max_entries``. Values
+    must be JSON-serialisable; ``get`` always returns a fresh copy, so
+    callers write changes back with ``set``.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the value stored under ``key``, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store ``value`` under ``key``, restarting its time to live."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove ``key`` if present."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters for ``/cache/stats`` and ``/metrics``."""
+
+    def close(self) -> None:
+        """Release resources held by the store."""
+
+
+class MemorySessionStore(SessionStore):
+    """Per-process session store; only suitable for a single worker."""
+
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 10000):
+        self.cache = LRUCache(max_entries, ttl)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.cache.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.cache.set(key, json.dumps(value, default=float))
+
+    def delete(self, key: str) -> None:
+        self.cache.pop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", **self.cache.stats()}
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store in a WAL-mode SQLite file shared by all workers on a host.
+
+    Reads refresh an entry's last-access time for LRU eviction. Expired
+    entries are skipped on read and purged, together with any LRU overflow
+    beyond ``max_entries``, every ``prune_every`` writes.
+    """
+
+    def __init__(self, path: str, ttl: float = 3600.0, max_entries: int = 10000, prune_every: int = 100):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prune_every = max(1, prune_every)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._writes = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns: List[sqlite3.Connection] = []
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions (last_access);
+            CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at);
+            """
+        )
+        logger.info(f"Session store ready at {path} (ttl={ttl}s, max_entries={max_entries}).")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value FROM sessions WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        conn.execute("UPDATE sessions SET last_access = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO sessions (key, value, expires_at, last_access) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+            "expires_at = excluded.expires_at, last_access = excluded.last_access",
+            (key, json.dumps(value, default=float), now + self.ttl, now)
+        )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            self.prune()
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM sessions WHERE key = ?", (key,))
+
+    def prune(self) -> int:
+        """Delete expired entries and the least recently used ones beyond ``max_entries``."""
+        conn = self._connect()
+        removed = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+        removed += conn.execute(
+            "DELETE FROM sessions WHERE key IN ("
+            "SELECT key FROM sessions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        ).rowcount
+        self.evictions += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        size = self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "size": size,
+            "maxsize": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """Close the connections opened by every thread that used the store."""
+        with self._lock:
+            conns, self._conns = self._conns, []
+            self._local = threading.local()
+        for conn in conns:
+            conn.close()
+
+
+def create_session_store() -> SessionStore:
+    """Create the session store selected by ``SESSION_BACKEND``."""
+    if SESSION_BACKEND == "memory":
+        return MemorySessionStore(SESSION_TTL_SECONDS, SESSION_MAX_ENTRIES)
+    if SESSION_BACKEND == "sqlite":
+        return SQLiteSessionStore(SESSION_DB_PATH, SESSION_TTL_SECONDS, SESSION_MAX_ENTRIES)
+    raise ValueError(f"Unknown SESSION_BACKEND: {SESSION_BACKEND}")
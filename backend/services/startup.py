@@ -0,0 +1,82 @@
+import importlib
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Any, Dict, Iterator, List, Tuple
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """
+    Wall-clock timings of the named phases of a worker's startup.
+
+    Phases are recorded in the order they finish. Heavy optional imports
+    loaded on first use (see ``lazy_import``) are recorded here too, as
+    ``import:<module>``, so the report shows where cold-start time goes
+    even when it is spent after the server started accepting requests.
+    """
+
+    def __init__(self):
+        self.created = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as phase ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            phases = list(self.phases)
+        return {
+            "phases": [{"name": name, "seconds": round(seconds, 4)} for name, seconds in phases],
+            "since_start_seconds": round(time.perf_counter() - self.created, 4),
+        }
+
+    def log(self) -> None:
+        """Log one line per phase, slowest first."""
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1], reverse=True)
+        total = sum(seconds for _, seconds in phases)
+        logger.info(f"Startup timing ({total:.3f}s in {len(phases)} phase(s)):")
+        for name, seconds in phases:
+            logger.info(f"  {name:<24} {seconds * 1000:10.1f} ms")
+
+
+startup_report = StartupReport()
+_import_lock = threading.Lock()
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Import a module on first use and record how long the import took.
+
+    Args:
+        name (str): Dotted module name, e.g. ``"shap"``.
+
+    Returns:
+        ModuleType: The imported module.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _import_lock:
+        module = sys.modules.get(name)
+        if module is None:
+            with startup_report.phase(f"import:{name}"):
+                module = importlib.import_module(name)
+    return module
@@ -1,14 +1,72 @@
 import logging
 import json
+import os
+import threading
+import time
+from typing import Dict
 
 # ------------------ Logging Setup ------------------
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# ------------------ Config ------------------
+USERS_FILE = os.getenv("USERS_FILE", "users.json")
+# How often (seconds) lookups check the file for changes
+USERS_RELOAD_INTERVAL = float(os.getenv("USERS_RELOAD_INTERVAL", "2"))
+
+
+class UserStore:
+    """
+    In-memory user index backed by a JSON file, reloaded when the file changes.
+
+    The file maps usernames to user dicts. Lookups are dict lookups; at most
+    once every ``reload_interval`` seconds a lookup also checks the file's
+    modification time and, if it changed, swaps in a freshly parsed index.
+    """
+
+    def __init__(self, path: str, reload_interval: float = 2.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._users: Dict[str, dict] = {}
+        self._mtime_ns: int | None = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def load(self) -> None:
+        """(Re)load the user file and replace the index atomically."""
+        stat = os.stat(self.path)
+        with open(self.path) as f:
+            users = json.load(f)
+        with self._lock:
+            self._users = users
+            self._mtime_ns = stat.st_mtime_ns
+            self.reloads += 1
+        logger.info(f"Loaded {len(users)} user(s) from {self.path}.")
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if self._mtime_ns is not None and now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+        try:
+            if os.stat(self.path).st_mtime_ns != self._mtime_ns:
+                self.load()
+        except (OSError, ValueError) as e:
+            # Keep serving the last good index if the file is missing or mid-write
+            logger.error(f"Could not reload users from {self.path}: {e}")
+
+    def get(self, username: str) -> dict | None:
+        self._maybe_reload()
+        return self._users.get(username)
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+
 # ------------------ Fake In-Memory User Database ------------------
 # TODO: Replace with actual hashed-password database in production
-with open("users.json") as f:
-    fake_users_db = json.load(f)
+user_store = UserStore(USERS_FILE, USERS_RELOAD_INTERVAL)
 
 
 def get_user(username: str) -> dict | None:
@@ -21,7 +79,7 @@ def get_user(username: str) -> dict | None:
     Returns:
         dict or None: User dictionary if found, else None.
     """
-    return fake_users_db.get(username)
+    return user_store.get(username)
 
 
 def authenticate_user(username: str, password: str) -> dict | None:
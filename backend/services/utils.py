@@ -1,13 +1,19 @@
+import hashlib
+import io
 import logging
+import os
 import re
-from typing import Any, Dict, Optional, Tuple
-import shap
+from typing import IO, Any, Dict, List, Optional, Tuple, Union
 
-import joblib
-import matplotlib.pyplot as plt  # Unused, remove if not needed
 import numpy as np
 import pandas as pd
-import pdfplumber
+
+from services.inference import CompiledForest
+from services.metrics import time_stage
+from services.startup import lazy_import
+
+# shap, joblib and pdfplumber are slow to import and only needed by some
+# code paths, so they are imported on first use through ``lazy_import``.
 
 # ------------------ Logging Setup ------------------
 logging.basicConfig(
@@ -16,6 +22,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Model input columns, in training order
+FEATURE_COLUMNS = [
+    'Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness', 'Insulin',
+    'BMI', 'DiabetesPedigreeFunction', 'Age'
+]
+
 
 def load_model(model_path: str) -> Any:
     """
@@ -28,11 +40,83 @@ def load_model(model_path: str) -> Any:
         Any: The loaded model object.
     """
     logger.info(f"Loading model from {model_path}")
-    model = joblib.load(model_path)
-    logger.info("Model loaded successfully.")
+    model = lazy_import("joblib").load(model_path)
+    logger.info(f"Model loaded successfully (fingerprint {model_fingerprint(model_path)}).")
     return model
 
 
+def model_fingerprint(model_path: str) -> str:
+    """
+    Fingerprint a saved model file by hashing its bytes.
+
+    Args:
+        model_path (str): Path to the saved model file.
+
+    Returns:
+        str: Hex SHA-256 digest of the file (first 16 characters).
+    """
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def load_inference_engine(forest_path: str, fingerprint: Optional[str] = None) -> Optional[CompiledForest]:
+    """
+    Memory-map the compact forest exported alongside a saved model.
+
+    Args:
+        forest_path (str): Path to the ``.forest`` artifact.
+        fingerprint (str, optional): Fingerprint of the pickled model being
+            served; an artifact exported from a different model is ignored.
+
+    Returns:
+        CompiledForest or None: The engine, or None if the artifact is
+        missing, unreadable or stale.
+    """
+    if not os.path.exists(forest_path):
+        return None
+    try:
+        engine = CompiledForest.load(forest_path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Failed to load compact forest {forest_path}: {e}")
+        return None
+    if fingerprint is not None and engine.source_fingerprint != fingerprint:
+        logger.warning(
+            f"Ignoring {forest_path}: exported from model {engine.source_fingerprint}, "
+            f"serving {fingerprint}."
+        )
+        return None
+    return engine
+
+
+# Forests whose trees CompiledForest can flatten (checked by name to keep
+# scikit-learn out of the import path)
+COMPILABLE_MODELS = {"RandomForestClassifier", "ExtraTreesClassifier"}
+
+
+def build_inference_engine(model: Any) -> Optional[CompiledForest]:
+    """
+    Compile a loaded forest into an array-backed inference engine.
+
+    Args:
+        model (Any): The loaded model object.
+
+    Returns:
+        CompiledForest or None: The compiled engine, or None if the model
+        type is not supported (predictions then fall back to the model).
+    """
+    if type(model).__name__ not in COMPILABLE_MODELS:
+        logger.warning(f"Cannot compile model of type {type(model).__name__}; using it directly.")
+        return None
+    try:
+        return CompiledForest.from_model(model)
+    except Exception as e:
+        logger.error(f"Failed to compile model: {e}", exc_info=True)
+        return None
+
+
 def prepare_features(df: pd.DataFrame) -> pd.DataFrame:
     """
     Prepare features by removing unwanted columns.
@@ -47,110 +131,282 @@ def prepare_features(df: pd.DataFrame) -> pd.DataFrame:
     return df.drop(columns=drop_cols)
 
 
-def extract_medical_data_from_pdf(pdf_path: str) -> Optional[Dict[str, Any]]:
+# Compiled once at import; searched in this order against each page.
+PDF_FIELD_PATTERNS = {
+    'Pregnancies': re.compile(r'Pregnancies\s+(\d+)', re.IGNORECASE),
+    'Glucose': re.compile(r'Glucose\s*\(.*?\)\s*(\d+(?:\.\d+)?)', re.IGNORECASE),
+    'BloodPressure': re.compile(r'Blood Pressure\s*\(.*?\)\s*(\d+(?:\.\d+)?)', re.IGNORECASE),
+    'SkinThickness': re.compile(r'Skin Thickness\s*\(.*?\)\s*(\d+(?:\.\d+)?)', re.IGNORECASE),
+    'Insulin': re.compile(r'Insulin\s*\(.*?\)\s*(\d+(?:\.\d+)?)', re.IGNORECASE),
+    'BMI': re.compile(r'BMI\s*\(.*?\)\s*(\d+(?:\.\d+)?)', re.IGNORECASE),
+    'DiabetesPedigreeFunction': re.compile(r'Diabetes Pedigree Function\s+(\d+(?:\.\d+)?)', re.IGNORECASE),
+    'Age': re.compile(r'Age\s*\(.*?\)\s*(\d+(?:\.\d+)?)', re.IGNORECASE),
+    'Date': re.compile(r'\b(\d{2}-\d{2}-\d{4})\b', re.IGNORECASE),
+}
+INTEGER_FIELDS = {'Pregnancies', 'Age'}
+TEXT_FIELDS = {'Date'}
+
+# Changes whenever a pattern changes; part of the extraction cache key.
+PDF_PATTERNS_VERSION = hashlib.sha256(
+    "\n".join(f"{key}={p.pattern}/{p.flags}" for key, p in PDF_FIELD_PATTERNS.items()).encode()
+).hexdigest()[:12]
+
+
+def _convert_field(key: str, value: str) -> Any:
+    if key in INTEGER_FIELDS:
+        return int(value)
+    if key in TEXT_FIELDS:
+        return value
+    return float(value)
+
+
+def extract_medical_data_with_pages(
+    pdf_source: Union[str, IO[bytes]]
+) -> Optional[Tuple[Dict[str, Any], Dict[str, int]]]:
     """
-    Extract relevant medical data fields from a PDF document.
+    Extract medical data fields from a PDF, page by page, stopping early.
+
+    Pages are parsed in order and each page is only searched for fields that
+    are still missing; once every field has been found the remaining pages
+    are never parsed. A page is searched together with the previous page's
+    text, so a label and value split across a page break are still matched
+    exactly as they would be in the full document text.
 
     Args:
-        pdf_path (str): Path to the PDF file.
+        pdf_source (str or file-like): Path to the PDF file or a binary stream.
 
     Returns:
-        dict or None: Dictionary of extracted fields, or None if extraction fails.
+        Tuple or None: The extracted fields (missing ones set to None) and the
+        1-based page number each found field came from, or None if the PDF
+        could not be read.
     """
-    data = {
-        'Pregnancies': None,
-        'Glucose': None,
-        'BloodPressure': None,
-        'SkinThickness': None,
-        'Insulin': None,
-        'BMI': None,
-        'DiabetesPedigreeFunction': None,
-        'Age': None,
-        'Date': None
-    }
+    data: Dict[str, Any] = {key: None for key in PDF_FIELD_PATTERNS}
+    source_pages: Dict[str, int] = {}
 
     try:
-        text = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
+        pending = dict(PDF_FIELD_PATTERNS)
+        previous_text, previous_number = "", 0
+        with lazy_import("pdfplumber").open(pdf_source) as pdf:
+            for page_number, page in enumerate(pdf.pages, start=1):
                 page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-
-        patterns = {
-            'Pregnancies': r'Pregnancies\s+(\d+)',
-            'Glucose': r'Glucose\s*\(.*?\)\s*(\d+(?:\.\d+)?)',
-            'BloodPressure': r'Blood Pressure\s*\(.*?\)\s*(\d+(?:\.\d+)?)',
-            'SkinThickness': r'Skin Thickness\s*\(.*?\)\s*(\d+(?:\.\d+)?)',
-            'Insulin': r'Insulin\s*\(.*?\)\s*(\d+(?:\.\d+)?)',
-            'BMI': r'BMI\s*\(.*?\)\s*(\d+(?:\.\d+)?)',
-            'DiabetesPedigreeFunction': r'Diabetes Pedigree Function\s+(\d+(?:\.\d+)?)',
-            'Age': r'Age\s*\(.*?\)\s*(\d+(?:\.\d+)?)',
-            'Date': r'\b(\d{2}-\d{2}-\d{4})\b'
-        }
-
-        for key, pattern in patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                value = match.group(1)
-                if key in ['Pregnancies', 'Age']:
-                    data[key] = int(value)
-                elif key == 'Date':
-                    data[key] = value
-                else:
-                    data[key] = float(value)
-
-        return data
+                if not page_text:
+                    continue
+
+                window = previous_text + page_text + "\n"
+                for key, pattern in list(pending.items()):
+                    match = pattern.search(window)
+                    if match:
+                        data[key] = _convert_field(key, match.group(1))
+                        in_previous = match.start(1) < len(previous_text)
+                        source_pages[key] = previous_number if in_previous else page_number
+                        del pending[key]
+
+                if not pending:
+                    logger.debug(f"All fields found by page {page_number} of {len(pdf.pages)}.")
+                    break
+                previous_text, previous_number = page_text + "\n", page_number
+
+        return data, source_pages
 
     except Exception as e:
         logger.error(f"Error reading PDF: {e}", exc_info=True)
         return None
 
 
-def predict(model: Any, X: pd.DataFrame) -> Tuple[pd.Series, Dict[str, float], float]:
+def extract_medical_data_from_bytes(contents: bytes) -> Optional[Tuple[Dict[str, Any], Dict[str, int]]]:
+    """
+    Extract medical data fields from in-memory PDF bytes.
+
+    Module-level so it can be sent to a process pool.
+
+    Args:
+        contents (bytes): Raw PDF file contents.
+
+    Returns:
+        Tuple or None: Same as ``extract_medical_data_with_pages``.
+    """
+    return extract_medical_data_with_pages(io.BytesIO(contents))
+
+
+def extract_medical_data_from_pdf(pdf_source: Union[str, IO[bytes]]) -> Optional[Dict[str, Any]]:
+    """
+    Extract relevant medical data fields from a PDF document.
+
+    Args:
+        pdf_source (str or file-like): Path to the PDF file or a binary stream.
+
+    Returns:
+        dict or None: Dictionary of extracted fields, or None if extraction fails.
+    """
+    result = extract_medical_data_with_pages(pdf_source)
+    return result[0] if result is not None else None
+
+
+def build_explainer(model: Any) -> Any:
+    """
+    Build a SHAP TreeExplainer for a loaded model.
+
+    Parsing the trees is expensive, so the explainer is built once per model
+    and reused for every request (see ``ModelBundle.get_explainer``).
+
+    Args:
+        model (Any): The loaded model object.
+
+    Returns:
+        shap.TreeExplainer: Explainer bound to ``model``.
+    """
+    logger.info("Building SHAP explainer.")
+    return lazy_import("shap").TreeExplainer(model)
+
+
+def _resolve_explainer(model: Any, explainer: Any) -> Any:
+    """Turn the ``explainer`` argument of ``predict``/``predict_batch`` into an explainer."""
+    if callable(explainer) and not hasattr(explainer, "shap_values"):
+        explainer = explainer()
+    if explainer is None:
+        explainer = build_explainer(model)
+    return explainer
+
+
+def explain_top_factors(
+    explainer: Any,
+    X: pd.DataFrame,
+    top_n: int = 3
+) -> List[Dict[str, float]]:
+    """
+    Compute the top contributing features towards class 1 for every row.
+
+    SHAP values for all rows are computed in a single batched call.
+
+    Args:
+        explainer (Any): SHAP TreeExplainer for the model.
+        X (pd.DataFrame): Feature DataFrame.
+        top_n (int): Number of features to report per row.
+
+    Returns:
+        list: One ``{feature: value}`` dict per row, ordered by absolute contribution.
+    """
+    if len(X) == 0:
+        return []
+
+    shap_values = explainer.shap_values(X)
+    if isinstance(shap_values, list):
+        # Older shap releases return one (rows, features) array per class
+        shap_values = np.stack(shap_values, axis=-1)
+    shap_values = np.asarray(shap_values)
+    # Single-output models (e.g. gradient boosting) explain the class-1 margin directly
+    shap_contribs = shap_values[:, :, 1] if shap_values.ndim == 3 else shap_values
+
+    # Get top absolute contributors per row
+    top_indices = np.argsort(np.abs(shap_contribs), axis=1)[:, -top_n:][:, ::-1]
+
+    values = X.to_numpy()
+    columns = X.columns
+    return [
+        {columns[i]: float(values[row, i]) for i in top_indices[row]}
+        for row in range(len(X))
+    ]
+
+
+def predict(
+    model: Any,
+    X: pd.DataFrame,
+    engine: Optional[CompiledForest] = None,
+    explainer: Any = None
+) -> Tuple[int, Dict[str, float], float]:
     """
     Make prediction and extract top influential features (if positive).
 
     Args:
         model (Any): Trained model.
         X (pd.DataFrame): Feature DataFrame with a single sample.
+        engine (CompiledForest, optional): Compiled forest built from ``model``.
+            When given, class and probability come from one vectorized pass.
+        explainer (Any, optional): Prebuilt SHAP explainer for ``model``, or a
+            zero-argument callable returning one, called only if the
+            prediction is positive. Built on the fly if omitted.
 
     Returns:
         Tuple containing:
-            - pd.Series: Prediction result.
+            - int: Predicted class.
             - dict: Top influencing features for positive prediction.
             - float: Confidence score (probability for class 1).
     """
     logger.info("Making predictions.")
-    preds = model.predict(X)
+    with time_stage("predict"):
+        if engine is not None:
+            preds, proba = engine.predict_with_proba(X)
+        else:
+            proba = model.predict_proba(X)
+            preds = model.classes_.take(np.argmax(proba, axis=1), axis=0)
     pred_int = int(preds[0])
 
-    pred_score = model.predict_proba(X)[0][pred_int]
+    pred_score = proba[0][pred_int]
 
     top_factors = {}
 
     try:
-
         if pred_int == 1:
-            explainer = shap.TreeExplainer(model)
-            shap_values = explainer.shap_values(X)
-            # shap_values is a list: one array per class
-            shap_contribs = shap_values[0][:, 1]  
-
-            # Get top 3 absolute contributors
-            top_indices = np.argsort(np.abs(shap_contribs))[-3:][::-1]
-            top_indices = top_indices.flatten()  # Ensure it's a 1D array
-
-            top_features = [X.columns[i] for i in top_indices]
-            top_values = [float(X.iloc[0, i]) for i in top_indices]
-            top_factors = dict(zip(top_features, top_values))
-            print(f"Top factors: {top_factors}")
-
-
+            with time_stage("explain"):
+                explainer = _resolve_explainer(model, explainer)
+                top_factors = explain_top_factors(explainer, X.iloc[:1])[0]
+            logger.debug(f"Top factors: {top_factors}")
     except Exception as e:
         logger.error(
             "Feature importance extraction failed: %s", e, exc_info=True
         )
 
-    # return pd.Series(preds, name="Prediction"), top_factors, prediction_percent
-    return pred_int, top_factors, pred_score
\ No newline at end of file
+    return pred_int, top_factors, pred_score
+
+
+def predict_batch(
+    model: Any,
+    X: pd.DataFrame,
+    engine: Optional[CompiledForest] = None,
+    explainer: Any = None,
+    include_factors: bool = False
+) -> Tuple[np.ndarray, np.ndarray, List[Dict[str, float]]]:
+    """
+    Score many rows at once, optionally explaining the positive ones.
+
+    Per row, the results match what ``predict`` returns for that row alone.
+
+    Args:
+        model (Any): Trained model.
+        X (pd.DataFrame): Feature DataFrame with one row per patient.
+        engine (CompiledForest, optional): Compiled forest built from ``model``.
+        explainer (Any, optional): Prebuilt SHAP explainer for ``model``, or a
+            zero-argument callable returning one, called only if some row
+            needs explaining.
+        include_factors (bool): Compute top factors for positive rows.
+
+    Returns:
+        Tuple containing:
+            - np.ndarray: Predicted class per row.
+            - np.ndarray: Confidence score per row (probability of the predicted class).
+            - list: Top influencing features per row (empty dict for negatives).
+    """
+    with time_stage("predict"):
+        if engine is not None:
+            preds, proba = engine.predict_with_proba(X)
+        else:
+            proba = model.predict_proba(X)
+            preds = model.classes_.take(np.argmax(proba, axis=1), axis=0)
+    preds = preds.astype(int)
+    scores = proba[np.arange(len(preds)), preds]
+
+    top_factors: List[Dict[str, float]] = [{} for _ in range(len(preds))]
+    if include_factors:
+        positive = np.flatnonzero(preds == 1)
+        if len(positive):
+            try:
+                with time_stage("explain"):
+                    explainer = _resolve_explainer(model, explainer)
+                    for row, factors in zip(positive, explain_top_factors(explainer, X.iloc[positive])):
+                        top_factors[row] = factors
+            except Exception as e:
+                logger.error(
+                    "Feature importance extraction failed: %s", e, exc_info=True
+                )
+
+    return preds, scores, top_factors
@@ -0,0 +1,35 @@
+import os
+import sys
+import warnings
+
+import joblib
+import pandas as pd
+import pytest
+
+# The API imports its packages relative to backend/, as when run from there.
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+REPO_ROOT = os.path.abspath(os.path.join(BACKEND_DIR, ".."))
+MODEL_PATH = os.path.join(REPO_ROOT, "saved_models", "model.joblib")
+DATASET_PATH = os.path.join(REPO_ROOT, "model_training", "dataset", "Healthcare-Diabetes.csv")
+
+
+@pytest.fixture(scope="session")
+def model():
+    with warnings.catch_warnings():
+        # The shipped model may come from another scikit-learn release
+        warnings.simplefilter("ignore")
+        return joblib.load(MODEL_PATH)
+
+
+@pytest.fixture(scope="session")
+def engine(model):
+    from services.inference import CompiledForest
+    return CompiledForest.from_model(model)
+
+
+@pytest.fixture(scope="session")
+def dataset(model):
+    return pd.read_csv(DATASET_PATH)[list(model.feature_names_in_)]
@@ -0,0 +1,69 @@
+import os
+import time
+from datetime import timedelta
+
+import pytest
+
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from jose import JWTError  # noqa: E402
+
+from auth import auth  # noqa: E402
+from services import cache  # noqa: E402
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Count full JWT verifications; the token cache's clock is advanced by the test."""
+    auth._token_cache.clear()
+    calls = []
+    real_decode = auth.jwt.decode
+
+    def counting(*args, **kwargs):
+        calls.append(args[0])
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting)
+    now = [time.monotonic()]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    yield calls, now
+    auth._token_cache.clear()
+
+
+def test_cached_claims_expire_at_the_token_exp(decodes):
+    calls, now = decodes
+    token = auth.create_access_token({"sub": "alice"}, timedelta(seconds=10))
+
+    assert auth._verify_token(token)["sub"] == "alice"
+    assert auth._verify_token(token)["sub"] == "alice"
+    assert len(calls) == 1
+
+    # exp is about 10 s away (whole seconds), well under TOKEN_CACHE_TTL
+    now[0] += 8
+    auth._verify_token(token)
+    assert len(calls) == 1
+    now[0] += 3
+    auth._verify_token(token)
+    assert len(calls) == 2
+
+
+def test_cached_claims_never_outlive_the_cache_ttl(decodes, monkeypatch):
+    calls, now = decodes
+    monkeypatch.setattr(auth, "TOKEN_CACHE_TTL", 5.0)
+    token = auth.create_access_token({"sub": "alice"}, timedelta(hours=1))
+    auth._verify_token(token)
+    now[0] += 5
+    auth._verify_token(token)
+    assert len(calls) == 2
+
+
+def test_expired_token_is_rejected_and_not_cached(decodes):
+    calls, _ = decodes
+    token = auth.create_access_token({"sub": "alice"}, timedelta(seconds=-1))
+    for _ in range(2):
+        with pytest.raises(JWTError):
+            auth._verify_token(token)
+    assert len(calls) == 2
+    assert auth._token_cache.stats()["size"] == 0
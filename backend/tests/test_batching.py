@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import pytest
+
+from services import batching
+from services.batching import MicroBatcher
+from services.executor import BoundedPool
+
+
+@pytest.fixture
+def cpu_pool(monkeypatch):
+    pool = BoundedPool("cpu", "thread", workers=2, queue_limit=8)
+    monkeypatch.setitem(batching.pools, "cpu", pool)
+    yield pool
+    pool.shutdown()
+
+
+def test_full_batches_are_scored_concurrently(monkeypatch, cpu_pool):
+    # Each batch waits at the barrier until the other one arrives, so the
+    # test only passes if two batches are inside _score at the same time.
+    barrier = threading.Barrier(2, timeout=5)
+    batch_sizes = []
+
+    def score(bundle, rows):
+        batch_sizes.append(len(rows))
+        barrier.wait()
+        return [(row["id"] % 2, {"id": row["id"]}, row["id"] / 100) for row in rows]
+
+    monkeypatch.setattr(MicroBatcher, "_score", staticmethod(score))
+
+    async def main():
+        batcher = MicroBatcher(max_batch_size=4, max_wait_ms=1000, max_concurrency=2)
+        batcher.start()
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(*(batcher.submit({"id": i}, bundle="v1") for i in range(8))), 10
+            )
+        finally:
+            await batcher.stop()
+        return batcher, results
+
+    batcher, results = asyncio.run(main())
+
+    assert batch_sizes == [4, 4]
+    assert batcher.batches == 2 and batcher.rows == 8
+    assert results == [(i % 2, {"id": i}, i / 100) for i in range(8)]
+
+
+def test_stop_fails_batches_still_being_scored(monkeypatch, cpu_pool):
+    started = threading.Event()
+    release = threading.Event()
+
+    def score(bundle, rows):
+        started.set()
+        release.wait(5)
+        return [(0, {}, 0.0) for _ in rows]
+
+    monkeypatch.setattr(MicroBatcher, "_score", staticmethod(score))
+
+    async def main():
+        batcher = MicroBatcher(max_batch_size=1, max_wait_ms=0, max_concurrency=1)
+        batcher.start()
+        pending = asyncio.ensure_future(batcher.submit({"id": 0}, bundle="v1"))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        await batcher.stop()
+        release.set()
+        with pytest.raises(RuntimeError, match="stopped"):
+            await pending
+
+    asyncio.run(main())
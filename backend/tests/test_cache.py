@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+from services import cache
+from services.cache import ExtractionCache, LRUCache, PredictionCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the caches' monotonic clock with one the test advances."""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1  # "b" is now the least recently used
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1 and lru.get("c") == 3
+    assert lru.stats()["evictions"] == 1
+
+
+def test_lru_entries_expire_after_ttl(clock):
+    lru = LRUCache(maxsize=10, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2, ttl=5)
+    clock[0] += 5
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    clock[0] += 55
+    assert lru.get("a") is None
+    assert len(lru) == 0
+    assert lru.stats()["hits"] == 1 and lru.stats()["misses"] == 2
+
+
+RESULT = ({"Glucose": 120.0, "Age": 40}, {"Glucose": 1, "Age": 2})
+
+
+def test_extraction_cache_returns_copies_and_keys_on_version(tmp_path):
+    extraction = ExtractionCache("v1", disk_dir=str(tmp_path))
+    extraction.set("d1", RESULT)
+    data, pages = extraction.get("d1")
+    data["Glucose"] = 0.0
+    assert extraction.get("d1") == RESULT
+
+    # Changing the pattern version invalidates both tiers
+    assert ExtractionCache("v2", disk_dir=str(tmp_path)).get("d1") is None
+
+
+def test_extraction_cache_disk_tier_survives_restart(tmp_path):
+    ExtractionCache("v1", disk_dir=str(tmp_path)).set("d1", RESULT)
+    restarted = ExtractionCache("v1", disk_dir=str(tmp_path))
+    assert restarted.get("d1") == RESULT
+    assert restarted.stats()["disk"]["hits"] == 1
+
+
+def test_extraction_cache_trims_disk_tier_lru_first(tmp_path):
+    extraction = ExtractionCache("v1", disk_dir=str(tmp_path))
+    entry_size = len(json.dumps({"data": RESULT[0], "source_pages": RESULT[1]}).encode())
+    extraction.disk_max_bytes = 2 * entry_size
+
+    for mtime, digest in enumerate(["d1", "d2"], start=1):
+        extraction.set(digest, RESULT)
+        os.utime(extraction._path(extraction.key(digest)), (mtime, mtime))
+    # Reading "d1" from disk marks it as recently used
+    extraction.memory.clear()
+    assert extraction.get("d1") == RESULT
+
+    extraction.set("d3", RESULT)
+    names = sorted(os.listdir(tmp_path))
+    assert names == ["v1-d1.json", "v1-d3.json"]
+    assert extraction.stats()["disk"]["evictions"] == 1
+    assert extraction.stats()["disk"]["bytes"] <= extraction.disk_max_bytes
+
+
+FEATURES = {"Pregnancies": 1, "Glucose": 120.0, "Age": 40}
+
+
+def test_prediction_cache_keys_on_features_and_model(clock):
+    predictions = PredictionCache(["Pregnancies", "Glucose", "Age"], maxsize=10, ttl=60)
+    predictions.set("model-a", FEATURES, (1, {"Glucose": 120.0}, 0.8))
+
+    cached = predictions.get("model-a", dict(FEATURES))
+    assert cached == (1, {"Glucose": 120.0}, 0.8)
+    cached[1]["Glucose"] = 0.0
+    assert predictions.get("model-a", FEATURES)[1] == {"Glucose": 120.0}
+
+    # Another model version or feature vector misses
+    assert predictions.get("model-b", FEATURES) is None
+    assert predictions.get("model-a", {**FEATURES, "Age": 41}) is None
+
+    clock[0] += 60
+    assert predictions.get("model-a", FEATURES) is None
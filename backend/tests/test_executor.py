@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.executor import BoundedPool, PoolOverloaded
+
+
+@pytest.fixture
+def pool():
+    pool = BoundedPool("test", "thread", workers=2, queue_limit=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_blocking_work_leaves_the_event_loop_free(pool):
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        result = await pool.run(lambda: time.sleep(0.3) or "done")
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(main())
+    assert result == "done"
+    assert ticks >= 10
+
+
+def test_rejects_work_beyond_capacity(pool):
+    release = threading.Event()
+
+    async def main():
+        running = [asyncio.ensure_future(pool.run(release.wait, 5)) for _ in range(pool.capacity)]
+        await asyncio.sleep(0.05)
+        assert pool.in_flight == pool.capacity
+        with pytest.raises(PoolOverloaded):
+            await pool.run(release.wait, 5)
+        release.set()
+        await asyncio.gather(*running)
+
+    asyncio.run(main())
+    assert pool.rejected == 1
+    assert pool.in_flight == 0
@@ -0,0 +1,41 @@
+import pytest
+
+from services import registry
+from services.registry import ModelBundle
+from services.utils import predict
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    calls = []
+    real = registry.build_explainer
+
+    def counting(model):
+        calls.append(model)
+        return real(model)
+
+    monkeypatch.setattr(registry, "build_explainer", counting)
+    return calls
+
+
+def test_explainer_is_built_once_per_bundle(model, engine, dataset, builds):
+    bundle = ModelBundle("v1", "fp", model=model, engine=engine)
+    proba = engine.predict_proba(dataset)[:, 1]
+    negatives = dataset[proba < 0.5].iloc[:5]
+    positives = dataset[proba >= 0.5].iloc[:5]
+
+    for i in range(len(negatives)):
+        predict(bundle.model, negatives.iloc[[i]], bundle.engine, bundle.get_explainer)
+    assert builds == []
+
+    results = [
+        predict(bundle.model, positives.iloc[[i]], bundle.engine, bundle.get_explainer)
+        for i in range(len(positives))
+    ]
+    assert len(builds) == 1
+    assert bundle.get_explainer() is bundle.get_explainer()
+
+    # Same factors as an explainer built on the fly for each request
+    for i, (pred, factors, _) in enumerate(results):
+        assert pred == 1 and len(factors) == 3
+        assert factors == predict(model, positives.iloc[[i]], engine)[1]
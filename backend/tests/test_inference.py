@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.inference import CompiledForest
+
+FOREST_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "saved_models", "model.forest"
+)
+
+
+def assert_same_scores(model, engine, X):
+    np.testing.assert_array_equal(engine.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(engine.predict(X), model.predict(X))
+
+
+def test_matches_sklearn_on_dataset(model, engine, dataset):
+    assert_same_scores(model, engine, dataset)
+
+
+def test_matches_sklearn_on_random_rows(model, engine, dataset):
+    rng = np.random.default_rng(0)
+    low, high = dataset.min().to_numpy(), dataset.max().to_numpy()
+    span = high - low
+    rows = rng.uniform(low - 0.1 * span, high + 0.1 * span, size=(5000, len(low)))
+    assert_same_scores(model, engine, pd.DataFrame(rows, columns=dataset.columns))
+
+
+def test_matches_sklearn_at_split_thresholds(model, engine, dataset):
+    # Values exactly at, and one float32 step either side of, real split points
+    rng = np.random.default_rng(1)
+    rows = []
+    for estimator in model.estimators_[:10]:
+        tree = estimator.tree_
+        for node in np.flatnonzero(tree.children_left != -1):
+            threshold = tree.threshold[node]
+            for value in (
+                threshold,
+                np.float32(threshold),
+                np.nextafter(np.float32(threshold), np.float32(-np.inf)),
+                np.nextafter(np.float32(threshold), np.float32(np.inf)),
+            ):
+                row = np.array(dataset.iloc[rng.integers(len(dataset))], dtype=np.float64)
+                row[tree.feature[node]] = value
+                rows.append(row)
+    X = pd.DataFrame(rows, columns=dataset.columns)
+    assert_same_scores(model, engine, X)
+
+
+@pytest.mark.skipif(not os.path.exists(FOREST_PATH), reason="no exported forest artifact")
+def test_memory_mapped_artifact_matches_compiled(engine, dataset):
+    loaded = CompiledForest.load(FOREST_PATH)
+    np.testing.assert_array_equal(loaded.predict_proba(dataset), engine.predict_proba(dataset))
+
+
+@pytest.mark.parametrize("value", [np.nan, np.inf, -np.inf, 1e39])
+def test_rejects_non_finite_values(model, engine, dataset, value):
+    X = dataset.iloc[:3].astype(np.float64)
+    X.iloc[1, 1] = value
+    with pytest.raises(ValueError, match="Input X contains"):
+        engine.predict_proba(X)
+    if not np.isnan(value):
+        # scikit-learn rejects these too; NaN it routes by its missing-value rules
+        with pytest.raises(ValueError):
+            model.predict_proba(X)
@@ -0,0 +1,75 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services import metrics
+from services.metrics import Counter, Histogram, RequestMetricsMiddleware, time_stage
+
+
+def sample(text, line_prefix, default=None):
+    """Value of the exposition line starting with ``line_prefix``."""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.split()[-1])
+    if default is None:
+        raise AssertionError(f"No sample {line_prefix!r} in:\n{text}")
+    return default
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "predict")
+    text = "\n".join(histogram.render())
+
+    assert "# TYPE diabetes_api_demo_seconds histogram" in text
+    assert sample(text, 'diabetes_api_demo_seconds_bucket{stage="predict",le="0.1"}') == 2
+    assert sample(text, 'diabetes_api_demo_seconds_bucket{stage="predict",le="1"}') == 3
+    assert sample(text, 'diabetes_api_demo_seconds_bucket{stage="predict",le="+Inf"}') == 4
+    assert sample(text, 'diabetes_api_demo_seconds_count{stage="predict"}') == 4
+    assert sample(text, 'diabetes_api_demo_seconds_sum{stage="predict"}') == pytest.approx(3.65)
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("demo_total", "Demo.", ("route",))
+    counter.inc('/a"b')
+    counter.inc('/a"b', amount=2)
+    assert counter.render()[-1] == 'diabetes_api_demo_total{route="/a\\"b"} 3'
+
+
+def test_time_stage_records_duration_and_errors():
+    def counts():
+        text = metrics.render()
+        return (
+            sample(text, 'diabetes_api_stage_duration_seconds_count{stage="test_stage"}', default=0),
+            sample(text, 'diabetes_api_stage_errors_total{stage="test_stage"}', default=0),
+        )
+
+    before = counts()
+    with time_stage("test_stage"):
+        pass
+    with pytest.raises(ValueError):
+        with time_stage("test_stage"):
+            raise ValueError("boom")
+    after = counts()
+    assert (after[0] - before[0], after[1] - before[1]) == (2, 1)
+
+
+def test_requests_are_labelled_by_route_template():
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    label = 'diabetes_api_http_request_duration_seconds_count{route="/items/{item_id}",method="GET",status="200"}'
+    before = sample(metrics.render(), label, default=0)
+    with TestClient(app) as client:
+        for item_id in range(3):
+            assert client.get(f"/items/{item_id}").status_code == 200
+        assert client.get("/missing").status_code == 404
+    text = metrics.render()
+    assert sample(text, label) == before + 3
+    assert 'route="/items/0"' not in text
+    assert 'route="unmatched",method="GET",status="404"' in text
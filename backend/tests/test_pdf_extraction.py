@@ -0,0 +1,70 @@
+import pytest
+
+from services import utils
+from services.utils import extract_medical_data_with_pages
+
+
+class FakePage:
+    def __init__(self, text, parsed):
+        self.text = text
+        self.parsed = parsed
+
+    def extract_text(self):
+        self.parsed.append(self.text)
+        return self.text
+
+
+class FakePdf:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def pdf_pages(monkeypatch):
+    """Serve the given page texts through a stand-in for pdfplumber; returns the pages parsed."""
+    parsed = []
+
+    def install(*texts):
+        pages = [FakePage(text, parsed) for text in texts]
+        fake = type("pdfplumber", (), {"open": staticmethod(lambda source: FakePdf(pages))})
+        monkeypatch.setattr(utils, "lazy_import", lambda name: fake)
+        return parsed
+
+    return install
+
+
+FIRST_PAGE = (
+    "Lab Report  Date: 12-03-2024\n"
+    "Pregnancies 6\n"
+    "Glucose (mg/dL) 148\n"
+    "Blood Pressure (mm Hg) 72\n"
+    "Skin Thickness (mm) 35\n"
+    "Insulin (mu U/ml) 0\n"
+    "BMI (kg/m2) 33.6\n"
+    "Diabetes Pedigree Function"
+)
+
+
+def test_field_split_across_page_break_is_found(pdf_pages):
+    parsed = pdf_pages(FIRST_PAGE, "0.627\nAge (years) 50", "Notes")
+    data, source_pages = extract_medical_data_with_pages("report.pdf")
+
+    assert data["DiabetesPedigreeFunction"] == 0.627
+    assert source_pages["DiabetesPedigreeFunction"] == 2
+    assert data["Age"] == 50 and source_pages["Age"] == 2
+    assert data["Glucose"] == 148.0 and source_pages["Glucose"] == 1
+    # Every field was found on page 2, so page 3 is never parsed
+    assert len(parsed) == 2
+
+
+def test_missing_fields_are_none(pdf_pages):
+    pdf_pages("Glucose (mg/dL) 120", "")
+    data, source_pages = extract_medical_data_with_pages("report.pdf")
+    assert data["Glucose"] == 120.0
+    assert data["Age"] is None and "Age" not in source_pages
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+from types import SimpleNamespace
+
+import joblib
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from services import registry as registry_module
+from services.registry import ModelRegistry, RegistryError, activate_model
+from services.utils import FEATURE_COLUMNS
+
+
+def register(root, version, model):
+    """Write a registry version the way model_training's register_model lays it out."""
+    directory = os.path.join(root, version)
+    os.makedirs(directory)
+    path = os.path.join(directory, "model.joblib")
+    joblib.dump(model, path)
+    with open(path, "rb") as f:
+        checksum = hashlib.sha256(f.read()).hexdigest()
+    metadata = {
+        "version": version,
+        "created_at": version,
+        "feature_order": FEATURE_COLUMNS,
+        "checksums": {"model.joblib": checksum},
+        "fingerprint": checksum[:16],
+    }
+    with open(os.path.join(directory, "metadata.json"), "w") as f:
+        json.dump(metadata, f)
+    return path
+
+
+@pytest.fixture
+def registry(tmp_path, dataset, monkeypatch):
+    X = dataset[FEATURE_COLUMNS].iloc[:300]
+    y = (X["Glucose"] > 125).astype(int)
+    root = str(tmp_path / "registry")
+    register(root, "v1", RandomForestClassifier(n_estimators=5, random_state=1).fit(X, y))
+    register(root, "v2", RandomForestClassifier(n_estimators=5, random_state=2).fit(X, y))
+    test_registry = ModelRegistry(root)
+    monkeypatch.setattr(registry_module, "registry", test_registry)
+    return test_registry
+
+
+def test_checksum_mismatch_keeps_the_old_version_serving(registry, dataset):
+    state = SimpleNamespace()
+    serving = activate_model(state, "v1")
+    assert state.bundle is serving and registry.active_version() == "v1"
+
+    with open(os.path.join(registry.root, "v2", "model.joblib"), "ab") as f:
+        f.write(b"tampered")
+    with pytest.raises(RegistryError, match="Checksum mismatch"):
+        activate_model(state, "v2")
+
+    assert state.bundle is serving
+    assert registry.active_version() == "v1"
+    X = dataset[FEATURE_COLUMNS].iloc[:5]
+    assert len(state.bundle.get_model().predict(X)) == 5
+
+
+def test_activates_a_verified_version(registry):
+    state = SimpleNamespace()
+    activate_model(state, "v1")
+    bundle = activate_model(state, "v2")
+    assert state.bundle is bundle and bundle.version == "v2"
+    assert registry.active_version() == "v2"
@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+from services import cache, sessions
+from services.sessions import MemorySessionStore, SessionStore, SQLiteSessionStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Drive both stores' clocks (wall time for SQLite, monotonic for memory) from the test."""
+    now = [1000.0]
+    monkeypatch.setattr(sessions.time, "time", lambda: now[0])
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl=60, max_entries=3, prune_every=1)
+    else:
+        store = MemorySessionStore(ttl=60, max_entries=3)
+    yield store
+    store.close()
+
+
+def test_values_round_trip_as_copies(store):
+    store.set("latest:alice", {"Glucose": 120.0, "Age": 40})
+    value = store.get("latest:alice")
+    value["Glucose"] = 0.0
+    assert store.get("latest:alice") == {"Glucose": 120.0, "Age": 40}
+    store.delete("latest:alice")
+    assert store.get("latest:alice") is None
+
+
+def test_entries_expire_after_ttl_since_last_write(store, clock):
+    store.set("a", {"v": 1})
+    clock[0] += 50
+    store.set("a", {"v": 2})
+    clock[0] += 50
+    assert store.get("a") == {"v": 2}
+    clock[0] += 10
+    assert store.get("a") is None
+
+
+def test_least_recently_used_entries_are_evicted(store, clock):
+    for key in ("a", "b", "c"):
+        clock[0] += 1
+        store.set(key, {"key": key})
+    clock[0] += 1
+    assert store.get("a") == {"key": "a"}  # "b" is now the least recently used
+    clock[0] += 1
+    store.set("d", {"key": "d"})
+
+    assert store.get("b") is None
+    assert [store.get(key) is not None for key in ("a", "c", "d")] == [True, True, True]
+    assert store.stats()["size"] == 3
+
+
+def test_sqlite_close_closes_every_thread_connection(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    worker = threading.Thread(target=store.set, args=("a", {"v": 1}))
+    worker.start()
+    worker.join()
+    connections = list(store._conns)
+    assert len(connections) == 2
+
+    store.close()
+    for conn in connections:
+        with pytest.raises(Exception, match="closed"):
+            conn.execute("SELECT 1")
+    # The store reconnects if used again
+    assert store.get("a") == {"v": 1}
+    store.close()
+
+
+def test_session_store_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
@@ -0,0 +1,98 @@
+from datetime import date
+
+import pytest
+
+from db.memory import InMemoryBackend
+from db.sqlite import SQLiteBackend
+from db.storage import (
+    InvalidQuery, StorageBackend, get_storage, query_patient_data, set_storage,
+    upload_patient_data_to_firebase, write_patient_records
+)
+
+
+def record(username, prediction_class, score=0.5):
+    return {"username": username, "prediction_class": prediction_class, "score": score, "glucose": 120.0}
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def storage(request, tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "predictions.db")) if request.param == "sqlite" else InMemoryBackend()
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def active(storage):
+    """Make ``storage`` the process-wide backend for the module-level helpers."""
+    set_storage(storage)
+    yield storage
+    set_storage(None)
+
+
+def test_write_batch_and_read_back_per_user(storage):
+    storage.write_batch([
+        ("alice", "20240102_000000_000000", record("alice", 1)),
+        ("bob", "20240101_000000_000000", record("bob", 0)),
+        ("alice", "20240101_000000_000000", record("alice", 0)),
+    ])
+    assert [r["prediction_class"] for r in storage.get_predictions("alice")] == [0, 1]
+    assert [r["username"] for r in storage.get_predictions("bob")] == ["bob"]
+    assert storage.get_predictions("carol") == []
+
+
+def test_helpers_write_through_the_active_backend(active):
+    write_patient_records([("alice", "20240101_000000_000000", record("alice", 1))])
+    upload_patient_data_to_firebase("alice", {"Glucose": 150.0, "prediction": 0, "score": 0.9})
+    assert get_storage() is active
+    assert [r["prediction_class"] for r in active.get_predictions("alice")] == [1, 0]
+
+
+def test_storage_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend()
+
+
+# Two records a day from 1 to 5 March, alternating prediction class
+HISTORY = [
+    ("alice", f"202403{day:02d}_{hour:02d}0000_000000", record("alice", (day + hour) % 2, score=day + hour / 100))
+    for day in range(1, 6) for hour in (9, 10)
+]
+
+
+def pages(**query):
+    """Follow ``next_cursor`` from the first page to the last, returning every page's scores."""
+    result, cursor = [], None
+    while True:
+        page = query_patient_data("alice", cursor=cursor, **query)
+        result.append([r["score"] for r in page["predictions"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return result
+
+
+def test_cursor_pages_cover_every_record_once(active):
+    active.write_batch(HISTORY)
+    scores = [r["score"] for _, _, r in HISTORY]
+    assert pages(limit=4) == [scores[0:4], scores[4:8], scores[8:10]]
+    assert pages(limit=4, descending=True) == [scores[::-1][0:4], scores[::-1][4:8], scores[::-1][8:10]]
+    assert pages(limit=5) == [scores[0:5], scores[5:10]]
+    assert pages() == [scores]
+
+
+def test_date_and_class_filters(active):
+    active.write_batch(HISTORY)
+    in_range = pages(limit=3, start_date=date(2024, 3, 2), end_date=date(2024, 3, 3))
+    assert in_range == [[2.09, 2.1, 3.09], [3.1]]
+    positives = pages(limit=2, prediction_class=1)
+    assert positives == [[1.1, 2.09], [3.1, 4.09], [5.1]]
+    assert pages(start_date=date(2024, 3, 6)) == [[]]
+
+
+def test_field_projection_and_invalid_queries(active):
+    active.write_batch(HISTORY[:1])
+    page = query_patient_data("alice", fields=["score", "prediction_class"])
+    assert page["predictions"] == [{"score": 1.09, "prediction_class": 0}]
+    with pytest.raises(InvalidQuery):
+        query_patient_data("alice", fields=["password"])
+    with pytest.raises(InvalidQuery):
+        query_patient_data("alice", cursor="not a cursor!")
@@ -0,0 +1,61 @@
+import threading
+
+from db.write_behind import WriteBehindQueue
+
+DATA = {"prediction_class": 1, "score": 0.8}
+
+
+def test_close_drains_queued_records():
+    committed = []
+    writer = WriteBehindQueue(committed.append, batch_size=10, flush_interval=60)
+    writer.start()
+    for i in range(25):
+        assert writer.submit(f"user{i}", DATA)
+    writer.close(timeout=5)
+
+    assert [len(batch) for batch in committed] == [10, 10, 5]
+    assert [username for batch in committed for username, _, _ in batch] == [f"user{i}" for i in range(25)]
+    assert writer.committed == 25 and writer.dropped == 0
+    assert not writer.submit("late", DATA)
+
+
+def test_failed_commit_is_retried():
+    attempts = []
+
+    def flaky(batch):
+        attempts.append(len(batch))
+        if len(attempts) < 3:
+            raise ConnectionError("storage unavailable")
+
+    writer = WriteBehindQueue(flaky, batch_size=5, flush_interval=0, max_retries=5, backoff_base=0.001)
+    writer.start()
+    writer.submit("alice", DATA)
+    writer.flush()
+    writer.close(timeout=5)
+
+    assert attempts == [1, 1, 1]
+    assert writer.retries == 2 and writer.committed == 1 and writer.dropped == 0
+
+
+def test_batch_is_dropped_after_max_retries():
+    def failing(batch):
+        raise ConnectionError("storage unavailable")
+
+    writer = WriteBehindQueue(failing, batch_size=5, flush_interval=0, max_retries=2, backoff_base=0.001)
+    writer.start()
+    writer.submit("alice", DATA)
+    writer.close(timeout=5)
+    assert writer.retries == 2 and writer.dropped == 1 and writer.committed == 0
+
+
+def test_close_does_not_block_on_a_full_queue():
+    release = threading.Event()
+    writer = WriteBehindQueue(lambda batch: release.wait(5), batch_size=1, flush_interval=0, max_queue=2)
+    writer.start()
+    while writer.submit("alice", DATA):
+        pass
+    closer = threading.Thread(target=writer.close, kwargs={"timeout": 0.2})
+    closer.start()
+    closer.join(2)
+    assert not closer.is_alive()
+    release.set()
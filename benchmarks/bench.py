@@ -0,0 +1,413 @@
+"""
+Offline benchmark suite for the prediction API.
+
+Measures the request path piece by piece (feature preparation, prediction
+with and without SHAP, PDF extraction at several page counts, JWT
+verification) and end to end through the FastAPI app, with prediction
+storage replaced by the in-memory backend. Nothing touches the network.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench                          # run, write results JSON
+    python -m benchmarks.bench --save-baseline          # also store as the baseline
+    python -m benchmarks.bench --compare                # flag regressions vs. the baseline
+    python -m benchmarks.bench --compare old.json --only extract
+"""
+import argparse
+import fnmatch
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.pdfgen import NEGATIVE_CASE, POSITIVE_CASE, make_report_pdf
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+# ------------------ Config ------------------
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BACKEND_DIR = os.path.join(REPO_ROOT, "backend")
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+PDF_PAGE_COUNTS = [1, 5, 20]
+RESULTS_FORMAT_VERSION = 1
+BENCH_USER = "bench"
+BENCH_PASSWORD = "bench"
+
+
+def backend_environment(workdir: str, users: Dict[str, str]) -> Dict[str, str]:
+    """
+    Environment for an API instance running on throwaway local state.
+
+    Storage is the in-memory backend, users come from a file generated in
+    ``workdir`` and the registry directory is empty, so the API serves the
+    shipped ``saved_models/model.joblib``.
+
+    Args:
+        workdir (str): Directory for the users file and the empty registry.
+        users (Dict[str, str]): Username -> password.
+
+    Returns:
+        Dict[str, str]: Variables to set; they take precedence over a
+        developer's ``.env``.
+    """
+    users_file = os.path.join(workdir, "users.json")
+    with open(users_file, "w") as f:
+        json.dump({name: {"username": name, "password": password} for name, password in users.items()}, f)
+    return {
+        "SECRET_KEY": "benchmark-only-secret",
+        "ALGORITHM": "HS256",
+        "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+        "STORAGE_BACKEND": "memory",
+        "SESSION_BACKEND": "memory",
+        "USERS_FILE": users_file,
+        "MODEL_REGISTRY_DIR": os.path.join(workdir, "registry"),
+        "MODEL_WATCH_INTERVAL": "0",
+        "STARTUP_WARMUP": "sync",
+    }
+
+
+def _configure_backend(workdir: str) -> None:
+    """Point the in-process API at throwaway local state before any backend module is imported."""
+    os.environ.update(backend_environment(workdir, {BENCH_USER: BENCH_PASSWORD}))
+    os.environ.pop("EXTRACTION_CACHE_DIR", None)
+    # The API resolves saved_models/ relative to the working directory.
+    os.chdir(REPO_ROOT)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def measure(
+    fn: Callable[[int], Any],
+    iterations: int,
+    warmup: int = 3
+) -> Dict[str, float]:
+    """
+    Time repeated calls of ``fn`` and summarise the latency distribution.
+
+    Args:
+        fn (Callable[[int], Any]): Called with the iteration number, so it
+            can vary its input (warm-up calls get negative numbers).
+        iterations (int): Timed calls.
+        warmup (int): Untimed calls made first.
+
+    Returns:
+        Dict[str, float]: ``n`` and the mean, standard deviation, min, max,
+        p50, p95 and p99 latency in milliseconds.
+    """
+    for i in range(warmup):
+        fn(-1 - i)
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter_ns()
+        fn(i)
+        samples.append((time.perf_counter_ns() - started) / 1e6)
+    return summarize(samples)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency statistics (milliseconds) of a list of samples."""
+    values = np.asarray(samples, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "n": int(len(values)),
+        "mean_ms": float(values.mean()),
+        "stdev_ms": float(statistics.stdev(samples)) if len(samples) > 1 else 0.0,
+        "min_ms": float(values.min()),
+        "max_ms": float(values.max()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+    }
+
+
+def _case_values(i: int, positive: bool) -> Dict[str, float]:
+    """A case varied by iteration so API caches never serve a repeat."""
+    values = dict(POSITIVE_CASE if positive else NEGATIVE_CASE)
+    values["DiabetesPedigreeFunction"] = round(values["DiabetesPedigreeFunction"] + (i % 997 + 1) * 1e-3, 3)
+    return values
+
+
+def bench_components(iterations: int, selected: Callable[[str], bool]) -> Dict[str, Dict[str, float]]:
+    """Benchmarks that call backend functions directly, in-process."""
+    import pandas as pd
+    from jose import jwt
+
+    import main
+    from auth import auth
+    from services.utils import extract_medical_data_from_bytes, predict, prepare_features
+
+    results: Dict[str, Dict[str, float]] = {}
+    bundle = main.app.state.bundle
+    if bundle is None:
+        raise RuntimeError("The API could not load a model; see the log above.")
+    bundle.warm_up()
+
+    raw = {
+        case: pd.DataFrame([{**values, "Id": 1, "Outcome": 0}])
+        for case, values in (("negative", NEGATIVE_CASE), ("positive", POSITIVE_CASE))
+    }
+    if selected("prepare_features"):
+        results["prepare_features"] = measure(lambda i: prepare_features(raw["negative"]), iterations * 10)
+
+    for case in ("negative", "positive"):
+        name = f"predict_{case}"
+        if not selected(name):
+            continue
+        X = prepare_features(raw[case])
+        prediction = predict(bundle.get_model(), X, bundle.engine, bundle.get_explainer)[0]
+        if prediction != (case == "positive"):
+            logger.warning(f"{name}: the model predicts {prediction} for this case.")
+        results[name] = measure(
+            lambda i, X=X: predict(bundle.get_model(), X, bundle.engine, bundle.get_explainer),
+            iterations
+        )
+
+    for n_pages in PDF_PAGE_COUNTS:
+        name = f"extract_pdf_{n_pages}p"
+        if not selected(name):
+            continue
+        contents = make_report_pdf(POSITIVE_CASE, n_pages)
+        results[name] = measure(
+            lambda i, contents=contents: extract_medical_data_from_bytes(contents),
+            max(5, iterations // max(1, n_pages // 5))
+        )
+        results[name]["pdf_bytes"] = len(contents)
+
+    token = auth.create_access_token({"sub": BENCH_USER})
+    if selected("jwt_decode"):
+        results["jwt_decode"] = measure(
+            lambda i: jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM]), iterations * 10
+        )
+    if selected("jwt_verify_cached"):
+        results["jwt_verify_cached"] = measure(lambda i: auth._verify_token(token), iterations * 10)
+    if selected("get_current_user"):
+        results["get_current_user"] = measure(lambda i: auth.get_current_user(token), iterations * 10)
+    return results
+
+
+def bench_end_to_end(iterations: int, selected: Callable[[str], bool]) -> Dict[str, Dict[str, float]]:
+    """Login -> extract -> predict through the FastAPI app, one step list per stage."""
+    from fastapi.testclient import TestClient
+
+    import main
+
+    steps = ("e2e_login", "e2e_extract", "e2e_predict", "e2e_flow")
+    if not any(selected(name) for name in steps):
+        return {}
+    samples: Dict[str, List[float]] = {name: [] for name in steps}
+    # Distinct PDFs so the extraction and prediction caches never hit.
+    pdfs = [
+        make_report_pdf(_case_values(i, positive=i % 2 == 0), n_pages=2)
+        for i in range(iterations + 2)
+    ]
+
+    with TestClient(main.app) as client:
+        def flow(i: int) -> None:
+            started = time.perf_counter_ns()
+            response = client.post("/login", data={"username": BENCH_USER, "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            logged_in = time.perf_counter_ns()
+
+            files = {"file": ("report.pdf", io.BytesIO(pdfs[i]), "application/pdf")}
+            client.post("/classical/extract-patient-data", files=files, headers=headers).raise_for_status()
+            extracted = time.perf_counter_ns()
+
+            client.get("/classical/predict", headers=headers).raise_for_status()
+            finished = time.perf_counter_ns()
+
+            if i >= 0:
+                samples["e2e_login"].append((logged_in - started) / 1e6)
+                samples["e2e_extract"].append((extracted - logged_in) / 1e6)
+                samples["e2e_predict"].append((finished - extracted) / 1e6)
+                samples["e2e_flow"].append((finished - started) / 1e6)
+
+        for i in range(2):
+            flow(-1 - i)
+        for i in range(iterations):
+            flow(i)
+
+    return {name: summarize(values) for name, values in samples.items() if selected(name)}
+
+
+def environment() -> Dict[str, Any]:
+    """Where the results were measured, for reading comparisons sensibly."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    versions = {}
+    for package in ("numpy", "pandas", "sklearn", "shap", "pdfplumber", "fastapi"):
+        module = sys.modules.get(package)
+        versions[package] = getattr(module, "__version__", None) if module else None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": versions,
+    }
+
+
+def run(iterations: int, only: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Run the suite and return the results document.
+
+    Args:
+        iterations (int): Base number of timed iterations per benchmark.
+        only (List[str], optional): Glob patterns; run only matching benchmarks.
+
+    Returns:
+        Dict[str, Any]: ``format``, ``created_at``, ``environment`` and
+        ``benchmarks`` (name -> latency statistics).
+    """
+    def selected(name: str) -> bool:
+        return not only or any(fnmatch.fnmatch(name, f"*{pattern}*") for pattern in only)
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        _configure_backend(workdir)
+        benchmarks = bench_components(iterations, selected)
+        benchmarks.update(bench_end_to_end(iterations, selected))
+    return {
+        "format": RESULTS_FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "iterations": iterations,
+        "environment": environment(),
+        "benchmarks": benchmarks,
+    }
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    metric: str = "p50_ms",
+    tolerance: float = 0.15,
+    min_delta_ms: float = 0.05
+) -> List[Dict[str, Any]]:
+    """
+    Compare two results documents benchmark by benchmark.
+
+    A benchmark regresses when its ``metric`` grew by more than
+    ``tolerance`` (relative) and by more than ``min_delta_ms`` (absolute,
+    so timer noise on microsecond benchmarks is not flagged).
+
+    Args:
+        current (Dict[str, Any]): Results of this run.
+        baseline (Dict[str, Any]): Stored results to compare against.
+        metric (str): Statistic to compare (default ``p50_ms``).
+        tolerance (float): Allowed relative slowdown (default 0.15).
+        min_delta_ms (float): Smallest absolute slowdown that counts.
+
+    Returns:
+        List[Dict[str, Any]]: One row per benchmark with ``status``
+        ``regression``, ``improved``, ``ok``, ``new`` or ``missing``.
+    """
+    rows = []
+    now, then = current["benchmarks"], baseline["benchmarks"]
+    for name in sorted(set(now) | set(then)):
+        if name not in then or name not in now:
+            rows.append({"name": name, "status": "new" if name in now else "missing"})
+            continue
+        before, after = then[name][metric], now[name][metric]
+        change = (after - before) / before if before else 0.0
+        status = "ok"
+        if change > tolerance and after - before > min_delta_ms:
+            status = "regression"
+        elif change < -tolerance and before - after > min_delta_ms:
+            status = "improved"
+        rows.append({"name": name, "baseline": before, "current": after, "change": change, "status": status})
+    return rows
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    print(f"{'benchmark':<22} {'n':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'mean ms':>10}")
+    for name, stats in results["benchmarks"].items():
+        print(
+            f"{name:<22} {stats['n']:>5} {stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} "
+            f"{stats['p99_ms']:>10.3f} {stats['mean_ms']:>10.3f}"
+        )
+
+
+def print_comparison(rows: List[Dict[str, Any]], metric: str) -> None:
+    print(f"\n{'benchmark':<22} {'baseline':>10} {'current':>10} {'change':>8}  status  ({metric})")
+    for row in rows:
+        if "change" not in row:
+            print(f"{row['name']:<22} {'':>10} {'':>10} {'':>8}  {row['status']}")
+            continue
+        flag = row["status"].upper() if row["status"] == "regression" else row["status"]
+        print(
+            f"{row['name']:<22} {row['baseline']:>10.3f} {row['current']:>10.3f} "
+            f"{row['change'] * 100:>+7.1f}%  {flag}"
+        )
+
+
+def _write_json(document: Dict[str, Any], path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the offline API benchmark suite.")
+    parser.add_argument("--iterations", type=int, default=50, help="base timed iterations per benchmark (default: 50)")
+    parser.add_argument("--only", nargs="+", metavar="PATTERN", help="run only benchmarks whose name contains PATTERN")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument(
+        "--compare", nargs="?", const=DEFAULT_BASELINE, metavar="BASELINE",
+        help="compare against a results file (default: benchmarks/baseline.json); exit 1 on regressions"
+    )
+    parser.add_argument(
+        "--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+        help="also store the results as the baseline (default: benchmarks/baseline.json)"
+    )
+    parser.add_argument("--metric", default="p50_ms", help="statistic compared (default: p50_ms)")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown (default: 0.15)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = run(args.iterations, args.only)
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json"
+    )
+    _write_json(results, output)
+    print_results(results)
+    print(f"\nResults written to {output}")
+    if args.save_baseline:
+        _write_json(results, args.save_baseline)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if baseline is None:
+        return 0
+    rows = compare(results, baseline, args.metric, args.tolerance)
+    if args.only:
+        rows = [row for row in rows if row["status"] != "missing"]
+    print_comparison(rows, args.metric)
+    regressions = [row["name"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
@@ -0,0 +1,480 @@
+"""
+Open-loop load generator for the prediction API.
+
+Virtual users arrive at a fixed average rate, whether or not earlier ones
+have finished, and each one runs a full session: ``/login``, upload of a
+synthetic lab report to ``/classical/extract-patient-data``,
+``/classical/predict`` for that report and a page of
+``/classical/get-patient-data``. Because arrivals do not wait for
+responses, a slow server shows up as growing latency and errors instead
+of a quietly lower request rate.
+
+Without ``--url`` a local instance is started with uvicorn on throwaway
+state (SQLite sessions and prediction storage in a temporary directory,
+generated accounts, the shipped model), so several ``--workers`` share it.
+
+Usage (from the repository root):
+
+    python -m benchmarks.loadgen --rate 2 --duration 60            # local instance, 2 sessions/s
+    python -m benchmarks.loadgen --rate 8 --workers 4 --max-pages 5
+    python -m benchmarks.loadgen --url http://localhost:8000 --user alice:secret --rate 1
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import httpx
+import numpy as np
+
+from benchmarks.bench import BACKEND_DIR, REPO_ROOT, RESULTS_DIR, backend_environment, environment, summarize
+from benchmarks.pdfgen import random_report_pdf
+
+# ------------------ Logging Setup ------------------
+logger = logging.getLogger(__name__)
+
+# ------------------ Config ------------------
+ENDPOINTS = (
+    "/login",
+    "/classical/extract-patient-data",
+    "/classical/predict",
+    "/classical/get-patient-data",
+)
+HISTORY_PAGE_SIZE = 20
+SERVER_START_TIMEOUT_SECONDS = 180
+RESULTS_FORMAT_VERSION = 1
+
+
+def arrival_offsets(rate: float, duration: float, process: str, rng: np.random.Generator) -> np.ndarray:
+    """
+    Session start times, in seconds from the start of the run.
+
+    Args:
+        rate (float): Mean arrivals per second.
+        duration (float): Length of the arrival window in seconds.
+        process (str): ``poisson`` (exponential gaps, like independent
+            users) or ``constant`` (evenly spaced).
+        rng (np.random.Generator): Source of the gaps.
+
+    Returns:
+        np.ndarray: Sorted offsets below ``duration``.
+    """
+    if process == "constant":
+        return np.arange(0.0, duration, 1.0 / rate)
+    offsets = np.cumsum(rng.exponential(1.0 / rate, size=int(rate * duration * 1.5) + 16))
+    while offsets[-1] < duration:
+        more = offsets[-1] + np.cumsum(rng.exponential(1.0 / rate, size=len(offsets)))
+        offsets = np.concatenate([offsets, more])
+    return offsets[offsets < duration]
+
+
+class Recorder:
+    """Per-endpoint latencies and outcomes, plus per-session totals."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {name: [] for name in ENDPOINTS}
+        self.outcomes: Dict[str, Dict[str, int]] = {name: {} for name in ENDPOINTS}
+        self.sessions: List[float] = []
+        self.failed_sessions = 0
+
+    def record(self, endpoint: str, elapsed_ms: float, outcome: str) -> None:
+        counts = self.outcomes[endpoint]
+        counts[outcome] = counts.get(outcome, 0) + 1
+        if outcome.startswith("2"):
+            self.latencies[endpoint].append(elapsed_ms)
+
+    def report(self, elapsed_s: float) -> Dict[str, Dict[str, Any]]:
+        """
+        Summaries per endpoint.
+
+        Latency statistics cover successful (2xx) responses; errors are
+        every other status code, timeouts and connection failures.
+        """
+        report = {}
+        for name in ENDPOINTS:
+            outcomes = self.outcomes[name]
+            total = sum(outcomes.values())
+            errors = total - len(self.latencies[name])
+            report[name] = {
+                "requests": total,
+                "errors": errors,
+                "error_rate": errors / total if total else 0.0,
+                "throughput_rps": len(self.latencies[name]) / elapsed_s if elapsed_s else 0.0,
+                "outcomes": dict(sorted(outcomes.items())),
+                **(summarize(self.latencies[name]) if self.latencies[name] else {"n": 0}),
+            }
+        return report
+
+
+async def _call(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    endpoint: str,
+    method: str,
+    **kwargs
+) -> Optional[httpx.Response]:
+    """Send one request and record it; the response only if it succeeded."""
+    started = time.perf_counter_ns()
+    try:
+        response = await client.request(method, endpoint, **kwargs)
+    except httpx.TimeoutException:
+        outcome, response = "timeout", None
+    except httpx.HTTPError as e:
+        logger.debug(f"{method} {endpoint} failed: {e}")
+        outcome, response = "connection_error", None
+    else:
+        outcome = str(response.status_code)
+    recorder.record(endpoint, (time.perf_counter_ns() - started) / 1e6, outcome)
+    if response is None or not response.is_success:
+        return None
+    return response
+
+
+async def run_session(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    username: str,
+    password: str,
+    pdf: bytes
+) -> None:
+    """
+    One virtual user: log in, upload a report, predict for it, read the history.
+
+    Predictions name the uploaded report by ``record_id``, so concurrent
+    sessions sharing an account do not score each other's uploads. The
+    session stops at the first failed step.
+    """
+    started = time.perf_counter_ns()
+    response = await _call(
+        client, recorder, "/login", "POST", data={"username": username, "password": password}
+    )
+    if response is not None:
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await _call(
+            client, recorder, "/classical/extract-patient-data", "POST",
+            files={"file": ("report.pdf", pdf, "application/pdf")}, headers=headers
+        )
+    if response is not None:
+        response = await _call(
+            client, recorder, "/classical/predict", "GET",
+            params={"record_id": response.json()["record_id"]}, headers=headers
+        )
+    if response is not None:
+        response = await _call(
+            client, recorder, "/classical/get-patient-data", "GET",
+            params={"limit": HISTORY_PAGE_SIZE, "order": "desc"}, headers=headers
+        )
+    if response is None:
+        recorder.failed_sessions += 1
+    else:
+        recorder.sessions.append((time.perf_counter_ns() - started) / 1e6)
+
+
+async def drive(
+    url: str,
+    accounts: List[Tuple[str, str]],
+    pdfs: List[bytes],
+    offsets: np.ndarray,
+    max_sessions: int,
+    timeout: float
+) -> Dict[str, Any]:
+    """
+    Start one session per arrival offset and wait for all of them.
+
+    An arrival that finds ``max_sessions`` sessions still running is
+    dropped and counted rather than queued, so the arrival rate stays
+    independent of the server's speed.
+
+    Args:
+        url (str): Base URL of the API.
+        accounts (List[Tuple[str, str]]): ``(username, password)`` pairs, used in turn.
+        pdfs (List[bytes]): Reports to upload, used in turn.
+        offsets (np.ndarray): Session start times from ``arrival_offsets``.
+        max_sessions (int): Cap on concurrently running sessions.
+        timeout (float): Per-request timeout in seconds.
+
+    Returns:
+        Dict[str, Any]: ``endpoints`` (per-endpoint summaries), ``sessions``
+        and the run's ``elapsed_s``.
+    """
+    recorder = Recorder()
+    running: Set[asyncio.Task] = set()
+    dropped = 0
+    max_lag_ms = 0.0
+    limits = httpx.Limits(max_connections=max_sessions, max_keepalive_connections=max_sessions)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        for i, offset in enumerate(offsets):
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # The generator itself fell behind; large values mean the
+                # client machine, not the server, limits the run.
+                max_lag_ms = max(max_lag_ms, -delay * 1000)
+            if len(running) >= max_sessions:
+                dropped += 1
+                continue
+            username, password = accounts[i % len(accounts)]
+            task = asyncio.create_task(run_session(client, recorder, username, password, pdfs[i % len(pdfs)]))
+            running.add(task)
+            task.add_done_callback(running.discard)
+        await asyncio.gather(*running)
+        elapsed = time.perf_counter() - started
+
+    completed = len(recorder.sessions)
+    return {
+        "elapsed_s": elapsed,
+        "sessions": {
+            "arrivals": len(offsets),
+            "completed": completed,
+            "failed": recorder.failed_sessions,
+            "dropped": dropped,
+            "throughput_per_s": completed / elapsed if elapsed else 0.0,
+            "max_start_lag_ms": max_lag_ms,
+            **(summarize(recorder.sessions) if recorder.sessions else {"n": 0}),
+        },
+        "endpoints": recorder.report(elapsed),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def local_server(workdir: str, accounts: List[Tuple[str, str]], workers: int) -> Iterator[str]:
+    """
+    Run the API with uvicorn on throwaway state for the duration of the block.
+
+    Args:
+        workdir (str): Directory for the server's state and its log.
+        accounts (List[Tuple[str, str]]): Accounts to create.
+        workers (int): uvicorn worker processes.
+
+    Yields:
+        str: The instance's base URL, once ``/ready`` answers 200.
+    """
+    env = {**os.environ, **backend_environment(workdir, dict(accounts))}
+    # SQLite instead of in-memory state, so every worker sees every session
+    env.update({
+        "SESSION_BACKEND": "sqlite",
+        "SESSION_DB_PATH": os.path.join(workdir, "sessions.db"),
+        "STORAGE_BACKEND": "sqlite",
+        "SQLITE_PATH": os.path.join(workdir, "predictions.db"),
+    })
+    env.pop("EXTRACTION_CACHE_DIR", None)
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    log_path = os.path.join(workdir, "server.log")
+    with open(log_path, "w") as log:
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR,
+                "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+                "--log-level", "warning", "--no-access-log",
+            ],
+            # The API resolves saved_models/ relative to the working directory.
+            cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+    try:
+        deadline = time.monotonic() + SERVER_START_TIMEOUT_SECONDS
+        while True:
+            if server.poll() is not None or time.monotonic() > deadline:
+                with open(log_path) as f:
+                    tail = "".join(f.readlines()[-20:])
+                raise RuntimeError(f"The API did not become ready; server log:\n{tail}")
+            try:
+                if httpx.get(f"{url}/ready", timeout=2).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.5)
+        logger.info(f"Local API ready at {url} with {workers} worker(s)")
+        yield url
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def run(
+    rate: float,
+    duration: float,
+    url: Optional[str] = None,
+    accounts: Optional[List[Tuple[str, str]]] = None,
+    n_accounts: int = 20,
+    workers: int = 1,
+    process: str = "poisson",
+    max_sessions: int = 256,
+    n_pdfs: int = 200,
+    max_pages: int = 3,
+    timeout: float = 30.0,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Generate the reports, run the load and return the results document.
+
+    Args:
+        rate (float): Mean session arrivals per second.
+        duration (float): Seconds during which sessions arrive.
+        url (str, optional): Running instance to target; None starts a local one.
+        accounts (List[Tuple[str, str]], optional): Credentials for ``url``.
+        n_accounts (int): Accounts created on a local instance.
+        workers (int): uvicorn workers of a local instance.
+        process (str): Arrival process, ``poisson`` or ``constant``.
+        max_sessions (int): Cap on concurrently running sessions.
+        n_pdfs (int): Distinct reports to generate; a run with more sessions
+            reuses them, and the repeats hit the extraction cache.
+        max_pages (int): Largest report length in pages.
+        timeout (float): Per-request timeout in seconds.
+        seed (int): Seed for the reports and the arrival times.
+
+    Returns:
+        Dict[str, Any]: ``format``, ``created_at``, ``config``,
+        ``environment`` and the measurements from ``drive``.
+    """
+    rng = np.random.default_rng(seed)
+    offsets = arrival_offsets(rate, duration, process, rng)
+    pdfs = [random_report_pdf(rng, max_pages) for _ in range(max(1, min(n_pdfs, len(offsets))))]
+    config = {
+        "rate": rate, "duration_s": duration, "process": process, "max_sessions": max_sessions,
+        "pdfs": len(pdfs), "max_pages": max_pages, "timeout_s": timeout, "seed": seed,
+    }
+
+    with tempfile.TemporaryDirectory(prefix="loadgen-") as workdir:
+        with contextlib.ExitStack() as stack:
+            if url is None:
+                accounts = [(f"loadgen-{i}", f"loadgen-{i}") for i in range(n_accounts)]
+                url = stack.enter_context(local_server(workdir, accounts, workers))
+                config["workers"] = workers
+            elif not accounts:
+                raise ValueError("Targeting --url needs at least one --user NAME:PASSWORD.")
+            config.update({"url": url, "accounts": len(accounts)})
+            logger.info(f"Sending {len(offsets)} sessions to {url} over {duration:g}s")
+            measured = asyncio.run(drive(url, accounts, pdfs, offsets, max_sessions, timeout))
+
+    return {
+        "format": RESULTS_FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": config,
+        "environment": environment(),
+        **measured,
+    }
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    print(
+        f"{'endpoint':<34} {'requests':>8} {'errors':>7} {'req/s':>7} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    for name, stats in results["endpoints"].items():
+        latencies = (
+            f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}"
+            if stats["n"] else f"{'-':>9} {'-':>9} {'-':>9}"
+        )
+        print(
+            f"{name:<34} {stats['requests']:>8} {stats['error_rate'] * 100:>6.1f}% "
+            f"{stats['throughput_rps']:>7.2f} {latencies}"
+        )
+        errors = {outcome: n for outcome, n in stats["outcomes"].items() if not outcome.startswith("2")}
+        if errors:
+            print(f"{'':<34} errors: {', '.join(f'{outcome} x{n}' for outcome, n in errors.items())}")
+
+    sessions = results["sessions"]
+    print(
+        f"\nsessions: {sessions['arrivals']} arrived, {sessions['completed']} completed, "
+        f"{sessions['failed']} failed, {sessions['dropped']} dropped "
+        f"({sessions['throughput_per_s']:.2f}/s over {results['elapsed_s']:.1f}s)"
+    )
+    if sessions["n"]:
+        print(f"session latency: p50 {sessions['p50_ms']:.1f} ms, p95 {sessions['p95_ms']:.1f} ms, "
+              f"p99 {sessions['p99_ms']:.1f} ms")
+    if sessions["max_start_lag_ms"] > 100:
+        print(f"warning: sessions started up to {sessions['max_start_lag_ms']:.0f} ms late; "
+              "the load generator could not keep up with --rate")
+
+
+def _parse_user(value: str) -> Tuple[str, str]:
+    username, sep, password = value.partition(":")
+    if not sep or not username:
+        raise argparse.ArgumentTypeError("expected NAME:PASSWORD")
+    return username, password
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Drive open-loop load through the prediction API.")
+    parser.add_argument("--rate", type=float, required=True, help="mean session arrivals per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds during which sessions arrive (default: 30)")
+    parser.add_argument("--url", help="target a running instance instead of starting a local one")
+    parser.add_argument(
+        "--user", action="append", type=_parse_user, metavar="NAME:PASSWORD",
+        help="account for --url; repeat to spread sessions over several accounts"
+    )
+    parser.add_argument("--accounts", type=int, default=20, help="accounts created on the local instance (default: 20)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers of the local instance (default: 1)")
+    parser.add_argument(
+        "--arrivals", choices=("poisson", "constant"), default="poisson",
+        help="arrival process (default: poisson)"
+    )
+    parser.add_argument(
+        "--max-sessions", type=int, default=256,
+        help="concurrent sessions; arrivals beyond this are dropped (default: 256)"
+    )
+    parser.add_argument("--pdfs", type=int, default=200, help="distinct synthetic reports (default: 200)")
+    parser.add_argument("--max-pages", type=int, default=3, help="largest report length in pages (default: 3)")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds (default: 30)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for reports and arrival times (default: 0)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument(
+        "--max-error-rate", type=float, metavar="FRACTION",
+        help="exit 1 if any endpoint's error rate exceeds this"
+    )
+    args = parser.parse_args(argv)
+    if args.rate <= 0 or args.duration <= 0:
+        parser.error("--rate and --duration must be positive")
+
+    results = run(
+        args.rate, args.duration, url=args.url, accounts=args.user, n_accounts=args.accounts,
+        workers=args.workers, process=args.arrivals, max_sessions=args.max_sessions,
+        n_pdfs=args.pdfs, max_pages=args.max_pages, timeout=args.timeout, seed=args.seed
+    )
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.now(timezone.utc).strftime("load-%Y%m%dT%H%M%SZ") + ".json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print_results(results)
+    print(f"\nResults written to {output}")
+
+    if args.max_error_rate is not None:
+        failing = [
+            name for name, stats in results["endpoints"].items()
+            if stats["error_rate"] > args.max_error_rate
+        ]
+        if failing:
+            print(f"\nError rate above {args.max_error_rate:.1%}: {', '.join(failing)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    # httpx logs every request at INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    sys.exit(main())
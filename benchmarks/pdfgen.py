@@ -0,0 +1,156 @@
+"""
+Minimal PDF writer for benchmark inputs.
+
+Builds text-only PDFs (Helvetica, one content stream per page) in pure
+Python, so the benchmarks need neither network access nor a PDF library
+beyond the ``pdfplumber`` the API already uses to read them.
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Positive and negative cases for the shipped model; the values are
+# rendered with the labels the API's extraction patterns expect.
+POSITIVE_CASE: Dict[str, float] = {
+    "Pregnancies": 6, "Glucose": 148, "BloodPressure": 72, "SkinThickness": 35,
+    "Insulin": 0, "BMI": 33.6, "DiabetesPedigreeFunction": 0.627, "Age": 50,
+}
+NEGATIVE_CASE: Dict[str, float] = {
+    "Pregnancies": 1, "Glucose": 85, "BloodPressure": 66, "SkinThickness": 29,
+    "Insulin": 0, "BMI": 26.6, "DiabetesPedigreeFunction": 0.351, "Age": 31,
+}
+
+FIELD_LABELS = [
+    ("Pregnancies", "Pregnancies {:d}"),
+    ("Glucose", "Glucose (mg/dL) {:g}"),
+    ("BloodPressure", "Blood Pressure (mm Hg) {:g}"),
+    ("SkinThickness", "Skin Thickness (mm) {:g}"),
+    ("Insulin", "Insulin (mu U/ml) {:g}"),
+    ("BMI", "BMI (kg/m2) {:g}"),
+    ("DiabetesPedigreeFunction", "Diabetes Pedigree Function {:g}"),
+    ("Age", "Age (years) {:d}"),
+]
+FILLER_LINES = 45
+# Plausible (low, high, decimals) of each measurement, for synthetic reports
+FIELD_RANGES: Dict[str, Tuple[float, float, int]] = {
+    "Pregnancies": (0, 12, 0), "Glucose": (60, 200, 0), "BloodPressure": (40, 110, 0),
+    "SkinThickness": (7, 60, 0), "Insulin": (0, 400, 0), "BMI": (18, 50, 1),
+    "DiabetesPedigreeFunction": (0.08, 2.4, 3), "Age": (21, 81, 0),
+}
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: Sequence[Sequence[str]]) -> bytes:
+    """
+    Render pages of text lines as a PDF document.
+
+    Args:
+        pages (Sequence[Sequence[str]]): Lines of text for each page.
+
+    Returns:
+        bytes: The PDF file contents.
+    """
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(b"")
+    kids = []
+    for lines in pages:
+        text = " ".join(f"({_escape(line)}) Tj T*" for line in lines)
+        stream = f"BT /F1 11 Tf 14 TL 50 780 Td {text} ET".encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_id, content, font)
+        ))
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        " ".join(f"{kid} 0 R" for kid in kids).encode(), len(kids)
+    )
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref
+    )
+    return bytes(out)
+
+
+def make_report_pdf(
+    values: Dict[str, float],
+    n_pages: int = 1,
+    report_date: str = "12-03-2024",
+    rng: Optional[np.random.Generator] = None
+) -> bytes:
+    """
+    Render a lab report with the given measurements on its last page.
+
+    Earlier pages hold filler text without any field labels, so extraction
+    has to parse every page before it finds the values, which is the
+    worst case for the API's early-stopping page scan.
+
+    Args:
+        values (Dict[str, float]): Measurement per model feature.
+        n_pages (int): Total number of pages.
+        report_date (str): Report date in DD-MM-YYYY form.
+        rng (np.random.Generator, optional): Source for the filler numbers.
+
+    Returns:
+        bytes: The PDF file contents.
+    """
+    rng = rng or np.random.default_rng(0)
+    pages = []
+    for page in range(1, n_pages):
+        pages.append([f"Clinical notes, page {page} of {n_pages}"] + [
+            f"Observation {line:02d}: reading {rng.uniform(0, 500):.1f} units, within reference range"
+            for line in range(FILLER_LINES)
+        ])
+    report = [f"Lab Report  Date: {report_date}"]
+    for key, template in FIELD_LABELS:
+        value = values[key]
+        report.append(template.format(int(value) if "{:d}" in template else value))
+    pages.append(report)
+    return make_pdf(pages)
+
+
+def random_case(rng: np.random.Generator) -> Dict[str, float]:
+    """Draw measurements uniformly from ``FIELD_RANGES``."""
+    values: Dict[str, float] = {}
+    for key, (low, high, decimals) in FIELD_RANGES.items():
+        value = round(float(rng.uniform(low, high)), decimals)
+        values[key] = int(value) if decimals == 0 else value
+    return values
+
+
+def random_report_pdf(rng: np.random.Generator, max_pages: int = 1) -> bytes:
+    """
+    Render a lab report with random measurements, page count and date.
+
+    Args:
+        rng (np.random.Generator): Source of randomness.
+        max_pages (int): Largest page count; each report has 1 to ``max_pages`` pages.
+
+    Returns:
+        bytes: The PDF file contents.
+    """
+    report_date = date.today() - timedelta(days=int(rng.integers(0, 730)))
+    return make_report_pdf(
+        random_case(rng),
+        n_pages=int(rng.integers(1, max_pages + 1)),
+        report_date=report_date.strftime("%d-%m-%Y"),
+        rng=rng
+    )
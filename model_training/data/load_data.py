@@ -1,32 +1,166 @@
+import hashlib
+import json
 import logging
-from typing import Optional
+import os
+import shutil
+import time
+from typing import Dict, Iterator, Optional, Union
+
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# Compact dtypes for the known columns: a signed byte for the label and
+# float32 for the measurements (trees in scikit-learn compute in float32
+# anyway). Counts and ages are parsed as float32 too, so a blank or out of
+# range cell does not abort the load, and are narrowed to ``uint8``
+# afterwards when every value fits. Unknown columns keep the pandas
+# defaults.
+SCHEMA: Dict[str, str] = {
+    'Id': 'int32',
+    'Pregnancies': 'float32',
+    'Glucose': 'float32',
+    'BloodPressure': 'float32',
+    'SkinThickness': 'float32',
+    'Insulin': 'float32',
+    'BMI': 'float32',
+    'DiabetesPedigreeFunction': 'float32',
+    'Age': 'float32',
+    'Outcome': 'int8',
+}
+SMALL_INT_COLUMNS = ('Pregnancies', 'Age')
+SCHEMA_VERSION = hashlib.sha256(
+    json.dumps([SCHEMA, SMALL_INT_COLUMNS], sort_keys=True).encode()
+).hexdigest()[:8]
+DEFAULT_CHUNKSIZE = 100_000
+DEFAULT_CACHE_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '.cache', 'data')
+)
+
+
+def _cache_key(local_path: str) -> str:
+    """Key that changes whenever the source file or the schema changes."""
+    stat = os.stat(local_path)
+    source = f"{os.path.abspath(local_path)}|{stat.st_size}|{stat.st_mtime_ns}|{SCHEMA_VERSION}"
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+def _source_prefix(local_path: str) -> str:
+    """Cache directory prefix shared by every version of one source file."""
+    return hashlib.sha256(os.path.abspath(local_path).encode()).hexdigest()[:12]
+
+
+def _narrow_small_ints(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Store ``SMALL_INT_COLUMNS`` as ``uint8`` where every value is a whole number in 0-255.
+
+    A column with missing, fractional or out of range values stays float32
+    (missing cells as NaN) and is logged, instead of failing the load.
+    """
+    for name in SMALL_INT_COLUMNS:
+        if name not in df.columns:
+            continue
+        values = df[name].to_numpy()
+        valid = np.isfinite(values) & (values % 1 == 0) & (values >= 0) & (values <= 255)
+        if valid.all():
+            df[name] = values.astype('uint8')
+        else:
+            logger.warning(
+                f"Column {name} has {int((~valid).sum())} missing or out of range value(s); "
+                f"keeping it as float32."
+            )
+    return df
+
+
+def _read_csv_chunks(source: str, chunksize: int, **kwargs) -> Iterator[pd.DataFrame]:
+    try:
+        for chunk in pd.read_csv(source, dtype=SCHEMA, chunksize=chunksize, **kwargs):
+            yield _narrow_small_ints(chunk)
+    except (ValueError, OverflowError) as e:
+        logger.error(f"Data does not match the expected schema: {e}")
+        raise ValueError(f"Data does not match the expected schema: {e}") from e
+
+
+def _load_cache(cache_path: str) -> Optional[pd.DataFrame]:
+    """Load a columnar cache entry; None if it is missing or unreadable."""
+    try:
+        with open(os.path.join(cache_path, "meta.json")) as f:
+            meta = json.load(f)
+        columns = {
+            name: np.load(os.path.join(cache_path, f"{index}.npy"), allow_pickle=False)
+            for index, name in enumerate(meta["columns"])
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+    return pd.DataFrame(columns)
+
+
+def _write_cache(df: pd.DataFrame, cache_dir: str, local_path: str, key: str) -> None:
+    """Write one ``.npy`` file per column, replacing older versions of the source."""
+    prefix = _source_prefix(local_path)
+    target = os.path.join(cache_dir, f"{prefix}-{key}")
+    staging = f"{target}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(staging, exist_ok=True)
+        for index, name in enumerate(df.columns):
+            np.save(os.path.join(staging, f"{index}.npy"), df[name].to_numpy())
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump({
+                "source": os.path.abspath(local_path),
+                "columns": list(df.columns),
+                "dtypes": {name: str(dtype) for name, dtype in df.dtypes.items()},
+                "rows": len(df),
+                "schema_version": SCHEMA_VERSION,
+            }, f)
+        os.replace(staging, target)
+    except OSError as e:
+        logger.warning(f"Could not write data cache {target}: {e}")
+        shutil.rmtree(staging, ignore_errors=True)
+        return
+
+    # Entries for earlier versions of the same file are stale now.
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix + "-") and os.path.join(cache_dir, name) != target:
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+
 def load_data(
     url: Optional[str] = None,
-    local_path: Optional[str] = None
-) -> pd.DataFrame:
+    local_path: Optional[str] = None,
+    chunksize: Optional[int] = None,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
     """
     Load dataset from a URL or local CSV file.
 
+    Columns are parsed with the compact dtypes in ``SCHEMA`` and the file is
+    read in chunks, so peak memory stays close to the size of the compact
+    result. A parsed local file is cached as one ``.npy`` file per column
+    in ``cache_dir``; later loads read the binary columns instead of parsing
+    the CSV again, until the file's size or modification time changes.
+
     Parameters
     ----------
     url : str, optional
         URL to the CSV file.
     local_path : str, optional
         Local path to the CSV file.
+    chunksize : int, optional
+        If given, return an iterator of DataFrames of at most this many rows
+        instead of one DataFrame (the cache is neither read nor written).
+    cache_dir : str, optional
+        Directory for the columnar cache; None disables caching.
 
     Returns
     -------
-    pd.DataFrame
-        Loaded dataset.
+    pd.DataFrame or Iterator[pd.DataFrame]
+        Loaded dataset, or an iterator of chunks if ``chunksize`` is given.
 
     Raises
     ------
     ValueError
-        If neither url nor local_path is provided.
+        If neither url nor local_path is provided, or the data does not fit the schema.
     FileNotFoundError
         If the local file does not exist.
     """
@@ -36,16 +170,35 @@ def load_data(
     ]
     if url:
         logger.info(f"Loading data from URL: {url}")
-        df = pd.read_csv(url, names=column_names)
+        chunks = _read_csv_chunks(url, chunksize or DEFAULT_CHUNKSIZE, names=column_names)
+        if chunksize:
+            return chunks
+        df = pd.concat(chunks, ignore_index=True)
     elif local_path:
         logger.info(f"Loading data from local path: {local_path}")
-        try:
-            df = pd.read_csv(local_path)
-        except FileNotFoundError as e:
+        if not os.path.exists(local_path):
             logger.error(f"File not found: {local_path}")
-            raise e
+            raise FileNotFoundError(local_path)
+        if chunksize:
+            return _read_csv_chunks(local_path, chunksize)
+
+        key = _cache_key(local_path) if cache_dir else None
+        cache_path = os.path.join(cache_dir, f"{_source_prefix(local_path)}-{key}") if key else None
+        df = _load_cache(cache_path) if cache_path else None
+        if df is not None:
+            logger.info(f"Loaded cached columns for {local_path} from {cache_path}")
+        else:
+            started = time.perf_counter()
+            df = pd.concat(_read_csv_chunks(local_path, DEFAULT_CHUNKSIZE), ignore_index=True)
+            logger.info(f"Parsed {local_path} in {time.perf_counter() - started:.2f}s")
+            if cache_path:
+                os.makedirs(cache_dir, exist_ok=True)
+                _write_cache(df, cache_dir, local_path, key)
     else:
         logger.error("No data source provided. Provide either url or local_path.")
         raise ValueError("Provide either url or local_path")
-    logger.info(f"Data loaded successfully with shape: {df.shape}")
+    logger.info(
+        f"Data loaded successfully with shape: {df.shape} "
+        f"({df.memory_usage(deep=True).sum() / 1024:.0f} KiB)"
+    )
     return df
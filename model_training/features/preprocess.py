@@ -1,5 +1,6 @@
 import logging
-from typing import Tuple
+from typing import Iterable, Iterator, Optional, Tuple
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
@@ -57,3 +58,88 @@ def preprocess_data(
         f"y_train: {y_train.shape}, y_test: {y_test.shape}"
     )
     return X_train, X_test, y_train, y_test
+
+
+def hash_split_mask(
+    df: pd.DataFrame,
+    test_size: float = 0.2,
+    key_column: Optional[str] = 'Id',
+    salt: int = 42
+) -> pd.Series:
+    """
+    Assign rows to the test set by hashing a stable per-row key.
+
+    Unlike ``train_test_split``, the decision for a row depends only on the
+    row itself, so it is identical however the data is chunked or ordered
+    and can be made one chunk at a time.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Rows to assign.
+    test_size : float, optional
+        Expected fraction of rows in the test set (default is 0.2).
+    key_column : str, optional
+        Column identifying a row (default is 'Id'). If None or missing, the
+        whole row is hashed.
+    salt : int, optional
+        Changes the assignment, like a random seed (default is 42).
+
+    Returns
+    -------
+    pd.Series
+        Boolean mask aligned with ``df``; True for test rows.
+    """
+    keys = df[key_column] if key_column and key_column in df.columns else df
+    hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    # pandas ignores its hash key for numeric columns, so fold the salt in
+    # with a splitmix64 finaliser instead.
+    with np.errstate(over='ignore'):
+        hashes = hashes ^ np.uint64(salt)
+        hashes = (hashes ^ (hashes >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        hashes = (hashes ^ (hashes >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        hashes = hashes ^ (hashes >> np.uint64(31))
+    buckets = hashes % np.uint64(10_000)
+    return pd.Series(buckets < np.uint64(round(test_size * 10_000)), index=df.index)
+
+
+def iter_split(
+    chunks: Iterable[pd.DataFrame],
+    part: str,
+    test_size: float = 0.2,
+    key_column: Optional[str] = 'Id',
+    salt: int = 42
+) -> Iterator[Tuple[pd.DataFrame, pd.Series]]:
+    """
+    Stream the train or test part of a chunked dataset as ``(X, y)`` pairs.
+
+    Parameters
+    ----------
+    chunks : Iterable[pd.DataFrame]
+        Chunks from ``load_data(..., chunksize=...)``.
+    part : str
+        'train' or 'test'.
+    test_size, key_column, salt
+        See ``hash_split_mask``.
+
+    Yields
+    ------
+    Tuple[pd.DataFrame, pd.Series]
+        Features and target of the selected rows of each chunk.
+
+    Raises
+    ------
+    ValueError
+        If ``part`` is unknown or the target column is missing.
+    """
+    if part not in ('train', 'test'):
+        raise ValueError(f"part must be 'train' or 'test', got {part!r}")
+    for chunk in chunks:
+        if 'Outcome' not in chunk.columns:
+            logger.error("Missing columns in DataFrame: {'Outcome'}")
+            raise ValueError("Missing columns in DataFrame: {'Outcome'}")
+        is_test = hash_split_mask(chunk, test_size, key_column, salt)
+        rows = chunk[is_test] if part == 'test' else chunk[~is_test]
+        if len(rows):
+            X = rows.drop(columns=[col for col in ('Outcome', 'Id') if col in rows.columns])
+            yield X, rows['Outcome']
@@ -1,11 +1,47 @@
+import json
 import logging
-from typing import Dict
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
 from sklearn.base import BaseEstimator
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
 logger = logging.getLogger(__name__)
 
+REPORT_FILENAME = "evaluation.json"
+# Resamples per parallel job. Each block has its own seed derived from the
+# report's random_state, so the intervals do not depend on n_jobs.
+BOOTSTRAP_BLOCK = 50
+
+
+def positive_proba(model: BaseEstimator, X: pd.DataFrame) -> np.ndarray:
+    """
+    Probability of the positive class from a single ``predict_proba`` pass.
+
+    Parameters
+    ----------
+    model : BaseEstimator
+        A fitted binary classifier.
+    X : pd.DataFrame
+        Features to score.
+
+    Returns
+    -------
+    np.ndarray
+        float64 probabilities of class 1. Models without ``predict_proba``
+        yield their hard 0/1 predictions.
+    """
+    if not hasattr(model, "predict_proba"):
+        return np.asarray(model.predict(X), dtype=np.float64)
+    proba = model.predict_proba(X)
+    classes = list(model.classes_)
+    if 1 not in classes:
+        return np.zeros(len(X))
+    return np.asarray(proba[:, classes.index(1)], dtype=np.float64)
+
+
 def evaluate_model(
     model: BaseEstimator,
     X_test: pd.DataFrame,
@@ -14,6 +50,10 @@ def evaluate_model(
     """
     Evaluate a trained model on test data.
 
+    Runs one ``predict_proba`` pass and derives the metrics from its
+    confusion counts at the default 0.5 threshold, which matches
+    ``model.predict`` for binary classifiers.
+
     Parameters
     ----------
     model : BaseEstimator
@@ -29,12 +69,413 @@ def evaluate_model(
         Dictionary with accuracy, precision, recall, and f1 score.
     """
     logger.info("Evaluating model.")
-    y_pred = model.predict(X_test)
-    metrics = {
-        "accuracy": accuracy_score(y_test, y_pred),
-        "precision": precision_score(y_test, y_pred, zero_division=0),
-        "recall": recall_score(y_test, y_pred, zero_division=0),
-        "f1_score": f1_score(y_test, y_pred, zero_division=0)
-    }
+    proba = positive_proba(model, X_test)
+    metrics = metrics_from_counts(confusion_counts(y_test, proba > 0.5))
     logger.info(f"Evaluation metrics: {metrics}")
     return metrics
+
+
+def confusion_counts(y_true, y_pred) -> Dict[str, int]:
+    """
+    Count true/false positives and negatives of a binary prediction.
+
+    Parameters
+    ----------
+    y_true : array-like
+        True labels (0 or 1).
+    y_pred : array-like
+        Predicted labels (0 or 1).
+
+    Returns
+    -------
+    Dict[str, int]
+        Counts ``tp``, ``fp``, ``tn`` and ``fn``; they can be summed across
+        chunks.
+    """
+    y_true = np.asarray(y_true) == 1
+    y_pred = np.asarray(y_pred) == 1
+    tp = int(np.count_nonzero(y_true & y_pred))
+    fp = int(np.count_nonzero(y_pred)) - tp
+    fn = int(np.count_nonzero(y_true)) - tp
+    return {"tp": tp, "fp": fp, "tn": len(y_true) - tp - fp - fn, "fn": fn}
+
+
+def metrics_from_counts(counts: Dict[str, int]) -> Dict[str, float]:
+    """
+    Compute the ``evaluate_model`` metrics from confusion counts.
+
+    Parameters
+    ----------
+    counts : Dict[str, int]
+        Output of ``confusion_counts`` (possibly summed over chunks).
+
+    Returns
+    -------
+    Dict[str, float]
+        Dictionary with accuracy, precision, recall, and f1 score; undefined
+        ratios are 0, like ``zero_division=0``.
+    """
+    tp, fp, tn, fn = counts["tp"], counts["fp"], counts["tn"], counts["fn"]
+    total = tp + fp + tn + fn
+    return {
+        "accuracy": (tp + tn) / total if total else 0.0,
+        "precision": tp / (tp + fp) if tp + fp else 0.0,
+        "recall": tp / (tp + fn) if tp + fn else 0.0,
+        "f1_score": 2 * tp / (2 * tp + fp + fn) if tp else 0.0,
+    }
+
+
+def evaluate_model_streaming(
+    model: BaseEstimator,
+    chunks: Iterable[Tuple[pd.DataFrame, pd.Series]]
+) -> Dict[str, float]:
+    """
+    Evaluate a trained model over test data that arrives in chunks.
+
+    Only the confusion counts are kept between chunks, so memory does not
+    grow with the size of the test set.
+
+    Parameters
+    ----------
+    model : BaseEstimator
+        The trained scikit-learn model.
+    chunks : Iterable[Tuple[pd.DataFrame, pd.Series]]
+        ``(X_test, y_test)`` pairs, e.g. from ``iter_split(..., 'test')``.
+
+    Returns
+    -------
+    Dict[str, float]
+        Dictionary with accuracy, precision, recall, and f1 score.
+    """
+    logger.info("Evaluating model over streamed test chunks.")
+    totals = {"tp": 0, "fp": 0, "tn": 0, "fn": 0}
+    for X_test, y_test in chunks:
+        for key, value in confusion_counts(y_test, model.predict(X_test)).items():
+            totals[key] += value
+    metrics = metrics_from_counts(totals)
+    logger.info(f"Evaluation metrics over {sum(totals.values())} row(s): {metrics}")
+    return metrics
+
+
+def threshold_curve(y_true, proba) -> Dict[str, np.ndarray]:
+    """
+    Confusion counts at every distinct score, from one sort.
+
+    Parameters
+    ----------
+    y_true : array-like
+        True labels (0 or 1).
+    proba : array-like
+        Scores of the positive class.
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        ``thresholds`` in decreasing order and, for the rule
+        ``proba >= threshold``, the cumulative ``tp`` and ``fp`` counts;
+        plus scalar totals ``positives`` and ``negatives``.
+    """
+    y_true = np.asarray(y_true) == 1
+    proba = np.asarray(proba, dtype=np.float64)
+    order = np.argsort(proba, kind="mergesort")[::-1]
+    scores = proba[order]
+    last = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+    tp = np.cumsum(y_true[order])[last]
+    return {
+        "thresholds": scores[last],
+        "tp": tp,
+        "fp": last + 1 - tp,
+        "positives": int(y_true.sum()),
+        "negatives": int(len(y_true) - y_true.sum()),
+    }
+
+
+def _ranking_metrics(curve: Dict[str, np.ndarray]) -> Dict[str, float]:
+    """ROC-AUC and average precision from a ``threshold_curve``."""
+    positives, negatives = curve["positives"], curve["negatives"]
+    if not positives or not negatives:
+        return {"roc_auc": float("nan"), "average_precision": float("nan")}
+    tpr = np.r_[0.0, curve["tp"] / positives]
+    fpr = np.r_[0.0, curve["fp"] / negatives]
+    precision = curve["tp"] / (curve["tp"] + curve["fp"])
+    return {
+        "roc_auc": float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1])) / 2),
+        "average_precision": float(np.sum(np.diff(tpr) * precision)),
+    }
+
+
+def calibration_table(y_true, proba, n_bins: int = 10) -> Dict[str, Any]:
+    """
+    Reliability of the predicted probabilities in equal-width bins.
+
+    Parameters
+    ----------
+    y_true : array-like
+        True labels (0 or 1).
+    proba : array-like
+        Probabilities of the positive class.
+    n_bins : int, optional
+        Number of bins over [0, 1] (default is 10).
+
+    Returns
+    -------
+    Dict[str, Any]
+        ``bins`` (per non-empty bin: bounds, count, mean predicted
+        probability and observed positive rate) and the expected
+        calibration error ``ece``.
+    """
+    y_true = (np.asarray(y_true) == 1).astype(np.float64)
+    proba = np.asarray(proba, dtype=np.float64)
+    index = np.minimum((proba * n_bins).astype(np.intp), n_bins - 1)
+    counts = np.bincount(index, minlength=n_bins)
+    predicted = np.bincount(index, weights=proba, minlength=n_bins)
+    observed = np.bincount(index, weights=y_true, minlength=n_bins)
+    filled = counts > 0
+    gaps = np.abs(predicted[filled] - observed[filled])
+    bins = [
+        {
+            "low": b / n_bins,
+            "high": (b + 1) / n_bins,
+            "count": int(counts[b]),
+            "mean_predicted": float(predicted[b] / counts[b]),
+            "observed_rate": float(observed[b] / counts[b]),
+        }
+        for b in np.flatnonzero(filled)
+    ]
+    return {"bins": bins, "ece": float(gaps.sum() / max(1, len(proba)))}
+
+
+def compute_metrics(y_true, proba, threshold: float = 0.5) -> Dict[str, float]:
+    """
+    The full metric suite from labels and positive-class probabilities.
+
+    Parameters
+    ----------
+    y_true : array-like
+        True labels (0 or 1).
+    proba : array-like
+        Probabilities of the positive class.
+    threshold : float, optional
+        A row is predicted positive when its probability is above this
+        (default is 0.5, like ``predict``).
+
+    Returns
+    -------
+    Dict[str, float]
+        accuracy, precision, recall, f1_score, specificity,
+        balanced_accuracy, roc_auc, average_precision, brier_score,
+        log_loss and ece. Metrics undefined for the sample (e.g. ROC-AUC
+        with a single class) are NaN.
+    """
+    y_true = np.asarray(y_true) == 1
+    proba = np.asarray(proba, dtype=np.float64)
+    counts = confusion_counts(y_true, proba > threshold)
+    metrics = metrics_from_counts(counts)
+    negatives = counts["tn"] + counts["fp"]
+    metrics["specificity"] = counts["tn"] / negatives if negatives else float("nan")
+    metrics["balanced_accuracy"] = (metrics["recall"] + metrics["specificity"]) / 2
+    metrics.update(_ranking_metrics(threshold_curve(y_true, proba)))
+
+    clipped = np.clip(proba, 1e-15, 1 - 1e-15)
+    metrics["brier_score"] = float(np.mean((proba - y_true) ** 2))
+    metrics["log_loss"] = float(-np.mean(np.where(y_true, np.log(clipped), np.log1p(-clipped))))
+    metrics["ece"] = calibration_table(y_true, proba)["ece"]
+    return {key: float(value) for key, value in metrics.items()}
+
+
+def _bootstrap_block(
+    y_true: np.ndarray,
+    proba: np.ndarray,
+    n_resamples: int,
+    seed: np.random.SeedSequence,
+    threshold: float
+) -> List[Dict[str, float]]:
+    rng = np.random.default_rng(seed)
+    n = len(y_true)
+    results = []
+    for _ in range(n_resamples):
+        index = rng.integers(0, n, n)
+        results.append(compute_metrics(y_true[index], proba[index], threshold))
+    return results
+
+
+def bootstrap_intervals(
+    y_true,
+    proba,
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    threshold: float = 0.5,
+    n_jobs: int = -1,
+    random_state: int = 42
+) -> Dict[str, Dict[str, float]]:
+    """
+    Percentile bootstrap confidence intervals for every metric.
+
+    Resamples of the test rows are scored in blocks spread across
+    ``n_jobs`` processes; only the labels and probabilities are resampled,
+    so the model is never called again.
+
+    Parameters
+    ----------
+    y_true : array-like
+        True labels (0 or 1).
+    proba : array-like
+        Probabilities of the positive class.
+    n_resamples : int, optional
+        Bootstrap resamples (default is 1000).
+    confidence : float, optional
+        Coverage of the intervals (default is 0.95).
+    threshold : float, optional
+        Decision threshold, see ``compute_metrics``.
+    n_jobs : int, optional
+        Parallel worker processes; -1 uses all cores (default is -1).
+    random_state : int, optional
+        Seed; the same seed gives the same intervals for any ``n_jobs``.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        Per metric: ``low``, ``high`` and the bootstrap ``stderr``.
+    """
+    y_true = (np.asarray(y_true) == 1).astype(np.int8)
+    proba = np.asarray(proba, dtype=np.float64)
+    sizes = [BOOTSTRAP_BLOCK] * (n_resamples // BOOTSTRAP_BLOCK)
+    if n_resamples % BOOTSTRAP_BLOCK:
+        sizes.append(n_resamples % BOOTSTRAP_BLOCK)
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+
+    blocks = Parallel(n_jobs=n_jobs)(
+        delayed(_bootstrap_block)(y_true, proba, size, seed, threshold)
+        for size, seed in zip(sizes, seeds)
+    )
+    samples = pd.DataFrame([row for block in blocks for row in block])
+    tail = (1 - confidence) / 2 * 100
+    intervals = {}
+    for metric in samples.columns:
+        values = samples[metric].dropna().to_numpy()
+        if not len(values):
+            intervals[metric] = {"low": float("nan"), "high": float("nan"), "stderr": float("nan")}
+            continue
+        low, high = np.percentile(values, [tail, 100 - tail])
+        intervals[metric] = {
+            "low": float(low), "high": float(high), "stderr": float(values.std(ddof=1)) if len(values) > 1 else 0.0
+        }
+    return intervals
+
+
+def evaluation_report(
+    model: BaseEstimator,
+    X_test: pd.DataFrame,
+    y_test: pd.Series,
+    threshold: float = 0.5,
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    n_jobs: int = -1,
+    random_state: int = 42
+) -> Dict[str, Any]:
+    """
+    Evaluate a model in depth from a single ``predict_proba`` pass.
+
+    Parameters
+    ----------
+    model : BaseEstimator
+        The trained scikit-learn model.
+    X_test : pd.DataFrame
+        Test features.
+    y_test : pd.Series
+        True test labels.
+    threshold : float, optional
+        Decision threshold for the confusion-based metrics (default is 0.5).
+    n_resamples, confidence, n_jobs, random_state
+        See ``bootstrap_intervals``.
+
+    Returns
+    -------
+    Dict[str, Any]
+        ``metrics`` (see ``compute_metrics``), their ``confidence_intervals``,
+        the ``confusion`` counts, a ``thresholds`` table (metrics at 0.05
+        steps and the F1-optimal threshold), the ``calibration`` table, and
+        sizes and timings.
+    """
+    logger.info(f"Evaluating model with {n_resamples} bootstrap resample(s).")
+    started = time.perf_counter()
+    proba = positive_proba(model, X_test)
+    predict_seconds = time.perf_counter() - started
+    y_true = np.asarray(y_test) == 1
+
+    metrics = compute_metrics(y_true, proba, threshold)
+    started = time.perf_counter()
+    intervals = bootstrap_intervals(
+        y_true, proba, n_resamples, confidence, threshold, n_jobs, random_state
+    )
+    bootstrap_seconds = time.perf_counter() - started
+
+    curve = threshold_curve(y_true, proba)
+    f1 = 2 * curve["tp"] / (curve["tp"] + curve["fp"] + curve["positives"])
+    best = int(np.argmax(f1))
+    grid = []
+    for cut in np.round(np.arange(0.05, 1.0, 0.05), 2):
+        row = metrics_from_counts(confusion_counts(y_true, proba > cut))
+        grid.append({"threshold": float(cut), **row})
+
+    report = {
+        "model_class": type(model).__name__,
+        "rows": int(len(y_true)),
+        "positives": int(y_true.sum()),
+        "threshold": threshold,
+        "metrics": metrics,
+        "confidence_intervals": {"confidence": confidence, "n_resamples": n_resamples, **intervals},
+        "confusion": confusion_counts(y_true, proba > threshold),
+        "thresholds": {
+            "best_f1": {"threshold": float(curve["thresholds"][best]), "f1_score": float(f1[best])},
+            "grid": grid,
+        },
+        "calibration": calibration_table(y_true, proba),
+        "timings": {"predict_seconds": predict_seconds, "bootstrap_seconds": bootstrap_seconds},
+    }
+    f1_interval = intervals.get("f1_score", {})
+    logger.info(
+        f"F1 {metrics['f1_score']:.4f} [{f1_interval.get('low', float('nan')):.4f}, "
+        f"{f1_interval.get('high', float('nan')):.4f}], ROC-AUC {metrics['roc_auc']:.4f} "
+        f"(bootstrap {bootstrap_seconds:.1f}s)."
+    )
+    return report
+
+
+def write_report(report: Dict[str, Any], model_dir: str, filename: str = REPORT_FILENAME) -> str:
+    """
+    Write an evaluation report as JSON next to the saved model.
+
+    Parameters
+    ----------
+    report : Dict[str, Any]
+        Output of ``evaluation_report``.
+    model_dir : str
+        Directory holding the model.
+    filename : str, optional
+        Report filename (default is 'evaluation.json').
+
+    Returns
+    -------
+    str
+        The path written.
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    path = os.path.join(model_dir, filename)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        # NaN is not valid JSON; write undefined metrics as null.
+        json.dump(_nan_to_none(report), f, indent=2)
+    os.replace(temp_path, path)
+    logger.info(f"Evaluation report written to {path}")
+    return path
+
+
+def _nan_to_none(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _nan_to_none(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_nan_to_none(item) for item in value]
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+from typing import Dict, Optional
+
+import numpy as np
+from sklearn.base import BaseEstimator
+
+logger = logging.getLogger(__name__)
+
+# Must match the reader in backend/services/inference.py (CompiledForest.load);
+# model_training/tests/test_export.py checks the round trip.
+FOREST_MAGIC = b"CFOREST\x01"
+FOREST_FORMAT_VERSION = 1
+FOREST_ALIGNMENT = 64
+TREE_LEAF = -1
+
+
+def sha256_file(path: str) -> str:
+    """
+    Hex SHA-256 digest of a file.
+
+    Parameters
+    ----------
+    path : str
+        File to hash.
+
+    Returns
+    -------
+    str
+        The full hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Fingerprint a file the same way the API fingerprints saved models.
+
+    Parameters
+    ----------
+    path : str
+        File to hash.
+
+    Returns
+    -------
+    str
+        First 16 hex characters of the file's SHA-256 digest.
+    """
+    return sha256_file(path)[:16]
+
+
+def round_down_float32(threshold: np.ndarray) -> np.ndarray:
+    """
+    Convert float64 split thresholds to the largest float32 not above them.
+
+    scikit-learn compares float32 inputs against the thresholds, so this
+    rounding never changes a split decision.
+
+    Parameters
+    ----------
+    threshold : np.ndarray
+        Split thresholds as stored in the fitted trees.
+
+    Returns
+    -------
+    np.ndarray
+        float32 thresholds.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def flatten_forest(model: BaseEstimator) -> Dict[str, np.ndarray]:
+    """
+    Flatten all trees of a fitted forest classifier into global node arrays.
+
+    Leaves point to themselves as both children, so traversal can run a
+    fixed number of steps. Leaf class distributions are normalised per tree
+    and kept in float64 so served probabilities match ``predict_proba``
+    exactly.
+
+    Parameters
+    ----------
+    model : BaseEstimator
+        Fitted single-output ``RandomForestClassifier``.
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        Arrays ``feature``, ``threshold``, ``children_left``,
+        ``children_right``, ``leaf_proba`` and ``roots``.
+    """
+    if getattr(model, "n_outputs_", 1) != 1:
+        raise ValueError("Only single-output forests can be exported.")
+
+    n_classes = len(model.classes_)
+    features, thresholds, lefts, rights, probas, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count, dtype=np.int64)
+        is_leaf = tree.children_left == TREE_LEAF
+
+        proba = tree.value[:, 0, :n_classes].astype(np.float64, copy=True)
+        normalizer = proba.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        proba /= normalizer
+
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        probas.append(proba)
+        roots.append(offset)
+        offset += tree.node_count
+
+    return {
+        "feature": np.concatenate(features).astype("<i4"),
+        "threshold": round_down_float32(np.concatenate(thresholds)).astype("<f4"),
+        "children_left": np.concatenate(lefts).astype("<i4"),
+        "children_right": np.concatenate(rights).astype("<i4"),
+        "leaf_proba": np.ascontiguousarray(np.concatenate(probas), dtype="<f8"),
+        "roots": np.asarray(roots, dtype="<i4"),
+    }
+
+
+def export_forest(
+    model: BaseEstimator,
+    path: str,
+    source_fingerprint: Optional[str] = None
+) -> str:
+    """
+    Write a fitted forest as a compact, memory-mappable artifact.
+
+    Layout: 8-byte magic, little-endian uint64 header length, a JSON header
+    (metadata plus dtype, shape and offset of every array) and the raw
+    arrays, each aligned to 64 bytes. The file is written to a temporary
+    name and renamed into place.
+
+    Parameters
+    ----------
+    model : BaseEstimator
+        Fitted single-output ``RandomForestClassifier``.
+    path : str
+        Destination file, conventionally ``saved_models/model.forest``.
+    source_fingerprint : str, optional
+        Fingerprint of the pickled model the artifact was built from; the
+        API only uses the artifact if it matches the model it loads.
+
+    Returns
+    -------
+    str
+        The path written.
+    """
+    arrays = flatten_forest(model)
+    feature_names = getattr(model, "feature_names_in_", None)
+    header = {
+        "version": FOREST_FORMAT_VERSION,
+        "max_depth": max(int(e.tree_.max_depth) for e in model.estimators_),
+        "classes": np.asarray(model.classes_).tolist(),
+        "feature_names": list(feature_names) if feature_names is not None else None,
+        "source_fingerprint": source_fingerprint,
+        "arrays": {},
+    }
+
+    # The header stores absolute offsets, so size it with placeholders first.
+    def layout(header_size: int) -> int:
+        offset = len(FOREST_MAGIC) + 8 + header_size
+        for name, array in arrays.items():
+            offset += -offset % FOREST_ALIGNMENT
+            header["arrays"][name] = {
+                "dtype": array.dtype.str, "shape": list(array.shape), "offset": offset
+            }
+            offset += array.nbytes
+        return offset
+
+    header_size = 0
+    while True:
+        layout(header_size)
+        encoded = json.dumps(header).encode()
+        if len(encoded) <= header_size:
+            break
+        header_size = len(encoded) + 64
+    encoded = encoded.ljust(header_size, b" ")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(FOREST_MAGIC)
+        f.write(struct.pack("<Q", header_size))
+        f.write(encoded)
+        for name, array in arrays.items():
+            f.write(b"\0" * (header["arrays"][name]["offset"] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(temp_path, path)
+
+    size = os.path.getsize(path)
+    logger.info(f"Compact forest exported to {path} ({size / 1024:.0f} KiB).")
+    return path
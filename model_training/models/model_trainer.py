@@ -1,21 +1,27 @@
 import logging
-from typing import Any
+from typing import Any, Iterable, Optional, Tuple
 import pandas as pd
 from sklearn.base import BaseEstimator
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
 import joblib
 import os
 
+from model_training.models.export import export_forest, file_fingerprint
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..', 'saved_models')
+)
+
 
 def train_model(
     model: BaseEstimator,
     X_train: pd.DataFrame,
     y_train: pd.Series,
-    model_dir: str = os.path.abspath(
-        os.path.join(os.path.dirname(__file__), '..', '..', 'saved_models')
-    ),
-    model_filename: str = "model.joblib"
+    model_dir: str = DEFAULT_MODEL_DIR,
+    model_filename: str = "model.joblib",
+    forest_filename: str = "model.forest"
 ) -> BaseEstimator:
     """
     Train a scikit-learn model and save it to disk.
@@ -32,6 +38,9 @@ def train_model(
         Directory to save the trained model (default is 'artifacts').
     model_filename : str, optional
         Filename for the saved model (default is 'model.joblib').
+    forest_filename : str, optional
+        Filename for the compact, memory-mappable export of a random forest
+        (default is 'model.forest'). Set to None to skip the export.
 
     Returns
     -------
@@ -45,12 +54,134 @@ def train_model(
     model.fit(X_train, y_train)
     logger.info("Model training complete.")
 
+    save_model(model, model_dir, model_filename, forest_filename)
+    return model
+
+
+def save_model(
+    model: BaseEstimator,
+    model_dir: str = DEFAULT_MODEL_DIR,
+    model_filename: str = "model.joblib",
+    forest_filename: Optional[str] = "model.forest"
+) -> str:
+    """
+    Save a fitted model, plus the compact forest export for random forests.
+
+    Parameters
+    ----------
+    model : BaseEstimator
+        The fitted model.
+    model_dir : str, optional
+        Directory to save the model in (default is 'saved_models').
+    model_filename : str, optional
+        Filename for the saved model (default is 'model.joblib').
+    forest_filename : str, optional
+        Filename for the compact forest export (default is 'model.forest');
+        None skips the export.
+
+    Returns
+    -------
+    str
+        Path of the saved model.
+    """
     # Ensure the model directory exists
     os.makedirs(model_dir, exist_ok=True)
     model_path = os.path.join(model_dir, model_filename)
     joblib.dump(model, model_path)
     logger.info(f"Model saved to {model_path}")
 
-    return model
+    if forest_filename and isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        export_forest(
+            model,
+            os.path.join(model_dir, forest_filename),
+            source_fingerprint=file_fingerprint(model_path)
+        )
+    return model_path
 
 
+def train_model_streaming(
+    model: BaseEstimator,
+    chunks: Iterable[Tuple[pd.DataFrame, pd.Series]],
+    trees_per_chunk: int = 10,
+    min_chunk_rows: int = 1000,
+    model_dir: str = DEFAULT_MODEL_DIR,
+    model_filename: str = "model.joblib",
+    forest_filename: Optional[str] = "model.forest"
+) -> BaseEstimator:
+    """
+    Grow a forest chunk by chunk for datasets that do not fit in memory.
+
+    The forest is fitted with ``warm_start``: every chunk adds
+    ``trees_per_chunk`` new trees trained on that chunk only, while the
+    trees from earlier chunks are kept as they are. Only one chunk is held
+    in memory at a time. Chunks smaller than ``min_chunk_rows`` or missing
+    a class are merged with the following ones first, so every tree sees
+    both outcomes.
+
+    Parameters
+    ----------
+    model : BaseEstimator
+        Unfitted ``RandomForestClassifier`` or ``ExtraTreesClassifier``.
+    chunks : Iterable[Tuple[pd.DataFrame, pd.Series]]
+        ``(X_train, y_train)`` pairs, e.g. from ``iter_split(..., 'train')``.
+    trees_per_chunk : int, optional
+        Trees added per chunk (default is 10).
+    min_chunk_rows : int, optional
+        Smallest number of rows a batch of trees is trained on (default is 1000).
+    model_dir, model_filename, forest_filename
+        See ``save_model``.
+
+    Returns
+    -------
+    BaseEstimator
+        The trained model.
+
+    Raises
+    ------
+    ValueError
+        If the model cannot grow incrementally or no chunk had both classes.
+    """
+    if not isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        raise ValueError(
+            f"Streaming training needs a forest that supports warm_start, got {model.__class__.__name__}."
+        )
+    logger.info(f"Training model incrementally: {model.__class__.__name__}, {trees_per_chunk} tree(s) per chunk")
+    model.set_params(warm_start=True)
+
+    n_trees = 0
+    n_rows = 0
+    pending = []
+
+    def fit_pending() -> None:
+        nonlocal n_trees, n_rows
+        X = pd.concat([X_part for X_part, _ in pending])
+        y = pd.concat([y_part for _, y_part in pending])
+        pending.clear()
+        n_trees += trees_per_chunk
+        n_rows += len(X)
+        model.set_params(n_estimators=n_trees)
+        model.fit(X, y)
+        logger.info(f"Grew forest to {n_trees} tree(s) after {n_rows} training row(s).")
+
+    buffered = 0
+    classes = set()
+    for X_chunk, y_chunk in chunks:
+        pending.append((X_chunk, y_chunk))
+        buffered += len(X_chunk)
+        classes.update(y_chunk.unique().tolist())
+        if buffered >= min_chunk_rows and len(classes) > 1:
+            fit_pending()
+            buffered = 0
+            classes = set()
+    if pending and len(classes) > 1:
+        fit_pending()
+    elif pending:
+        logger.warning(f"Skipped the last {buffered} training row(s): only one class present.")
+
+    if n_trees == 0:
+        raise ValueError("No training chunk contained both classes.")
+    model.set_params(warm_start=False)
+    logger.info("Model training complete.")
+
+    save_model(model, model_dir, model_filename, forest_filename)
+    return model
@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import joblib
+from sklearn.base import BaseEstimator
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+from model_training.models.evaluate import REPORT_FILENAME, write_report
+from model_training.models.export import export_forest, sha256_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..', 'saved_models', 'registry')
+)
+# Read by the API (backend/services/registry.py); keep the layout in sync.
+MODEL_FILENAME = "model.joblib"
+FOREST_FILENAME = "model.forest"
+METADATA_FILENAME = "metadata.json"
+ACTIVE_FILENAME = "ACTIVE"
+
+
+def register_model(
+    model: BaseEstimator,
+    metrics: Dict[str, float],
+    feature_order: List[str],
+    registry_dir: str = DEFAULT_REGISTRY_DIR,
+    version: Optional[str] = None,
+    activate: bool = False,
+    extra: Optional[Dict[str, Any]] = None,
+    report: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Publish a trained model as a new immutable version in the model registry.
+
+    Each version is a directory holding the pickled model, the compact forest
+    export (for random forests) and ``metadata.json`` with the evaluation
+    metrics, the feature order the model expects and SHA-256 checksums of
+    the artifacts. The directory is assembled under a temporary name and
+    renamed into place, so the API never sees a partial version.
+
+    Parameters
+    ----------
+    model : BaseEstimator
+        The fitted model.
+    metrics : Dict[str, float]
+        Test-set metrics from ``evaluate_model``.
+    feature_order : List[str]
+        Column order the model was trained on.
+    registry_dir : str, optional
+        Registry root (default is 'saved_models/registry').
+    version : str, optional
+        Version name; defaults to a UTC timestamp plus a checksum prefix.
+    activate : bool, optional
+        Also make this the active version (default is False).
+    extra : Dict[str, Any], optional
+        Additional metadata to record.
+    report : Dict[str, Any], optional
+        Full report from ``evaluation_report``, stored as ``evaluation.json``.
+
+    Returns
+    -------
+    str
+        The registered version name.
+    """
+    os.makedirs(registry_dir, exist_ok=True)
+    staging = os.path.join(registry_dir, f".staging-{os.getpid()}-{time.time_ns()}")
+    os.makedirs(staging)
+    try:
+        model_path = os.path.join(staging, MODEL_FILENAME)
+        joblib.dump(model, model_path)
+        checksums = {MODEL_FILENAME: sha256_file(model_path)}
+        fingerprint = checksums[MODEL_FILENAME][:16]
+
+        if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+            forest_path = os.path.join(staging, FOREST_FILENAME)
+            export_forest(model, forest_path, source_fingerprint=fingerprint)
+            checksums[FOREST_FILENAME] = sha256_file(forest_path)
+
+        if report is not None:
+            write_report(report, staging, REPORT_FILENAME)
+
+        created = datetime.now(timezone.utc)
+        version = version or f"{created:%Y%m%d%H%M%S}-{fingerprint[:8]}"
+        metadata = {
+            "version": version,
+            "created_at": created.isoformat(),
+            "model_class": type(model).__name__,
+            "params": {
+                key: value for key, value in model.get_params().items()
+                if isinstance(value, (int, float, str, bool, type(None)))
+            },
+            "metrics": {k: float(v) for k, v in metrics.items()},
+            "feature_order": list(feature_order),
+            "fingerprint": fingerprint,
+            "checksums": checksums,
+            **(extra or {}),
+        }
+        with open(os.path.join(staging, METADATA_FILENAME), "w") as f:
+            json.dump(metadata, f, indent=2)
+
+        target = os.path.join(registry_dir, version)
+        if os.path.exists(target):
+            raise FileExistsError(f"Model version {version} is already registered.")
+        os.rename(staging, target)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    logger.info(f"Registered model version {version} in {registry_dir}")
+    if activate:
+        activate_version(version, registry_dir)
+    return version
+
+
+def activate_version(version: str, registry_dir: str = DEFAULT_REGISTRY_DIR) -> None:
+    """
+    Point the registry's ``ACTIVE`` file at a registered version.
+
+    Running API workers watching the registry swap to it without a restart.
+
+    Parameters
+    ----------
+    version : str
+        A registered version name.
+    registry_dir : str, optional
+        Registry root (default is 'saved_models/registry').
+    """
+    if not os.path.isfile(os.path.join(registry_dir, version, METADATA_FILENAME)):
+        raise FileNotFoundError(f"Model version {version} is not registered in {registry_dir}.")
+    temp_path = os.path.join(registry_dir, f".{ACTIVE_FILENAME}.{os.getpid()}.tmp")
+    with open(temp_path, "w") as f:
+        f.write(version + "\n")
+    os.replace(temp_path, os.path.join(registry_dir, ACTIVE_FILENAME))
+    logger.info(f"Activated model version {version}")
@@ -0,0 +1,430 @@
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, clone
+from sklearn.ensemble import (
+    ExtraTreesClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+)
+from sklearn.model_selection import StratifiedKFold
+
+from model_training.models.evaluate import evaluate_model
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '.cache', 'search')
+)
+
+# Estimator family -> (factory, hyperparameter grid). Every combination of the
+# grid is cross-validated. Estimators are fitted single-threaded; the search
+# parallelises over (candidate, fold) pairs instead.
+SEARCH_SPACE: Dict[str, Tuple[Callable[..., BaseEstimator], Dict[str, List[Any]]]] = {
+    "random_forest": (
+        RandomForestClassifier,
+        {
+            "n_estimators": [50, 100, 200],
+            "max_depth": [None, 12],
+            "min_samples_leaf": [1, 2],
+        },
+    ),
+    "extra_trees": (
+        ExtraTreesClassifier,
+        {
+            "n_estimators": [100, 200],
+            "max_depth": [None, 16],
+            "min_samples_leaf": [1, 2],
+        },
+    ),
+    "hist_gradient_boosting": (
+        HistGradientBoostingClassifier,
+        {
+            "learning_rate": [0.05, 0.1],
+            "max_iter": [200, 400],
+            "max_leaf_nodes": [31, 63],
+        },
+    ),
+}
+
+
+# Families the API serves through its compiled, memory-mapped forest engine
+# (COMPILABLE_MODELS in backend/services/utils.py); keep in sync. Any other
+# family is served by calling the pickled model directly.
+COMPILABLE_FAMILIES = frozenset({"random_forest", "extra_trees"})
+# Bump when the per-fold result format changes, so cached folds are refitted
+FOLD_RESULT_VERSION = 2
+
+
+def expand_space(
+    space: Dict[str, Tuple[Callable[..., BaseEstimator], Dict[str, List[Any]]]]
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    List every (family, params) candidate of a search space.
+
+    Parameters
+    ----------
+    space : dict
+        Mapping of family name to ``(factory, grid)``.
+
+    Returns
+    -------
+    List[Tuple[str, Dict[str, Any]]]
+        One entry per grid combination, in a stable order.
+    """
+    candidates = []
+    for family, (_, grid) in space.items():
+        keys = sorted(grid)
+        for values in itertools.product(*(grid[key] for key in keys)):
+            candidates.append((family, dict(zip(keys, values))))
+    return candidates
+
+
+def build_estimator(
+    family: str,
+    params: Dict[str, Any],
+    space: Dict[str, Tuple[Callable[..., BaseEstimator], Dict[str, List[Any]]]],
+    random_state: int = 42,
+    n_jobs: Optional[int] = None
+) -> BaseEstimator:
+    """
+    Instantiate an unfitted estimator for a search candidate.
+
+    Parameters
+    ----------
+    family : str
+        Family name in ``space``.
+    params : dict
+        Hyperparameters of the candidate.
+    space : dict
+        The search space the candidate came from.
+    random_state : int, optional
+        Seed passed to estimators that accept one (default is 42).
+    n_jobs : int, optional
+        Threads for estimators that accept ``n_jobs`` (default is None).
+
+    Returns
+    -------
+    BaseEstimator
+        The configured estimator.
+    """
+    factory = space[family][0]
+    estimator = factory(**params)
+    accepted = estimator.get_params()
+    extra = {}
+    if "random_state" in accepted:
+        extra["random_state"] = random_state
+    if "n_jobs" in accepted:
+        extra["n_jobs"] = n_jobs
+    return estimator.set_params(**extra)
+
+
+def data_fingerprint(X: pd.DataFrame, y: pd.Series) -> str:
+    """
+    Hash the training data so cached fold results are never reused across datasets.
+
+    Parameters
+    ----------
+    X : pd.DataFrame
+        Training features.
+    y : pd.Series
+        Training target.
+
+    Returns
+    -------
+    str
+        Hex digest.
+    """
+    digest = hashlib.sha256()
+    digest.update(",".join(map(str, X.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(y, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _task_key(
+    family: str,
+    params: Dict[str, Any],
+    fold: int,
+    n_splits: int,
+    random_state: int,
+    fingerprint: str
+) -> str:
+    payload = json.dumps(
+        [family, params, fold, n_splits, random_state, fingerprint, FOLD_RESULT_VERSION],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+def engine_steps_per_row(estimator: BaseEstimator) -> Optional[int]:
+    """
+    Serving cost of a fitted forest in the API's compiled engine.
+
+    The engine routes a batch through all trees level by level, one
+    gather/compare step per tree per level down to the deepest tree, so
+    ``n_trees * max_depth`` is its work per row. Unlike wall-clock timings
+    taken while the search keeps every core busy, it is free of noise.
+
+    Parameters
+    ----------
+    estimator : BaseEstimator
+        A fitted estimator.
+
+    Returns
+    -------
+    int or None
+        Steps per row, or None if the estimator is not a forest of trees.
+    """
+    trees = getattr(estimator, "estimators_", None)
+    if not trees or not all(hasattr(tree, "tree_") for tree in trees):
+        return None
+    return len(trees) * max(tree.tree_.max_depth for tree in trees)
+
+
+def _fit_fold(
+    family: str,
+    params: Dict[str, Any],
+    space: Dict[str, Tuple[Callable[..., BaseEstimator], Dict[str, List[Any]]]],
+    X: np.ndarray,
+    y: np.ndarray,
+    train_idx: np.ndarray,
+    val_idx: np.ndarray,
+    fold: int,
+    random_state: int,
+    cache_path: str
+) -> Dict[str, Any]:
+    """Fit and score one candidate on one fold, then persist the result."""
+    estimator = build_estimator(family, params, space, random_state, n_jobs=1)
+
+    started = time.perf_counter()
+    estimator.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    metrics = evaluate_model(estimator, X[val_idx], y[val_idx])
+    predict_seconds = time.perf_counter() - started
+
+    result = {
+        "family": family,
+        "params": params,
+        "fold": fold,
+        "metrics": {key: float(value) for key, value in metrics.items()},
+        "fit_seconds": fit_seconds,
+        "predict_us_per_row": predict_seconds / max(1, len(val_idx)) * 1e6,
+        "engine_steps_per_row": engine_steps_per_row(estimator),
+    }
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(result, f)
+    os.replace(temp_path, cache_path)
+    return result
+
+
+def summarize(fold_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Aggregate per-fold results into one row per candidate.
+
+    Parameters
+    ----------
+    fold_results : List[dict]
+        Results of ``_fit_fold``.
+
+    Returns
+    -------
+    List[dict]
+        Per candidate: family, params, mean and standard error of every
+        metric, mean fit time and prediction latency, and mean engine cost.
+    """
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for result in fold_results:
+        key = json.dumps([result["family"], result["params"]], sort_keys=True, default=str)
+        grouped.setdefault(key, []).append(result)
+
+    summary = []
+    for results in grouped.values():
+        row = {
+            "family": results[0]["family"],
+            "params": results[0]["params"],
+            "folds": len(results),
+            "fit_seconds": float(np.mean([r["fit_seconds"] for r in results])),
+            "predict_us_per_row": float(np.mean([r["predict_us_per_row"] for r in results])),
+            "engine_steps_per_row": (
+                float(np.mean([r["engine_steps_per_row"] for r in results]))
+                if all(r.get("engine_steps_per_row") is not None for r in results) else None
+            ),
+            "metrics": {},
+        }
+        for metric in results[0]["metrics"]:
+            values = np.array([r["metrics"][metric] for r in results])
+            stderr = values.std(ddof=1) / np.sqrt(len(values)) if len(values) > 1 else 0.0
+            row["metrics"][metric] = {"mean": float(values.mean()), "stderr": float(stderr)}
+        summary.append(row)
+    return summary
+
+
+def select_best(
+    summary: List[Dict[str, Any]],
+    scoring: str = "f1_score",
+    tolerance: Optional[float] = None,
+    compiled_only: bool = True
+) -> Dict[str, Any]:
+    """
+    Pick the cheapest-to-serve candidate whose score is statistically tied with the best.
+
+    Candidates within ``tolerance`` of the best mean score (by default, one
+    standard error of the best candidate) are considered equally accurate.
+    By default only families in ``COMPILABLE_FAMILIES`` are eligible, and
+    ties are broken by ``engine_steps_per_row``, the work the API's compiled
+    engine does per row. With ``compiled_only=False`` every family competes
+    and ties are broken by the ``predict_proba`` latency measured during
+    the search.
+
+    Parameters
+    ----------
+    summary : List[dict]
+        Output of ``summarize``.
+    scoring : str, optional
+        Metric from ``evaluate_model`` to maximise (default is 'f1_score').
+    tolerance : float, optional
+        Allowed shortfall from the best mean score.
+    compiled_only : bool, optional
+        Only consider families the API can compile (default is True).
+
+    Returns
+    -------
+    dict
+        The selected summary row.
+    """
+    eligible = [
+        row for row in summary if not compiled_only or row["family"] in COMPILABLE_FAMILIES
+    ]
+    if not summary:
+        raise ValueError("No search results to select from.")
+    if not eligible:
+        raise ValueError(
+            "No candidate from a family the API can compile; pass compiled_only=False to allow others."
+        )
+    best = max(eligible, key=lambda row: row["metrics"][scoring]["mean"])
+    if tolerance is None:
+        tolerance = best["metrics"][scoring]["stderr"]
+    threshold = best["metrics"][scoring]["mean"] - tolerance
+    tied = [row for row in eligible if row["metrics"][scoring]["mean"] >= threshold]
+    if compiled_only:
+        return min(tied, key=lambda row: (row["engine_steps_per_row"], row["predict_us_per_row"]))
+    return min(tied, key=lambda row: row["predict_us_per_row"])
+
+
+def run_search(
+    X: pd.DataFrame,
+    y: pd.Series,
+    space: Optional[Dict[str, Tuple[Callable[..., BaseEstimator], Dict[str, List[Any]]]]] = None,
+    n_splits: int = 5,
+    scoring: str = "f1_score",
+    tolerance: Optional[float] = None,
+    n_jobs: int = -1,
+    random_state: int = 42,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    compiled_only: bool = True
+) -> Tuple[BaseEstimator, List[Dict[str, Any]]]:
+    """
+    Cross-validate every candidate of a search space in parallel and pick the best.
+
+    Every (candidate, fold) pair is an independent job spread over
+    ``n_jobs`` processes. Each finished fold is written to ``cache_dir``
+    under a key derived from the candidate, the fold split and a hash of the
+    data, so re-running an interrupted (or extended) search only fits the
+    folds that are missing.
+
+    Parameters
+    ----------
+    X : pd.DataFrame
+        Training features.
+    y : pd.Series
+        Training target.
+    space : dict, optional
+        Search space (default is ``SEARCH_SPACE``).
+    n_splits : int, optional
+        Stratified cross-validation folds (default is 5).
+    scoring : str, optional
+        Metric from ``evaluate_model`` to maximise (default is 'f1_score').
+    tolerance : float, optional
+        See ``select_best``.
+    n_jobs : int, optional
+        Parallel worker processes; -1 uses all cores (default is -1).
+    random_state : int, optional
+        Seed for the fold split and the estimators (default is 42).
+    cache_dir : str, optional
+        Directory for cached fold results.
+    compiled_only : bool, optional
+        Only fit and select families the API can compile; see ``select_best``
+        (default is True).
+
+    Returns
+    -------
+    Tuple[BaseEstimator, List[dict]]
+        The unfitted best estimator (ready for ``train_model``, using all
+        cores) and the
+        per-candidate summary, best first.
+    """
+    space = space or SEARCH_SPACE
+    candidates = expand_space(space)
+    if compiled_only:
+        # No point fitting folds for families select_best would discard
+        candidates = [(family, params) for family, params in candidates if family in COMPILABLE_FAMILIES]
+        if not candidates:
+            raise ValueError(
+                "No candidate from a family the API can compile; pass compiled_only=False to allow others."
+            )
+    fingerprint = data_fingerprint(X, y)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    X_values = X.to_numpy()
+    y_values = y.to_numpy()
+    splits = list(StratifiedKFold(n_splits, shuffle=True, random_state=random_state).split(X_values, y_values))
+
+    cached, pending = [], []
+    for family, params in candidates:
+        for fold, (train_idx, val_idx) in enumerate(splits):
+            path = os.path.join(
+                cache_dir, _task_key(family, params, fold, n_splits, random_state, fingerprint) + ".json"
+            )
+            try:
+                with open(path) as f:
+                    cached.append(json.load(f))
+                continue
+            except (OSError, ValueError):
+                pending.append((family, params, train_idx, val_idx, fold, path))
+
+    logger.info(
+        f"Search: {len(candidates)} candidate(s) x {n_splits} fold(s); "
+        f"{len(cached)} cached, {len(pending)} to fit."
+    )
+    started = time.perf_counter()
+    fitted = Parallel(n_jobs=n_jobs, verbose=0)(
+        delayed(_fit_fold)(family, params, space, X_values, y_values, train_idx, val_idx, fold, random_state, path)
+        for family, params, train_idx, val_idx, fold, path in pending
+    )
+    logger.info(f"Search fitted {len(fitted)} fold(s) in {time.perf_counter() - started:.1f}s.")
+
+    summary = summarize(cached + fitted)
+    best = select_best(summary, scoring, tolerance, compiled_only)
+    summary.sort(key=lambda row: (row is not best, -row["metrics"][scoring]["mean"]))
+
+    with open(os.path.join(cache_dir, f"summary-{fingerprint}.json"), "w") as f:
+        json.dump({"scoring": scoring, "n_splits": n_splits, "candidates": summary}, f, indent=2)
+    logger.info(
+        f"Selected {best['family']} {best['params']}: "
+        f"{scoring}={best['metrics'][scoring]['mean']:.4f} "
+        f"(+/- {best['metrics'][scoring]['stderr']:.4f}), "
+        f"{best['predict_us_per_row']:.1f} us/row"
+        + (f", {best['engine_steps_per_row']:.0f} engine steps/row." if best["engine_steps_per_row"] else ".")
+    )
+    # The final fit runs alone, so let the winner use every core
+    return build_estimator(best["family"], best["params"], space, random_state, n_jobs=-1), summary
@@ -1,3 +1,4 @@
+import argparse
 import logging
 import sys
 import os
@@ -6,11 +7,13 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from typing import NoReturn
 from model_training.data.load_data import load_data
-from model_training.features.preprocess import preprocess_data
-from model_training.models.model_trainer import train_model
-from model_training.models.evaluate import evaluate_model
-from sklearn.tree import DecisionTreeClassifier
+from model_training.features.preprocess import iter_split, preprocess_data
+from model_training.models.model_trainer import DEFAULT_MODEL_DIR, train_model, train_model_streaming
+from model_training.models.evaluate import evaluate_model_streaming, evaluation_report, write_report
+from model_training.models.registry import register_model
+from model_training.models.search import run_search
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,9 +21,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main() -> NoReturn:
+def main(streaming: bool = False, chunksize: int = 100_000, compiled_only: bool = True) -> NoReturn:
     """
     Main function to run the training and evaluation pipeline.
+
+    Parameters
+    ----------
+    streaming : bool, optional
+        Read the dataset in chunks and grow the forest incrementally instead
+        of loading it whole (default is False). Skips the model search.
+    chunksize : int, optional
+        Rows per chunk in streaming mode (default is 100000).
+    compiled_only : bool, optional
+        Only select model families the API can serve through its compiled
+        forest engine (default is True).
     """
     dataset_csv_path = os.path.join(
         os.path.dirname(os.path.abspath(__file__)),
@@ -30,6 +44,10 @@ def main() -> NoReturn:
     print(f"Current directory: {dataset_csv_path}")
 
     try:
+        if streaming:
+            run_streaming(dataset_csv_path, chunksize)
+            return
+
         # Load
         df = load_data(local_path=dataset_csv_path)
         logger.info("Data loaded successfully.")
@@ -38,17 +56,68 @@ def main() -> NoReturn:
         X_train, X_test, y_train, y_test = preprocess_data(df)
         logger.info("Data preprocessed successfully.")
 
-        model = RandomForestClassifier(n_estimators=100)
+        # Cross-validated search over estimator families (cached, resumable)
+        model, _ = run_search(X_train, y_train, compiled_only=compiled_only)
 
         model = train_model(model, X_train, y_train)
         logger.info("Model trained successfully.")
 
-        # Evaluate
-        metrics = evaluate_model(model, X_test, y_test)
+        # Evaluate: one predict_proba pass, full metrics, bootstrap intervals
+        report = evaluation_report(model, X_test, y_test)
+        write_report(report, DEFAULT_MODEL_DIR)
+        metrics = report["metrics"]
         logger.info(f"Evaluation metrics: {metrics}")
 
+        # Register (activate it via the API's admin endpoint once reviewed)
+        version = register_model(model, metrics, list(X_train.columns), report=report)
+        logger.info(f"Model registered as version {version}.")
+
     except Exception as e:
         logger.error(f"Pipeline failed: {e}", exc_info=True)
 
+def run_streaming(dataset_csv_path: str, chunksize: int) -> None:
+    """
+    Train, evaluate and register a forest without loading the dataset whole.
+
+    The file is read twice, chunk by chunk: once to grow the forest on the
+    training rows and once to evaluate it on the held-out rows. Rows are
+    assigned to either side by a hash of their Id, so both passes agree.
+
+    Parameters
+    ----------
+    dataset_csv_path : str
+        CSV file to train on.
+    chunksize : int
+        Rows per chunk.
+    """
+    def chunks(part: str):
+        return iter_split(load_data(local_path=dataset_csv_path, chunksize=chunksize), part)
+
+    model = RandomForestClassifier(min_samples_leaf=2, random_state=42)
+    model = train_model_streaming(model, chunks('train'))
+    logger.info("Model trained successfully.")
+
+    metrics = evaluate_model_streaming(model, chunks('test'))
+    logger.info(f"Evaluation metrics: {metrics}")
+
+    feature_order = list(model.feature_names_in_)
+    version = register_model(model, metrics, feature_order, extra={"training": "streaming"})
+    logger.info(f"Model registered as version {version}.")
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train and register the diabetes model.")
+    parser.add_argument(
+        "--streaming", action="store_true",
+        help="train out of core, reading the dataset in chunks"
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=100_000,
+        help="rows per chunk in streaming mode (default: 100000)"
+    )
+    parser.add_argument(
+        "--any-family", action="store_true",
+        help="let the search select model families the API cannot compile"
+    )
+    args = parser.parse_args()
+    main(streaming=args.streaming, chunksize=args.chunksize, compiled_only=not args.any_family)
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The pipeline imports its packages as ``model_training.*``, as when run from
+# the repository root; the export tests also load artifacts with the API's
+# reader, which imports relative to backend/.
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BACKEND_DIR = os.path.join(REPO_ROOT, "backend")
+for path in (REPO_ROOT, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.dummy import DummyClassifier
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+
+from model_training.models.evaluate import evaluate_model, evaluate_model_streaming
+
+
+def baseline_metrics(model, X_test, y_test):
+    """What evaluate_model returned before it moved to a single predict_proba pass."""
+    y_pred = model.predict(X_test)
+    return {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred, zero_division=0),
+        "recall": recall_score(y_test, y_pred, zero_division=0),
+        "f1_score": f1_score(y_test, y_pred, zero_division=0)
+    }
+
+
+@pytest.fixture(scope="module")
+def split():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(600, 5)), columns=[f"f{i}" for i in range(5)])
+    y = pd.Series((X["f0"] + 0.5 * X["f1"] + rng.normal(scale=0.8, size=len(X)) > 0).astype(int))
+    return X.iloc[:400], y.iloc[:400], X.iloc[400:], y.iloc[400:]
+
+
+@pytest.mark.parametrize("model", [
+    # Ten fully grown trees vote, so some test rows score exactly 0.5
+    RandomForestClassifier(n_estimators=10, random_state=0),
+    LogisticRegression(),
+    DummyClassifier(strategy="constant", constant=0),
+], ids=["forest", "logistic", "all-negative"])
+def test_metrics_match_the_baseline(split, model):
+    X_train, y_train, X_test, y_test = split
+    model.fit(X_train, y_train)
+    expected = baseline_metrics(model, X_test, y_test)
+
+    metrics = evaluate_model(model, X_test, y_test)
+    assert list(metrics) == list(expected)
+    for key, value in expected.items():
+        assert metrics[key] == pytest.approx(value, abs=1e-12), key
+
+    chunks = [(X_test.iloc[i:i + 64], y_test.iloc[i:i + 64]) for i in range(0, len(X_test), 64)]
+    streamed = evaluate_model_streaming(model, chunks)
+    assert streamed == pytest.approx(metrics, abs=1e-12)
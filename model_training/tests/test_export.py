@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+from model_training.models.export import export_forest, file_fingerprint, flatten_forest, sha256_file
+from services.inference import CompiledForest
+from services.registry import _sha256_file
+from services.utils import model_fingerprint
+
+
+@pytest.fixture(scope="module")
+def data():
+    X, y = make_classification(n_samples=400, n_features=8, n_informative=5, random_state=0)
+    return pd.DataFrame(X, columns=[f"f{i}" for i in range(X.shape[1])]), y
+
+
+@pytest.mark.parametrize("factory", [RandomForestClassifier, ExtraTreesClassifier])
+def test_exported_forest_matches_sklearn(tmp_path, data, factory):
+    X, y = data
+    model = factory(n_estimators=20, max_depth=8, random_state=0).fit(X, y)
+    path = export_forest(model, str(tmp_path / "model.forest"), source_fingerprint="abc")
+
+    engine = CompiledForest.load(path)
+    assert engine.source_fingerprint == "abc"
+    np.testing.assert_array_equal(engine.predict_proba(X), model.predict_proba(X))
+
+    # Inputs straddling every split threshold by one float32 step
+    rng = np.random.default_rng(0)
+    thresholds = np.concatenate([e.tree_.threshold[e.tree_.children_left != -1] for e in model.estimators_])
+    picked = rng.choice(thresholds, size=(500, X.shape[1])).astype(np.float32)
+    for direction in (-np.inf, np.inf):
+        rows = pd.DataFrame(np.nextafter(picked, np.float32(direction)), columns=X.columns)
+        np.testing.assert_array_equal(engine.predict_proba(rows), model.predict_proba(rows))
+
+
+def test_export_layout_matches_the_api_compiler(data):
+    X, y = data
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    exported = flatten_forest(model)
+    compiled = CompiledForest.from_model(model)
+    for name, array in exported.items():
+        np.testing.assert_array_equal(array, getattr(compiled, name), err_msg=name)
+
+
+def test_fingerprints_match_the_api(tmp_path):
+    path = tmp_path / "blob.bin"
+    path.write_bytes(np.random.default_rng(0).bytes(3 * 1024 * 1024 + 17))
+    assert sha256_file(str(path)) == _sha256_file(str(path))
+    assert file_fingerprint(str(path)) == model_fingerprint(str(path))
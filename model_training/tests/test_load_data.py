@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from model_training.data.load_data import load_data
+
+HEADER = "Id,Pregnancies,Glucose,BloodPressure,SkinThickness,Insulin,BMI,DiabetesPedigreeFunction,Age,Outcome\n"
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    def write(*rows):
+        path = tmp_path / "data.csv"
+        path.write_text(HEADER + "".join(row + "\n" for row in rows))
+        return str(path)
+    return write
+
+
+def test_small_int_columns_are_narrowed(write_csv):
+    df = load_data(local_path=write_csv("1,6,148,72,35,0,33.6,0.627,50,1", "2,1,85,66,29,0,26.6,0.351,31,0"),
+                   cache_dir=None)
+    assert df["Pregnancies"].dtype == np.uint8
+    assert df["Age"].dtype == np.uint8
+    assert df["Age"].tolist() == [50, 31]
+
+
+def test_missing_age_does_not_abort_the_load(write_csv, tmp_path):
+    path = write_csv("1,6,148,72,35,0,33.6,0.627,,1", "2,1,85,66,29,0,26.6,0.351,31,0")
+    cache_dir = str(tmp_path / "cache")
+    df = load_data(local_path=path, cache_dir=cache_dir)
+    assert df["Age"].dtype == np.float32
+    assert np.isnan(df["Age"].iloc[0]) and df["Age"].iloc[1] == 31
+    assert df["Pregnancies"].dtype == np.uint8
+
+    # The cached columns come back the same
+    cached = load_data(local_path=path, cache_dir=cache_dir)
+    assert cached["Age"].dtype == np.float32
+    assert cached.equals(df)
+
+
+def test_out_of_range_values_are_kept(write_csv):
+    df = load_data(local_path=write_csv("1,-1,148,72,35,0,33.6,0.627,300,1"), cache_dir=None)
+    assert df["Pregnancies"].tolist() == [-1]
+    assert df["Age"].tolist() == [300]
@@ -0,0 +1,43 @@
+import os
+
+import pandas as pd
+import pytest
+
+from model_training.data.load_data import load_data
+from model_training.features.preprocess import hash_split_mask, iter_split
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), "..", "dataset", "Healthcare-Diabetes.csv")
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return load_data(local_path=DATASET_PATH, cache_dir=None)
+
+
+def held_out_ids(chunks, **kwargs):
+    """Ids of the rows assigned to the test set, chunk by chunk."""
+    return set(pd.concat([chunk.loc[hash_split_mask(chunk, **kwargs), "Id"] for chunk in chunks]))
+
+
+def test_split_is_stable_across_chunk_sizes_and_order(dataset):
+    whole = held_out_ids([dataset])
+    for chunksize in (7, 97, 1000):
+        assert held_out_ids(load_data(local_path=DATASET_PATH, chunksize=chunksize)) == whole
+    shuffled = dataset.sample(frac=1.0, random_state=0)
+    assert held_out_ids([shuffled.iloc[:500], shuffled.iloc[500:]]) == whole
+    assert abs(len(whole) / len(dataset) - 0.2) < 0.03
+
+
+def test_salt_and_test_size_change_the_split(dataset):
+    whole = held_out_ids([dataset])
+    assert held_out_ids([dataset], salt=7) != whole
+    assert abs(len(held_out_ids([dataset], test_size=0.5)) / len(dataset) - 0.5) < 0.03
+
+
+def test_iter_split_parts_partition_the_rows(dataset):
+    chunks = list(load_data(local_path=DATASET_PATH, chunksize=250))
+    train = list(iter_split(chunks, "train"))
+    test = list(iter_split(chunks, "test"))
+    assert sum(len(y) for _, y in train) + sum(len(y) for _, y in test) == len(dataset)
+    assert sum(len(y) for _, y in test) == len(held_out_ids([dataset]))
+    assert all("Id" not in X.columns and "Outcome" not in X.columns for X, _ in train + test)